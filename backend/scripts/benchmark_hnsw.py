@@ -0,0 +1,69 @@
+"""
+Sweep the HNSW parameters of the Chroma collection on the local corpus
+
+For every distance space, M (max_neighbors) and construction ef, a collection is built from
+the same corpus vectors and its build time reported; then for every search ef the queries
+are run one at a time, reporting latency percentiles and recall@k against exact search in
+the same space. Pick the cheapest point that reaches the recall you need and set it with
+CHROMA_HNSW_SPACE, CHROMA_HNSW_M, CHROMA_HNSW_CONSTRUCTION_EF and CHROMA_HNSW_SEARCH_EF.
+
+Usage (from the backend directory):
+    python -m scripts.benchmark_hnsw --k 10
+    python -m scripts.benchmark_hnsw --m 8 16 32 --construction-ef 100 200 --search-ef 10 50 100 200
+"""
+import time
+import argparse
+import itertools
+import tempfile
+
+from src.config.settings import settings
+from src.services.document.vector_backends import ChromaBackend
+from scripts.corpus import add_corpus_arguments, corpus_vectors, exact_top_k, load_corpus, percentile_ms, recall_at_k
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_corpus_arguments(parser)
+    parser.add_argument("--spaces", nargs="+", default=[settings.CHROMA_HNSW_SPACE], choices=ChromaBackend.SPACES)
+    parser.add_argument("--m", nargs="+", type=int, default=[8, 16, 32], help="max_neighbors values")
+    parser.add_argument("--construction-ef", nargs="+", type=int, default=[100, 200])
+    parser.add_argument("--search-ef", nargs="+", type=int, default=[10, 25, 50, 100, 200])
+    args = parser.parse_args()
+    
+    chunks, ids, embeddings, queries = load_corpus(args)
+    vectors = corpus_vectors(chunks, embeddings)
+    truths = {space: exact_top_k(vectors, queries, ids, args.k, metric=space) for space in args.spaces}
+    
+    print(f"\n{'space':<8}{'M':>4}{'c_ef':>6}{'build s':>9}{'s_ef':>6}"
+          f"{'recall@' + str(args.k):>11}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    
+    for space, m, construction_ef in itertools.product(args.spaces, args.m, args.construction_ef):
+        hnsw = {"space": space, "max_neighbors": m, "ef_construction": construction_ef, "ef_search": args.search_ef[0]}
+        
+        with tempfile.TemporaryDirectory() as path:
+            started = time.perf_counter()
+            backend = ChromaBackend.create(path, embeddings, chunks, ids, hnsw=hnsw)
+            build_seconds = time.perf_counter() - started
+            
+            for search_ef in args.search_ef:
+                # Chroma applies a new search ef when the collection is opened again
+                backend.close()
+                backend = ChromaBackend(path, embeddings, hnsw={**hnsw, "ef_search": search_ef})
+                backend.search(queries[0].tolist(), args.k)
+                
+                latencies, results = [], []
+                for query in queries:
+                    started = time.perf_counter()
+                    scored = backend.search(query.tolist(), args.k)
+                    latencies.append(time.perf_counter() - started)
+                    results.append([doc.id for doc, _ in scored])
+                
+                print(f"{space:<8}{m:>4}{construction_ef:>6}{build_seconds:>9.2f}{search_ef:>6}"
+                      f"{recall_at_k(results, truths[space]):>11.3f}{percentile_ms(latencies, 50):>9.2f}"
+                      f"{percentile_ms(latencies, 95):>9.2f}{percentile_ms(latencies, 99):>9.2f}")
+            
+            backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark recall@k against memory for compressed vector codes of the NumPy backend
+
+Each configuration builds a NumpyBackend from the same corpus vectors and reports the bytes
+scanned per vector, the size of the scanned codes, recall@k against exact float32 search
+with and without full-precision rescoring, and the median query latency.
+
+Configurations are written <quantization>[:<dimensions>[:<reduction>]], e.g. int8,
+int8:128:pca or none:96:truncate.
+
+Usage (from the backend directory):
+    python -m scripts.benchmark_vector_compression --k 10
+    python -m scripts.benchmark_vector_compression --synthetic 100000 --configs int8 int8:128:pca
+"""
+import time
+import argparse
+import tempfile
+from typing import Any, Dict, List
+
+from src.config.settings import settings
+from src.services.document.vector_backends import NumpyBackend
+from scripts.corpus import add_corpus_arguments, corpus_vectors, exact_top_k, load_corpus, percentile_ms, recall_at_k
+
+DEFAULT_CONFIGS = ["none", "int8", "int8:192:pca", "int8:128:pca", "int8:64:pca", "int8:128:truncate", "none:128:pca"]
+
+
+def parse_config(config: str) -> Dict[str, Any]:
+    """
+    Parse a configuration into NumpyBackend options
+    
+    Args:
+        config: <quantization>[:<dimensions>[:<reduction>]]
+    
+    Returns:
+        Keyword arguments of the backend
+    """
+    parts = config.split(":")
+    return {
+        "quantization": parts[0],
+        "dimensions": int(parts[1]) if len(parts) > 1 else 0,
+        "reduction": parts[2] if len(parts) > 2 else "truncate",
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_corpus_arguments(parser)
+    parser.add_argument("--configs", nargs="+", default=DEFAULT_CONFIGS, help="Configurations to compare")
+    parser.add_argument("--rescore-factor", type=int, default=settings.VECTOR_RESCORE_FACTOR,
+                        help="Rows rescored in full precision per result")
+    args = parser.parse_args()
+    
+    chunks, ids, embeddings, queries = load_corpus(args)
+    vectors = corpus_vectors(chunks, embeddings)
+    truth = exact_top_k(vectors, queries, ids, args.k)
+    full_bytes = 4 * vectors.shape[1]
+    
+    print(f"\nrecall@{args.k}, shortlist of {args.rescore_factor} x k rescored in full precision "
+          f"(float32 vectors: {full_bytes} bytes each, {full_bytes * len(ids) / 2**20:.1f} MB)\n")
+    print(f"{'config':<20}{'bytes/vec':>10}{'scan MB':>10}{'ratio':>8}{'build s':>9}"
+          f"{'recall':>9}{'no rescore':>12}{'p50 ms':>9}")
+    
+    for config in args.configs:
+        with tempfile.TemporaryDirectory() as path:
+            started = time.perf_counter()
+            backend = NumpyBackend.create(path, embeddings, chunks, ids, rescore_factor=args.rescore_factor, 
+                                          **parse_config(config))
+            build_seconds = time.perf_counter() - started
+            
+            latencies: List[float] = []
+            results = []
+            for query in queries:
+                started = time.perf_counter()
+                results.append([doc.id for doc, _ in backend.search(query, args.k)])
+                latencies.append(time.perf_counter() - started)
+            
+            backend.rescore_factor = 0
+            first_pass = [[doc.id for doc, _ in ranking] for ranking in backend.search_batch(queries, args.k)]
+            backend.close()
+        
+        scanned = backend.scanned_bytes_per_vector()
+        print(f"{config:<20}{scanned:>10}{scanned * len(ids) / 2**20:>10.1f}{full_bytes / scanned:>7.1f}x"
+              f"{build_seconds:>9.2f}{recall_at_k(results, truth):>9.3f}{recall_at_k(first_pass, truth):>12.3f}"
+              f"{percentile_ms(latencies, 50):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
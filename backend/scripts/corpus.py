@@ -0,0 +1,169 @@
+"""
+Corpus, query and ground-truth helpers shared by the retrieval benchmarks
+"""
+import os
+import argparse
+from typing import Dict, List, Tuple
+import numpy as np
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+
+from src.config.settings import settings
+from src.services.document import DocumentLoader, DocumentProcessor, EmbeddingCache, CachedEmbeddings
+
+BACKEND_DIR = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+
+
+class PrecomputedEmbeddings(Embeddings):
+    """
+    Embeddings answering from vectors computed once, so every benchmarked index is built from the same vectors
+    """
+    
+    def __init__(self, vectors: Dict[str, List[float]]):
+        self.vectors = vectors
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.vectors[text] for text in texts]
+    
+    def embed_query(self, text: str) -> List[float]:
+        return self.vectors[text]
+
+
+def add_corpus_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the corpus and query options shared by the benchmarks
+    
+    Args:
+        parser: Parser of the benchmark's command line
+    """
+    parser.add_argument("--folders", nargs="+", 
+                        default=[os.path.join(BACKEND_DIR, settings.RAG_DOCUMENTS_FOLDER), 
+                                 os.path.join(BACKEND_DIR, settings.UPLOADS_FOLDER)],
+                        help="Folders of the corpus (default: the RAG documents and uploads folders)")
+    parser.add_argument("--queries", help="File with one query per line (default: sampled chunk texts)")
+    parser.add_argument("--num-queries", type=int, default=200, help="Queries sampled when no query file is given")
+    parser.add_argument("--k", type=int, default=10, help="Results per query")
+    parser.add_argument("--synthetic", type=int, default=0, 
+                        help="Benchmark this many random low-rank vectors instead of the corpus (no model needed)")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def load_corpus(args: argparse.Namespace) -> Tuple[List[Document], List[str], Embeddings, np.ndarray]:
+    """
+    Load, chunk and embed the corpus and the queries
+    
+    Embeddings go through the persistent embedding cache, so repeated runs do not embed again.
+    
+    Args:
+        args: Parsed command line with the corpus options
+    
+    Returns:
+        Tuple of the chunks, their ids, embeddings answering for the chunks, and the query vectors
+    """
+    if args.synthetic:
+        return _synthetic_corpus(args.synthetic, args.num_queries, args.seed)
+    
+    documents = DocumentLoader.load_multiple_folders(args.folders)
+    chunks = DocumentProcessor(chunk_size=1000, chunk_overlap=200).process_documents(documents)
+    if not chunks:
+        raise SystemExit(f"No documents found in: {', '.join(args.folders)}")
+    
+    embeddings = CachedEmbeddings(
+        embeddings=_load_model(),
+        cache=EmbeddingCache(os.path.join(BACKEND_DIR, settings.EMBEDDING_CACHE_PATH)),
+        model_name=settings.EMBEDDING_MODEL
+    )
+    texts = [chunk.page_content for chunk in chunks]
+    vectors = dict(zip(texts, embeddings.embed_documents(texts)))
+    
+    queries = _read_queries(args.queries) if args.queries else _sample_queries(texts, args.num_queries, args.seed)
+    query_vectors = np.asarray(embeddings.embed_queries(queries), dtype=np.float32)
+    print(f"Corpus: {len(chunks)} chunks, {len(queries)} queries")
+    
+    ids = [f"chunk-{i}" for i in range(len(chunks))]
+    return chunks, ids, PrecomputedEmbeddings(vectors), query_vectors
+
+
+def exact_top_k(vectors: np.ndarray, 
+                query_vectors: np.ndarray, 
+                ids: List[str], 
+                k: int, 
+                metric: str = "cosine") -> List[List[str]]:
+    """
+    Compute the exact top k of every query by brute force
+    
+    Args:
+        vectors: Chunk vectors, one per row
+        query_vectors: Query vectors, one per row
+        ids: Ids of the chunks
+        k: Results per query
+        metric: "cosine", "l2" or "ip" (inner product)
+    
+    Returns:
+        Ids of the exact top k chunks of every query
+    """
+    if metric == "cosine":
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        query_vectors = query_vectors / np.maximum(np.linalg.norm(query_vectors, axis=1, keepdims=True), 1e-12)
+    
+    scores = query_vectors @ vectors.T
+    if metric == "l2":
+        scores = 2 * scores - (vectors * vectors).sum(axis=1)
+    top = np.argsort(-scores, axis=1)[:, :k]
+    return [[ids[row] for row in rows] for rows in top]
+
+
+def recall_at_k(results: List[List[str]], truth: List[List[str]]) -> float:
+    """
+    Compute the mean fraction of the exact top k found by a search
+    
+    Args:
+        results: Ids found for every query
+        truth: Exact top k ids of every query
+    
+    Returns:
+        Mean recall@k over the queries
+    """
+    return float(np.mean([len(set(found) & set(expected)) / max(len(expected), 1) 
+                          for found, expected in zip(results, truth)]))
+
+
+def percentile_ms(latencies: List[float], percentile: float) -> float:
+    """Get a latency percentile in milliseconds from latencies in seconds"""
+    return float(np.percentile(latencies, percentile) * 1000)
+
+
+def _load_model() -> Embeddings:
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=settings.EMBEDDING_MODEL)
+
+
+def _read_queries(path: str) -> List[str]:
+    with open(path, 'r') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def _sample_queries(texts: List[str], count: int, seed: int) -> List[str]:
+    """Use the first sentence of randomly chosen chunks as queries"""
+    rng = np.random.default_rng(seed)
+    chosen = rng.choice(len(texts), size=min(count, len(texts)), replace=False)
+    return [texts[i].split(". ")[0][:200] for i in chosen]
+
+
+def _synthetic_corpus(rows: int, num_queries: int, seed: int, 
+                      dim: int = 384, rank: int = 64) -> Tuple[List[Document], List[str], Embeddings, np.ndarray]:
+    """Generate random vectors concentrated near a low-rank subspace, like sentence embeddings"""
+    rng = np.random.default_rng(seed)
+    basis = rng.standard_normal((rank, dim))
+    vectors = (rng.standard_normal((rows, rank)) @ basis + 0.3 * rng.standard_normal((rows, dim))).astype(np.float32)
+    queries = vectors[rng.choice(rows, size=num_queries)] + 0.5 * rng.standard_normal((num_queries, dim)).astype(np.float32)
+    
+    chunks = [Document(page_content=f"synthetic chunk {i}") for i in range(rows)]
+    embeddings = PrecomputedEmbeddings({chunk.page_content: vector for chunk, vector in zip(chunks, vectors)})
+    print(f"Synthetic corpus: {rows} vectors of {dim} dimensions, {num_queries} queries")
+    return chunks, [f"chunk-{i}" for i in range(rows)], embeddings, queries
+
+
+def corpus_vectors(chunks: List[Document], embeddings: Embeddings) -> np.ndarray:
+    """Get the vectors of the chunks as one matrix"""
+    return np.asarray(embeddings.embed_documents([chunk.page_content for chunk in chunks]), dtype=np.float32)
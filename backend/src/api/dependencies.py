@@ -0,0 +1,34 @@
+from fastapi import Request
+
+from src.services.chatbot_service import ChatbotService
+from src.services.container import ServiceContainer
+from src.services.document import DocumentService
+from src.services.ingestion_jobs import IngestionJobManager
+
+
+def get_services(request: Request) -> ServiceContainer:
+    """
+    Returns the app-scoped service container created in the lifespan
+    """
+    return request.app.state.services
+
+
+def get_chatbot_service(request: Request) -> ChatbotService:
+    """
+    Returns the shared chatbot service
+    """
+    return get_services(request).chatbot_service
+
+
+def get_document_service(request: Request) -> DocumentService:
+    """
+    Returns the shared document service
+    """
+    return get_services(request).document_service
+
+
+def get_job_manager(request: Request) -> IngestionJobManager:
+    """
+    Returns the shared background ingestion job manager
+    """
+    return get_services(request).job_manager
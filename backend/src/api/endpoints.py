@@ -1,24 +1,30 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends
-from fastapi.responses import JSONResponse
-from src.models.api_models import MessageRequest, MessageResponse, DocumentUploadResponse
+from typing import List, Dict, Any, AsyncIterator
+from fastapi.responses import JSONResponse, StreamingResponse
+from src.models.api_models import MessageRequest, MessageResponse, BatchMessageRequest, BatchMessageResponse, BatchMessageResult, DocumentUploadResponse, BulkUploadResponse, BulkUploadFileResult, JobStatusResponse
 from src.services.chatbot_service import ChatbotService
-from src.services.document import DocumentService
+from src.services.document import DocumentService, UploadTooLargeError
+from src.services.ingestion_jobs import IngestionJobManager
+from src.api.dependencies import get_services, get_chatbot_service, get_document_service, get_job_manager
+from src.services.container import ServiceContainer
 from src.config.settings import settings
 import os
+import json
 
 router = APIRouter()
-chatbot_service = ChatbotService()
-document_service = DocumentService()
 
 @router.post("/chat", response_model=MessageResponse)
-async def chat(request: MessageRequest):
+async def chat(
+    request: MessageRequest,
+    chatbot_service: ChatbotService = Depends(get_chatbot_service),
+):
     """
     Chat endpoint to process user messages and return responses
     """
     if not request.message:
         raise HTTPException(status_code=400, detail="Message cannot be empty")
     
-    response = await chatbot_service.process_message(request.message)
+    response = await chatbot_service.process_message(request.message, retrieval_mode=request.retrieval_mode)
     
     if response.get("status") == "error":
         raise HTTPException(status_code=500, detail=response.get("message", "Unknown error"))
@@ -29,27 +35,94 @@ async def chat(request: MessageRequest):
         context=response.get("context")
     )
 
-@router.post("/upload", response_model=DocumentUploadResponse)
+@router.post("/chat/batch", response_model=BatchMessageResponse)
+async def chat_batch(
+    request: BatchMessageRequest,
+    chatbot_service: ChatbotService = Depends(get_chatbot_service),
+):
+    """
+    Chat endpoint answering many messages in one request, e.g. for evaluation runs
+    
+    Results are returned in input order with a status per message; empty messages
+    get an error result and are not sent to the chatbot.
+    """
+    if not request.messages:
+        raise HTTPException(status_code=400, detail="Messages cannot be empty")
+    
+    if len(request.messages) > settings.BATCH_CHAT_MAX_MESSAGES:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Too many messages. Maximum is {settings.BATCH_CHAT_MAX_MESSAGES} per request"
+        )
+    
+    responses: List[Dict[str, Any]] = [
+        {"status": "error", "message": "Message cannot be empty"} for _ in request.messages
+    ]
+    valid = [index for index, message in enumerate(request.messages) if message.strip()]
+    if valid:
+        answers = await chatbot_service.process_batch(
+            [request.messages[index] for index in valid],
+            retrieval_mode=request.retrieval_mode
+        )
+        for index, answer in zip(valid, answers):
+            responses[index] = answer
+    
+    results = [
+        BatchMessageResult(
+            index=index,
+            status=response.get("status", "error"),
+            response=response.get("response"),
+            message=response.get("message"),
+            context=response.get("context")
+        )
+        for index, response in enumerate(responses)
+    ]
+    
+    succeeded = sum(1 for result in results if result.status == "success")
+    
+    return BatchMessageResponse(
+        status="success" if succeeded == len(results) else "error" if succeeded == 0 else "warning",
+        results=results
+    )
+
+@router.post("/chat/stream")
+async def chat_stream(
+    request: MessageRequest,
+    chatbot_service: ChatbotService = Depends(get_chatbot_service),
+):
+    """
+    Chat endpoint streaming the response as server-sent events
+    
+    The first event carries the retrieval context, followed by one "token" event per
+    piece of generated text and a final "done" or "error" event.
+    """
+    if not request.message:
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
+    
+    return StreamingResponse(
+        _sse_events(chatbot_service.stream_message(request.message, retrieval_mode=request.retrieval_mode)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _sse_events(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """Format chat events as server-sent events"""
+    async for event in events:
+        name = event.pop("event")
+        yield f"event: {name}\ndata: {json.dumps(event)}\n\n"
+
+@router.post("/upload", response_model=DocumentUploadResponse, status_code=202)
 async def upload_document(
     file: UploadFile = File(...),
+    document_service: DocumentService = Depends(get_document_service),
+    job_manager: IngestionJobManager = Depends(get_job_manager),
 ):
     """
     Upload a document to be used for RAG
+    
+    The file is saved right away and indexed by a background job; poll /jobs/{job_id} for progress.
     """
     try:
-        file_size = 0
-        file_content = await file.read()
-        file_size = len(file_content)
-        
-        if file_size > settings.MAX_UPLOAD_SIZE:
-            return JSONResponse(
-                status_code=413,
-                content={
-                    "status": "error",
-                    "message": f"File too large. Maximum size is {settings.MAX_UPLOAD_SIZE / 1024 / 1024}MB"
-                }
-            )
-        
         filename = file.filename
         _, file_extension = os.path.splitext(filename)
         
@@ -62,15 +135,52 @@ async def upload_document(
                 }
             )
         
-        result = document_service.save_uploaded_document(file_content, filename)
+        try:
+            save_result = await document_service.store_upload_stream(file, filename)
+        except UploadTooLargeError as e:
+            return JSONResponse(
+                status_code=413,
+                content={
+                    "status": "error",
+                    "message": str(e)
+                }
+            )
         
-        if result["status"] == "error":
+        if save_result["status"] == "error":
             return JSONResponse(
                 status_code=500,
-                content=result
+                content=save_result
+            )
+        
+        if save_result.get("duplicate"):
+            return JSONResponse(
+                status_code=200,
+                content=DocumentUploadResponse(
+                    status="success",
+                    message=save_result["message"],
+                    document_id=save_result["document_id"],
+                    document_name=filename,
+                    duplicate=True
+                ).model_dump()
             )
         
-        return DocumentUploadResponse(**result)
+        job = job_manager.submit(
+            document_service.index_uploaded_document,
+            save_result["file_path"],
+            save_result["document_id"],
+            filename,
+            save_result["content_hash"],
+            document_id=save_result["document_id"],
+            document_name=filename
+        )
+        
+        return DocumentUploadResponse(
+            status="accepted",
+            message="Document uploaded and queued for processing",
+            document_id=save_result["document_id"],
+            document_name=filename,
+            job_id=job["job_id"]
+        )
     
     except Exception as e:
         return JSONResponse(
@@ -79,4 +189,86 @@ async def upload_document(
                 "status": "error",
                 "message": f"Error uploading document: {str(e)}"
             }
-        )
\ No newline at end of file
+        )
+
+@router.post("/upload/bulk", response_model=BulkUploadResponse, status_code=202)
+async def upload_documents_bulk(
+    files: List[UploadFile] = File(...),
+    document_service: DocumentService = Depends(get_document_service),
+    job_manager: IngestionJobManager = Depends(get_job_manager),
+):
+    """
+    Upload many documents, or .zip archives of documents, in one request
+    
+    All new documents are indexed together by a single background job that parses them
+    in parallel and commits their chunks in large batches; poll /jobs/{job_id} for progress.
+    """
+    try:
+        save_results = await document_service.store_bulk_uploads(files)
+        
+        new_uploads = [
+            result for result in save_results
+            if result["status"] != "error" and not result.get("duplicate")
+        ]
+        
+        file_results = [
+            BulkUploadFileResult(
+                document_name=result.get("document_name", ""),
+                status="error" if result["status"] == "error" else "duplicate" if result.get("duplicate") else "accepted",
+                message=result.get("message"),
+                document_id=result.get("document_id"),
+                duplicate=bool(result.get("duplicate"))
+            )
+            for result in save_results
+        ]
+        
+        if not new_uploads:
+            return JSONResponse(
+                status_code=200,
+                content=BulkUploadResponse(
+                    status="success" if save_results and all(r["status"] != "error" for r in save_results) else "error",
+                    message="No new documents to process",
+                    files=file_results
+                ).model_dump()
+            )
+        
+        job = job_manager.submit(
+            document_service.index_uploaded_documents,
+            new_uploads,
+            document_name=f"{len(new_uploads)} documents"
+        )
+        
+        return BulkUploadResponse(
+            status="accepted",
+            message=f"{len(new_uploads)} of {len(save_results)} documents queued for processing",
+            job_id=job["job_id"],
+            files=file_results
+        )
+    
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={
+                "status": "error",
+                "message": f"Error uploading documents: {str(e)}"
+            }
+        )
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str, job_manager: IngestionJobManager = Depends(get_job_manager)):
+    """
+    Status of a background ingestion job
+    """
+    job = job_manager.get(job_id)
+    
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    
+    return JobStatusResponse(**job)
+
+@router.get("/metrics")
+async def metrics(services: ServiceContainer = Depends(get_services)):
+    """
+    Runtime metrics of the shared services, such as embedding cache hit rates
+    """
+    return services.metrics()
@@ -19,18 +19,67 @@ class Settings(BaseSettings):
     FLOW_CLIENT_ID: str = os.getenv("FLOW_CLIENT_ID", "")
     FLOW_CLIENT_SECRET: str = os.getenv("FLOW_CLIENT_SECRET", "")
     
+    # Flow HTTP client settings
+    FLOW_HTTP2: bool = os.getenv("FLOW_HTTP2", "true").lower() == "true"
+    FLOW_MAX_CONNECTIONS: int = int(os.getenv("FLOW_MAX_CONNECTIONS", "100"))  # open connections to the Flow API
+    FLOW_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("FLOW_MAX_KEEPALIVE_CONNECTIONS", "20"))  # idle connections kept open
+    FLOW_KEEPALIVE_EXPIRY: float = float(os.getenv("FLOW_KEEPALIVE_EXPIRY", "30"))  # seconds an idle connection is kept
+    FLOW_HTTP_TIMEOUT: float = float(os.getenv("FLOW_HTTP_TIMEOUT", "60"))  # seconds per request
+    
     # RAG settings
     RAG_DOCUMENTS_FOLDER: str = os.getenv("RAG_DOCUMENTS_FOLDER", "docs")
     UPLOADS_FOLDER: str = os.getenv("UPLOADS_FOLDER", "uploads")
+    DOCUMENT_LOADER_WORKERS: int = int(os.getenv("DOCUMENT_LOADER_WORKERS", "0"))  # 0 = one process per CPU, 1 = sequential
     
     # Vector store settings
     VECTOR_STORE_PATH: str = os.getenv("VECTOR_STORE_PATH", "vector_store")
+    VECTOR_BACKEND: str = os.getenv("VECTOR_BACKEND", "chroma")  # chroma (HNSW) or numpy (exact search over a memory-mapped file)
+    CHROMA_HNSW_SPACE: str = os.getenv("CHROMA_HNSW_SPACE", "l2")  # l2, cosine or ip; fixed when the collection is created
+    CHROMA_HNSW_M: int = int(os.getenv("CHROMA_HNSW_M", "16"))  # graph neighbors per node; fixed when the collection is created
+    CHROMA_HNSW_CONSTRUCTION_EF: int = int(os.getenv("CHROMA_HNSW_CONSTRUCTION_EF", "100"))  # candidates explored per insert; fixed at creation
+    CHROMA_HNSW_SEARCH_EF: int = int(os.getenv("CHROMA_HNSW_SEARCH_EF", "100"))  # candidates explored per query; applied on every startup
+    VECTOR_QUANTIZATION: str = os.getenv("VECTOR_QUANTIZATION", "none")  # numpy backend: none or int8 codes scanned before rescoring
+    VECTOR_DIMENSIONS: int = int(os.getenv("VECTOR_DIMENSIONS", "0"))  # numpy backend: dimensions of the codes, 0 keeps all
+    VECTOR_REDUCTION: str = os.getenv("VECTOR_REDUCTION", "truncate")  # numpy backend: truncate or pca, when VECTOR_DIMENSIONS is set
+    VECTOR_RESCORE_FACTOR: int = int(os.getenv("VECTOR_RESCORE_FACTOR", "10"))  # numpy backend: rows rescored in full precision per result, 0 disables
+    INGESTION_BATCH_SIZE: int = int(os.getenv("INGESTION_BATCH_SIZE", "256"))  # chunks embedded and added per batch
+    BULK_INGESTION_BATCH_SIZE: int = int(os.getenv("BULK_INGESTION_BATCH_SIZE", "2048"))  # chunks per batch for bulk uploads
+    RETRIEVAL_WORKERS: int = int(os.getenv("RETRIEVAL_WORKERS", "8"))  # threads running vector searches for chat requests
+    RETRIEVAL_SCORE_THRESHOLD: float = float(os.getenv("RETRIEVAL_SCORE_THRESHOLD", "0.5"))  # min cosine similarity of a retrieved chunk to the query
+    RETRIEVAL_MIN_K: int = int(os.getenv("RETRIEVAL_MIN_K", "1"))  # chunks kept when at least one passes the threshold
+    RETRIEVAL_MAX_K: int = int(os.getenv("RETRIEVAL_MAX_K", "5"))  # chunks searched per query
+    RETRIEVAL_MODE: str = os.getenv("RETRIEVAL_MODE", "dense")  # dense, lexical or hybrid (dense + BM25)
+    RETRIEVAL_MMR: bool = os.getenv("RETRIEVAL_MMR", "false").lower() == "true"  # diversify results with maximal marginal relevance
+    RETRIEVAL_MMR_FETCH_K: int = int(os.getenv("RETRIEVAL_MMR_FETCH_K", "20"))  # candidates searched before diversifying
+    RETRIEVAL_MMR_LAMBDA: float = float(os.getenv("RETRIEVAL_MMR_LAMBDA", "0.5"))  # 1 = relevance only, 0 = diversity only
     
     # Model settings
     EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache/embeddings.sqlite3")
+    
+    # Query cache settings
+    QUERY_EMBEDDING_CACHE_SIZE: int = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))  # cached query vectors, 0 disables
+    QUERY_EMBEDDING_BATCH_SIZE: int = int(os.getenv("QUERY_EMBEDDING_BATCH_SIZE", "16"))  # max queries embedded per model call
+    QUERY_EMBEDDING_MAX_WAIT_MS: float = float(os.getenv("QUERY_EMBEDDING_MAX_WAIT_MS", "5"))  # max wait for a batch to fill
+    RETRIEVAL_CACHE_SIZE: int = int(os.getenv("RETRIEVAL_CACHE_SIZE", "1024"))  # cached search results, 0 disables
+    
+    # Answer cache settings
+    ANSWER_CACHE_SIZE: int = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))  # cached answers, 0 disables the cache
+    ANSWER_CACHE_TTL: int = int(os.getenv("ANSWER_CACHE_TTL", "3600"))  # seconds an answer stays valid
+    ANSWER_CACHE_SIMILARITY: float = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))  # min cosine similarity of questions
+    
+    # Chat settings
+    CHAT_COALESCING: bool = os.getenv("CHAT_COALESCING", "true").lower() == "true"  # share work of identical concurrent chats
+    BATCH_CHAT_MAX_MESSAGES: int = int(os.getenv("BATCH_CHAT_MAX_MESSAGES", "5000"))  # messages accepted per batch request
+    BATCH_CHAT_CONCURRENCY: int = int(os.getenv("BATCH_CHAT_CONCURRENCY", "8"))  # concurrent Flow API calls per batch
+    CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))  # max prompt tokens of retrieved chunks, 0 disables the limit
     
     # Upload settings
     MAX_UPLOAD_SIZE: int = int(os.getenv("MAX_UPLOAD_SIZE", "10485760"))  # 10MB default
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", "1048576"))  # bytes read per iteration when streaming uploads
+    UPLOAD_WORKERS: int = int(os.getenv("UPLOAD_WORKERS", "2"))  # background ingestion threads
+    JOB_HISTORY_SIZE: int = int(os.getenv("JOB_HISTORY_SIZE", "1000"))  # finished jobs kept for /jobs queries
+    BULK_UPLOAD_MAX_FILES: int = int(os.getenv("BULK_UPLOAD_MAX_FILES", "500"))  # documents accepted per bulk upload
     
     # Use ConfigDict instead of class Config
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
@@ -5,7 +5,7 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from src.api.endpoints import router as api_router
-from src.services.document import DocumentService
+from src.services.container import ServiceContainer
 from src.config.settings import settings
 
 if __name__ == "__main__":
@@ -27,8 +27,10 @@ async def lifespan(app: FastAPI):
     print(f"Uploads folder: {uploads_folder}")
     
     print("Initializing RAG system...")
-    doc_service = DocumentService()
-    rag_status = doc_service.setup_rag_system()
+    services = ServiceContainer()
+    app.state.services = services
+    services.start()
+    rag_status = services.document_service.setup_rag_system()
     print(f"RAG system initialization: {rag_status['status']}")
     print(f"Message: {rag_status['message']}")
     print("Initialization complete!")
@@ -36,6 +38,7 @@ async def lifespan(app: FastAPI):
     yield
     
     print("Shutting down...")
+    await services.close()
 
 app = FastAPI(
     title="CI&T Flow RAG Chatbot",
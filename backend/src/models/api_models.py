@@ -1,11 +1,14 @@
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Literal
+
+RetrievalMode = Literal["dense", "lexical", "hybrid"]
 
 class MessageRequest(BaseModel):
     """
     Request model for chat messages
     """
     message: str
+    retrieval_mode: Optional[RetrievalMode] = None
 
 class MessageResponse(BaseModel):
     """
@@ -15,6 +18,30 @@ class MessageResponse(BaseModel):
     status: str
     context: Optional[Dict[str, Any]] = None
 
+class BatchMessageRequest(BaseModel):
+    """
+    Request model for batch chat messages
+    """
+    messages: List[str]
+    retrieval_mode: Optional[RetrievalMode] = None
+
+class BatchMessageResult(BaseModel):
+    """
+    Result of a single message of a batch chat request
+    """
+    index: int
+    status: str
+    response: Optional[str] = None
+    message: Optional[str] = None
+    context: Optional[Dict[str, Any]] = None
+
+class BatchMessageResponse(BaseModel):
+    """
+    Response model for batch chat messages
+    """
+    status: str
+    results: List[BatchMessageResult]
+
 class DocumentUploadResponse(BaseModel):
     """
     Response model for document uploads
@@ -22,4 +49,42 @@ class DocumentUploadResponse(BaseModel):
     status: str
     message: str
     document_id: Optional[str] = None
-    document_name: Optional[str] = None
\ No newline at end of file
+    document_name: Optional[str] = None
+    job_id: Optional[str] = None
+    duplicate: bool = False
+
+class BulkUploadFileResult(BaseModel):
+    """
+    Outcome of a single file of a bulk upload
+    """
+    document_name: str
+    status: str
+    message: Optional[str] = None
+    document_id: Optional[str] = None
+    duplicate: bool = False
+
+class BulkUploadResponse(BaseModel):
+    """
+    Response model for bulk document uploads
+    """
+    status: str
+    message: str
+    job_id: Optional[str] = None
+    files: List[BulkUploadFileResult]
+
+class JobStatusResponse(BaseModel):
+    """
+    Response model for background ingestion job status
+    """
+    job_id: str
+    status: str
+    message: str
+    document_id: Optional[str] = None
+    document_name: Optional[str] = None
+    chunks: Optional[int] = None
+    files: Optional[List[Dict[str, Any]]] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    queued_seconds: Optional[float] = None
+    processing_seconds: Optional[float] = None
\ No newline at end of file
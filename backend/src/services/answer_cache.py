@@ -0,0 +1,182 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+import numpy as np
+from langchain.schema import Document
+
+from src.config.settings import settings
+
+
+class SemanticAnswerCache:
+    """
+    In-memory cache of chat answers looked up by question similarity
+    
+    An answer is reused when a new question's embedding is close enough to a cached
+    question's and the retrieval returned the same context. Entries expire after a
+    TTL, the least recently used ones are evicted first, and everything is dropped
+    as soon as the index version changes.
+    """
+    
+    def __init__(self,
+                 max_entries: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None,
+                 similarity_threshold: Optional[float] = None):
+        """
+        Initialize the answer cache
+        
+        Args:
+            max_entries: Maximum number of cached answers; defaults to settings.ANSWER_CACHE_SIZE
+            ttl_seconds: Seconds an answer stays valid; defaults to settings.ANSWER_CACHE_TTL
+            similarity_threshold: Minimum cosine similarity between questions; defaults to settings.ANSWER_CACHE_SIMILARITY
+        """
+        self.max_entries = max_entries or settings.ANSWER_CACHE_SIZE
+        self.ttl_seconds = ttl_seconds or settings.ANSWER_CACHE_TTL
+        self.similarity_threshold = similarity_threshold or settings.ANSWER_CACHE_SIMILARITY
+        
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 0
+        self._index_version: Optional[int] = None
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0
+    
+    @staticmethod
+    def fingerprint(documents: List[Document]) -> str:
+        """
+        Build a fingerprint of retrieved context
+        
+        Args:
+            documents: Retrieved document chunks
+        
+        Returns:
+            Hex digest identifying the chunks and their order
+        """
+        digest = hashlib.sha256()
+        for doc in documents:
+            digest.update(doc.page_content.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+    
+    def lookup(self,
+               embedding: List[float],
+               context_fingerprint: str,
+               index_version: int) -> Optional[Dict[str, Any]]:
+        """
+        Find the answer of a similar question asked with the same context
+        
+        Args:
+            embedding: Embedding of the question
+            context_fingerprint: Fingerprint of the context retrieved for the question
+            index_version: Current version of the vector store index
+        
+        Returns:
+            Copy of the cached response or None on a miss
+        """
+        query = self._normalize(embedding)
+        
+        with self._lock:
+            self._check_version(index_version)
+            self._expire()
+            
+            candidates = [
+                (entry_id, entry) for entry_id, entry in self._entries.items()
+                if entry["fingerprint"] == context_fingerprint
+            ]
+            
+            if candidates:
+                similarities = np.stack([entry["embedding"] for _, entry in candidates]) @ query
+                best = int(np.argmax(similarities))
+                
+                if similarities[best] >= self.similarity_threshold:
+                    entry_id, entry = candidates[best]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    self.saved_seconds += entry["latency_seconds"]
+                    return dict(entry["response"])
+            
+            self.misses += 1
+            return None
+    
+    def store(self,
+              embedding: List[float],
+              context_fingerprint: str,
+              index_version: int,
+              response: Dict[str, Any],
+              latency_seconds: float) -> None:
+        """
+        Cache the answer to a question
+        
+        Args:
+            embedding: Embedding of the question
+            context_fingerprint: Fingerprint of the context the answer was generated from
+            index_version: Version of the vector store index the context was retrieved from
+            response: Response dictionary to cache
+            latency_seconds: Time it took to produce the answer, reported as saved on every hit
+        """
+        with self._lock:
+            self._check_version(index_version)
+            if index_version != self._index_version:
+                return
+            
+            self._entries[self._next_id] = {
+                "embedding": self._normalize(embedding),
+                "fingerprint": context_fingerprint,
+                "response": dict(response),
+                "created_at": time.monotonic(),
+                "latency_seconds": latency_seconds,
+            }
+            self._next_id += 1
+            
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop every cached answer"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache hit and miss counters
+        
+        Returns:
+            Dictionary with hits, misses, hit rate, number of entries, invalidations
+            and the total generation time saved by hits
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "invalidations": self.invalidations,
+                "saved_seconds": self.saved_seconds,
+            }
+    
+    def _check_version(self, index_version: int) -> None:
+        """Drop every entry when the index moved to a newer version; caller holds the lock"""
+        if self._index_version is None or index_version > self._index_version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._index_version = index_version
+    
+    def _expire(self) -> None:
+        """Drop entries older than the TTL; caller holds the lock"""
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [entry_id for entry_id, entry in self._entries.items() if entry["created_at"] < cutoff]
+        for entry_id in expired:
+            del self._entries[entry_id]
+    
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        """Scale a vector to unit length so dot products are cosine similarities"""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
@@ -1,14 +1,35 @@
-from typing import Dict, Any, List
+import time
+import asyncio
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
+from langchain.schema import Document
 from src.services.flow_api import FlowAPIService
 from src.services.document import DocumentService
+from src.services.answer_cache import SemanticAnswerCache
+from src.services.request_coalescer import RequestCoalescer
+from src.config.settings import settings
 
 class ChatbotService:
     """
     Service to handle chatbot interactions using RAG and CI&T Flow API
     """
-    def __init__(self):
-        self.flow_api = FlowAPIService()
-        self.document_service = DocumentService()
+    def __init__(self,
+                 document_service: Optional[DocumentService] = None,
+                 flow_api: Optional[FlowAPIService] = None,
+                 answer_cache: Optional[SemanticAnswerCache] = None,
+                 coalescer: Optional[RequestCoalescer] = None):
+        """
+        Initialize the chatbot service
+        
+        Args:
+            document_service: Shared document service; a new one is created if omitted
+            flow_api: Shared Flow API service; a new one is created if omitted
+            answer_cache: Cache of answers to similar questions; answers are not cached if omitted
+            coalescer: Shares the work of identical concurrent messages; every message is processed on its own if omitted
+        """
+        self.flow_api = flow_api or FlowAPIService()
+        self.document_service = document_service or DocumentService()
+        self.answer_cache = answer_cache
+        self.coalescer = coalescer
     
     async def setup(self) -> Dict[str, Any]:
         """
@@ -23,33 +44,244 @@ class ChatbotService:
             "rag_status": rag_status,
         }
     
-    async def process_message(self, message: str) -> Dict[str, Any]:
+    async def process_message(self, message: str, retrieval_mode: Optional[str] = None) -> Dict[str, Any]:
         """
         Process a user message using RAG and CI&T Flow API
         
         Args:
             message: The user's message
+            retrieval_mode: "dense", "lexical" or "hybrid" retrieval; defaults to settings.RETRIEVAL_MODE
             
         Returns:
             Response dictionary
         """
+        if self.coalescer is None:
+            return await self._process_message(message, retrieval_mode)
+        
+        return await self.coalescer.run(
+            ("chat", self._coalescing_key(message), retrieval_mode), 
+            lambda: self._process_message(message, retrieval_mode)
+        )
+    
+    async def _process_message(self, message: str, retrieval_mode: Optional[str] = None) -> Dict[str, Any]:
+        """Retrieve context and generate the response for a message"""
+        try:
+            start_time = time.perf_counter()
+            relevant_docs, cache_key = await self._retrieve(message, retrieval_mode)
+            return await self._answer(message, relevant_docs, cache_key, start_time)
+        except Exception as e:
+            return {"status": "error", "message": f"Error processing message: {str(e)}"}
+    
+    async def process_batch(self, 
+                            messages: List[str], 
+                            concurrency: Optional[int] = None,
+                            retrieval_mode: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Process many user messages at once
+        
+        All queries are embedded in one batched model call and searched on the retrieval
+        pool, then the responses are generated with at most `concurrency` Flow API calls
+        in flight at a time.
+        
+        Args:
+            messages: The user's messages
+            concurrency: Maximum concurrent generations; defaults to settings.BATCH_CHAT_CONCURRENCY
+            retrieval_mode: "dense", "lexical" or "hybrid" retrieval; defaults to settings.RETRIEVAL_MODE
+            
+        Returns:
+            One response dictionary per message, in input order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(messages)
+        
+        valid = [i for i, message in enumerate(messages) if message and message.strip()]
+        for i in set(range(len(messages))) - set(valid):
+            results[i] = {"status": "error", "message": "Message cannot be empty"}
+        
+        if not valid:
+            return results
+        
+        try:
+            index_version = self.document_service.index_version
+            embeddings = await self.document_service.aembed_queries([messages[i] for i in valid])
+            retrievals = await asyncio.gather(*(
+                self.document_service.aquery_vector_store(messages[i], embedding=embedding, mode=retrieval_mode)
+                for i, embedding in zip(valid, embeddings)
+            ))
+        except Exception as e:
+            for i in valid:
+                results[i] = {"status": "error", "message": f"Error processing message: {str(e)}"}
+            return results
+        
+        semaphore = asyncio.Semaphore(concurrency or settings.BATCH_CHAT_CONCURRENCY)
+        
+        async def answer(i: int, embedding: List[float], relevant_docs: List[Document]) -> None:
+            cache_key = None
+            if self.answer_cache is not None:
+                cache_key = (embedding, SemanticAnswerCache.fingerprint(relevant_docs), index_version)
+            
+            async with semaphore:
+                try:
+                    results[i] = await self._answer(messages[i], relevant_docs, cache_key, time.perf_counter())
+                except Exception as e:
+                    results[i] = {"status": "error", "message": f"Error processing message: {str(e)}"}
+        
+        await asyncio.gather(*(
+            answer(i, embedding, relevant_docs)
+            for i, embedding, relevant_docs in zip(valid, embeddings, retrievals)
+        ))
+        
+        return results
+    
+    async def _answer(self, 
+                      message: str, 
+                      relevant_docs: List[Document], 
+                      cache_key: Optional[Tuple[List[float], str, int]], 
+                      start_time: float) -> Dict[str, Any]:
+        """Serve the cached answer for a message or generate it from the retrieved documents"""
+        cached = self._lookup_answer(cache_key)
+        if cached is not None:
+            cached["context"] = self._build_context(relevant_docs, cached=True)
+            return cached
+        
+        context_chunks = [doc.page_content for doc in relevant_docs]
+        
+        response = await self.flow_api.generate_response(message, context_chunks)
+        context_tokens = response.pop("context_tokens", None)
+        
+        if response.get("status") == "success":
+            self._store_answer(cache_key, response, time.perf_counter() - start_time)
+            response["context"] = self._build_context(relevant_docs, context_tokens=context_tokens)
+        
+        return response
+    
+    async def stream_message(self, message: str, retrieval_mode: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a user message and stream the response as it is generated
+        
+        Args:
+            message: The user's message
+            retrieval_mode: "dense", "lexical" or "hybrid" retrieval; defaults to settings.RETRIEVAL_MODE
+            
+        Yields:
+            A "context" event with the retrieved sources, then "token" events with
+            pieces of the response, and finally a "done" or "error" event
+        """
+        if self.coalescer is None:
+            events = self._stream_message(message, retrieval_mode)
+        else:
+            events = self.coalescer.stream(
+                ("stream", self._coalescing_key(message), retrieval_mode), 
+                lambda: self._stream_message(message, retrieval_mode)
+            )
+        
+        async for event in events:
+            yield event
+    
+    async def _stream_message(self, message: str, retrieval_mode: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Retrieve context and stream the response events for a message"""
         try:
-            relevant_docs = self.document_service.query_vector_store(message)
+            start_time = time.perf_counter()
+            relevant_docs, cache_key = await self._retrieve(message, retrieval_mode)
+            
+            cached = self._lookup_answer(cache_key)
+            if cached is not None:
+                yield {"event": "context", "context": self._build_context(relevant_docs, cached=True)}
+                yield {"event": "token", "content": cached["response"]}
+                yield {"event": "done", "status": "success"}
+                return
             
             context_chunks = [doc.page_content for doc in relevant_docs]
+            packed = self.flow_api.pack_context(context_chunks)
+            
+            yield {"event": "context", "context": self._build_context(relevant_docs, context_tokens=packed.stats())}
             
-            response = await self.flow_api.generate_response(message, context_chunks)
+            tokens = []
             
-            if response.get("status") == "success":
-                response["context"] = {
-                    "num_docs_retrieved": len(relevant_docs),
-                    "sources": [
-                        {"source": doc.metadata.get("source", "Unknown"), 
-                         "page": doc.metadata.get("page", 0) if "page" in doc.metadata else None}
-                        for doc in relevant_docs
-                    ]
-                }
+            async for token in self.flow_api.stream_response(message, context_chunks, packed_context=packed):
+                tokens.append(token)
+                yield {"event": "token", "content": token}
             
-            return response
+            self._store_answer(
+                cache_key, 
+                {"status": "success", "response": "".join(tokens)}, 
+                time.perf_counter() - start_time
+            )
+            yield {"event": "done", "status": "success"}
         except Exception as e:
-            return {"status": "error", "message": f"Error processing message: {str(e)}"}
\ No newline at end of file
+            yield {"event": "error", "status": "error", "message": f"Error processing message: {str(e)}"}
+    
+    @staticmethod
+    def _coalescing_key(message: str) -> str:
+        """Normalize a message so that identical questions share one in-flight request"""
+        return " ".join(message.split())
+    
+    async def _retrieve(self, 
+                        message: str, 
+                        retrieval_mode: Optional[str] = None) -> Tuple[List[Document], Optional[Tuple[List[float], str, int]]]:
+        """
+        Retrieve the context of a message
+        
+        When the answer cache is enabled the query is embedded once and that embedding
+        is used both for the vector search and for the cache key.
+        
+        Args:
+            message: The user's message
+            retrieval_mode: "dense", "lexical" or "hybrid" retrieval; defaults to settings.RETRIEVAL_MODE
+            
+        Returns:
+            Tuple of the relevant documents and the answer cache key, None if caching is disabled
+        """
+        if self.answer_cache is None:
+            return await self.document_service.aquery_vector_store(message, mode=retrieval_mode), None
+        
+        index_version = self.document_service.index_version
+        embedding = await self.document_service.aembed_query(message)
+        relevant_docs = await self.document_service.aquery_vector_store(message, embedding=embedding, mode=retrieval_mode)
+        
+        return relevant_docs, (embedding, SemanticAnswerCache.fingerprint(relevant_docs), index_version)
+    
+    def _lookup_answer(self, cache_key: Optional[Tuple[List[float], str, int]]) -> Optional[Dict[str, Any]]:
+        """Return the cached answer for a cache key, if any"""
+        if cache_key is None:
+            return None
+        return self.answer_cache.lookup(*cache_key)
+    
+    def _store_answer(self, 
+                      cache_key: Optional[Tuple[List[float], str, int]], 
+                      response: Dict[str, Any], 
+                      latency_seconds: float) -> None:
+        """Cache a generated answer under a cache key"""
+        if cache_key is None:
+            return
+        self.answer_cache.store(
+            *cache_key, 
+            {"status": response["status"], "response": response["response"]}, 
+            latency_seconds
+        )
+    
+    @staticmethod
+    def _build_context(relevant_docs: List[Document], 
+                       cached: bool = False, 
+                       context_tokens: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """
+        Describe the retrieved documents for the response
+        
+        Args:
+            relevant_docs: Documents retrieved for the message
+            cached: Whether the answer was served from the answer cache
+            context_tokens: Tokens used and dropped when packing the documents into the prompt
+            
+        Returns:
+            Dictionary with the number of documents, their sources and relevance scores, the cache flag and the token accounting
+        """
+        return {
+            **(context_tokens or {}),
+            "cached": cached,
+            "num_docs_retrieved": len(relevant_docs),
+            "sources": [
+                {"source": doc.metadata.get("source", "Unknown"), 
+                 "page": doc.metadata.get("page", 0) if "page" in doc.metadata else None,
+                 "score": doc.metadata.get("relevance_score")}
+                for doc in relevant_docs
+            ]
+        }
\ No newline at end of file
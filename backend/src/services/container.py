@@ -0,0 +1,71 @@
+import os
+from typing import Dict, Any
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from src.config.settings import settings
+from src.services.chatbot_service import ChatbotService
+from src.services.flow_api import FlowAPIService
+from src.services.answer_cache import SemanticAnswerCache
+from src.services.request_coalescer import RequestCoalescer
+from src.services.document import DocumentService, EmbeddingCache, CachedEmbeddings
+from src.services.ingestion_jobs import IngestionJobManager
+
+
+class ServiceContainer:
+    """
+    App-scoped container holding the services shared by every request.
+    
+    Created once in the application lifespan so the embedding model is loaded
+    a single time and every route queries the same vector store handle.
+    """
+    def __init__(self):
+        backend_dir = os.path.abspath(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+        
+        self.embedding_cache = EmbeddingCache(
+            os.path.join(backend_dir, settings.EMBEDDING_CACHE_PATH)
+        )
+        self.embeddings = CachedEmbeddings(
+            embeddings=HuggingFaceEmbeddings(model_name=settings.EMBEDDING_MODEL),
+            cache=self.embedding_cache,
+            model_name=settings.EMBEDDING_MODEL
+        )
+        self.document_service = DocumentService(embeddings=self.embeddings)
+        self.vector_store_manager = self.document_service.vector_store_manager
+        self.flow_api = FlowAPIService()
+        self.answer_cache = SemanticAnswerCache() if settings.ANSWER_CACHE_SIZE > 0 else None
+        self.coalescer = RequestCoalescer() if settings.CHAT_COALESCING else None
+        self.chatbot_service = ChatbotService(
+            document_service=self.document_service,
+            flow_api=self.flow_api,
+            answer_cache=self.answer_cache,
+            coalescer=self.coalescer
+        )
+        self.job_manager = IngestionJobManager()
+    
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Collect runtime metrics from the shared services
+        
+        Returns:
+            Dictionary of metrics grouped by component
+        """
+        return {
+            "embedding_cache": self.embeddings.stats(),
+            "query_embedding_cache": self.vector_store_manager.query_embedding_cache.stats(),
+            "query_embedding_batches": self.vector_store_manager.query_batcher.stats(),
+            "retrieval_cache": self.vector_store_manager.retrieval_cache.stats(),
+            "answer_cache": self.answer_cache.stats() if self.answer_cache else None,
+            "chat_coalescing": self.coalescer.stats() if self.coalescer else None,
+            "ingestion_jobs": self.job_manager.stats(),
+        }
+    
+    def start(self) -> None:
+        """Start the background tasks of the shared services; call from a running event loop"""
+        self.flow_api.start()
+    
+    async def close(self) -> None:
+        """Release resources held by the shared services"""
+        await self.flow_api.aclose()
+        self.job_manager.shutdown()
+        self.document_service.close()
+        self.embedding_cache.close()
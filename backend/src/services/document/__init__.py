@@ -27,12 +27,24 @@ from .document_service import DocumentService
 from .document_loader import DocumentLoader
 from .document_processor import DocumentProcessor
 from .vector_store_manager import VectorStoreManager
-from .upload_handler import UploadHandler
+from .upload_handler import UploadHandler, UploadTooLargeError
+from .embedding_cache import EmbeddingCache, CachedEmbeddings
+from .embedding_batcher import EmbeddingBatcher
+from .index_manifest import IndexManifest
+from .ingestion_pipeline import IngestionPipeline
+from .upload_registry import UploadRegistry
 
 __all__ = [
     'DocumentService',
     'DocumentLoader', 
     'DocumentProcessor',
     'VectorStoreManager',
-    'UploadHandler'
+    'UploadHandler',
+    'UploadTooLargeError',
+    'EmbeddingCache',
+    'CachedEmbeddings',
+    'EmbeddingBatcher',
+    'IndexManifest',
+    'IngestionPipeline',
+    'UploadRegistry'
 ]
\ No newline at end of file
@@ -1,22 +1,49 @@
 import os
-from typing import List
+import multiprocessing
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, List, Iterator, Optional, Tuple
 from langchain.schema import Document
 from langchain_community.document_loaders import TextLoader, PyPDFLoader
 
+from src.config.settings import settings
+
+
+def _load_file_task(file_path: str) -> Tuple[List[Document], Optional[str]]:
+    """
+    Load a single file inside a worker process
+    
+    Args:
+        file_path: Path to the file
+    
+    Returns:
+        Tuple of the loaded documents and an error message, if loading failed
+    """
+    try:
+        return DocumentLoader.load_file(file_path), None
+    except Exception as e:
+        return [], str(e)
+
 
 class DocumentLoader:
     """
     Handles loading documents from files and folders
     """
     
+    SUPPORTED_EXTENSIONS = ('.txt', '.pdf')
+    
     @staticmethod
-    def load_from_folder(folder_path: str) -> List[Document]:
+    def load_from_folder(folder_path: str,
+                         max_workers: Optional[int] = None,
+                         executor: Optional[Executor] = None) -> List[Document]:
         """
         Load documents from a specific folder
         
         Args:
             folder_path: Path to the folder containing documents
-            
+            max_workers: Number of loader processes; defaults to settings.DOCUMENT_LOADER_WORKERS
+            executor: Long-lived loader pool from create_pool; a temporary pool is used if omitted
+        
         Returns:
             List of loaded documents
         """
@@ -29,20 +56,173 @@ class DocumentLoader:
         
         print(f"Loading documents from: {folder_path}")
         
-        for root, _, files in os.walk(folder_path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                file_extension = os.path.splitext(file)[1].lower()
-                
-                try:
-                    loaded_docs = DocumentLoader._load_single_file(file_path, file_extension)
-                    documents.extend(loaded_docs)
-                except Exception as e:
-                    print(f"Error loading document {file_path}: {str(e)}")
+        file_paths = DocumentLoader.list_files([folder_path])
+        for _, loaded_docs in DocumentLoader.iter_files(file_paths, max_workers, executor):
+            documents.extend(loaded_docs)
         
         print(f"Loaded {len(documents)} documents from {folder_path}")
         return documents
     
+    @staticmethod
+    def list_files(folder_paths: List[str]) -> List[str]:
+        """
+        List the supported document files in the given folders
+        
+        Args:
+            folder_paths: List of folder paths
+        
+        Returns:
+            Sorted list of file paths
+        """
+        file_paths = []
+        
+        for folder_path in folder_paths:
+            if not os.path.exists(folder_path):
+                continue
+            
+            for root, _, files in os.walk(folder_path):
+                for file in files:
+                    if os.path.splitext(file)[1].lower() in DocumentLoader.SUPPORTED_EXTENSIONS:
+                        file_paths.append(os.path.join(root, file))
+        
+        return sorted(file_paths)
+    
+    @staticmethod
+    def resolve_workers(max_workers: Optional[int] = None) -> int:
+        """
+        Resolve the number of loader processes to use
+        
+        Args:
+            max_workers: Requested number of processes; 0 means one per CPU
+        
+        Returns:
+            Number of loader processes
+        """
+        if max_workers is None:
+            max_workers = settings.DOCUMENT_LOADER_WORKERS
+        if max_workers <= 0:
+            max_workers = os.cpu_count() or 1
+        return max_workers
+    
+    @staticmethod
+    def create_pool(max_workers: Optional[int] = None) -> Optional[ProcessPoolExecutor]:
+        """
+        Create a loader process pool meant to be reused for the life of the application
+        
+        Workers are started through a fork server (spawn where unavailable) rather than
+        forked from the application, so they do not inherit its threads, locks and loaded
+        model. The fork server imports this module once, so new workers start without
+        re-importing the document loaders. Processes are only started when the first file
+        is submitted.
+        
+        Args:
+            max_workers: Number of loader processes; defaults to settings.DOCUMENT_LOADER_WORKERS
+        
+        Returns:
+            The process pool, or None when a single worker is configured; shut it down on exit
+        """
+        workers = DocumentLoader.resolve_workers(max_workers)
+        if workers <= 1:
+            return None
+        
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+            # Workers fork from a server that has already imported the loaders
+            context.set_forkserver_preload([__name__])
+        else:
+            context = multiprocessing.get_context("spawn")
+        return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    
+    @staticmethod
+    def iter_files(file_paths: List[str],
+                   max_workers: Optional[int] = None,
+                   executor: Optional[Executor] = None,
+                   on_error: Optional[Callable[[str, str], None]] = None) -> Iterator[Tuple[str, List[Document]]]:
+        """
+        Load files, parsing them in parallel worker processes when more than one worker is configured
+        
+        Results are yielded in the order of file_paths, and at most two files per
+        worker are parsed ahead of the consumer. Files that fail to load are
+        reported and skipped.
+        
+        Args:
+            file_paths: Paths of the files to load
+            max_workers: Number of loader processes; defaults to settings.DOCUMENT_LOADER_WORKERS
+            executor: Long-lived loader pool from create_pool; a temporary pool is used if omitted
+            on_error: Called with (file_path, error) for every file that fails to load
+        
+        Yields:
+            Tuples of file path and the documents loaded from it
+        """
+        workers = min(DocumentLoader.resolve_workers(max_workers), len(file_paths))
+        
+        if workers <= 1:
+            for file_path in file_paths:
+                documents, error = _load_file_task(file_path)
+                if error is None:
+                    yield file_path, documents
+                else:
+                    DocumentLoader._report_error(file_path, error, on_error)
+            return
+        
+        if executor is None:
+            with DocumentLoader.create_pool(workers) as pool:
+                yield from DocumentLoader._iter_pool(pool, file_paths, workers, on_error)
+        else:
+            yield from DocumentLoader._iter_pool(executor, file_paths, workers, on_error)
+    
+    @staticmethod
+    def _report_error(file_path: str, error: str, on_error: Optional[Callable[[str, str], None]]) -> None:
+        """Print a load error and pass it to the caller's error callback"""
+        print(f"Error loading document {file_path}: {error}")
+        if on_error is not None:
+            on_error(file_path, error)
+    
+    @staticmethod
+    def _iter_pool(executor: Executor, 
+                   file_paths: List[str], 
+                   workers: int,
+                   on_error: Optional[Callable[[str, str], None]] = None) -> Iterator[Tuple[str, List[Document]]]:
+        """Load files in a process pool, keeping at most two files per worker in flight"""
+        pending = deque()
+        remaining = iter(file_paths)
+        
+        try:
+            for file_path in remaining:
+                pending.append((file_path, executor.submit(_load_file_task, file_path)))
+                if len(pending) >= workers * 2:
+                    break
+            
+            while pending:
+                file_path, future = pending.popleft()
+                next_path = next(remaining, None)
+                if next_path is not None:
+                    pending.append((next_path, executor.submit(_load_file_task, next_path)))
+                
+                documents, error = future.result()
+                if error is None:
+                    yield file_path, documents
+                else:
+                    DocumentLoader._report_error(file_path, error, on_error)
+        finally:
+            # A consumer that stops early must not leave its files queued in a shared pool
+            for _, future in pending:
+                future.cancel()
+    
+    @staticmethod
+    def load_file(file_path: str) -> List[Document]:
+        """
+        Load a single file
+        
+        Args:
+            file_path: Path to the file
+        
+        Returns:
+            List of loaded documents
+        """
+        file_extension = os.path.splitext(file_path)[1].lower()
+        return DocumentLoader._load_single_file(file_path, file_extension)
+    
     @staticmethod
     def _load_single_file(file_path: str, file_extension: str) -> List[Document]:
         """
@@ -51,7 +231,7 @@ class DocumentLoader:
         Args:
             file_path: Path to the file
             file_extension: File extension
-            
+        
         Returns:
             List of loaded documents
         """
@@ -70,21 +250,32 @@ class DocumentLoader:
             return []
     
     @staticmethod
-    def load_multiple_folders(folder_paths: List[str]) -> List[Document]:
+    def load_multiple_folders(folder_paths: List[str],
+                              max_workers: Optional[int] = None,
+                              executor: Optional[Executor] = None) -> List[Document]:
         """
-        Load documents from multiple folders
+        Load documents from multiple folders, parsing files of every folder in one worker pool
         
         Args:
             folder_paths: List of folder paths
-            
+            max_workers: Number of loader processes; defaults to settings.DOCUMENT_LOADER_WORKERS
+            executor: Long-lived loader pool from create_pool; a temporary pool is used if omitted
+        
         Returns:
             List of all loaded documents
         """
         all_documents = []
         
         for folder_path in folder_paths:
-            documents = DocumentLoader.load_from_folder(folder_path)
+            if not os.path.exists(folder_path):
+                os.makedirs(folder_path)
+                print(f"Created folder: {folder_path}")
+            else:
+                print(f"Loading documents from: {folder_path}")
+        
+        file_paths = DocumentLoader.list_files(folder_paths)
+        for _, documents in DocumentLoader.iter_files(file_paths, max_workers, executor):
             all_documents.extend(documents)
         
         print(f"Loaded {len(all_documents)} documents in total from {len(folder_paths)} folders")
-        return all_documents
\ No newline at end of file
+        return all_documents
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Iterable, Iterator
 from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from src.utils.chunks_sanitizer import chunks_sanitizer
@@ -38,4 +38,17 @@ class DocumentProcessor:
         
         chunks = self.text_splitter.split_documents(documents)
         print(f"Split documents into {len(chunks)} chunks")
-        return chunks_sanitizer(chunks)
\ No newline at end of file
+        return chunks_sanitizer(chunks)
+    
+    def iter_chunks(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """
+        Lazily split and sanitize documents one at a time
+        
+        Args:
+            documents: Iterable of documents (e.g. pages) to process
+            
+        Yields:
+            Sanitized document chunks
+        """
+        for document in documents:
+            yield from chunks_sanitizer(self.text_splitter.split_documents([document]))
\ No newline at end of file
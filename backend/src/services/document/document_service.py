@@ -1,12 +1,18 @@
 import os
+import asyncio
+import threading
 from typing import List, Dict, Any, Optional
 from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
 
 from src.config.settings import settings
 from .document_loader import DocumentLoader
 from .document_processor import DocumentProcessor
 from .vector_store_manager import VectorStoreManager
-from .upload_handler import UploadHandler
+from .upload_handler import UploadHandler, UploadTooLargeError
+from .index_manifest import IndexManifest
+from .ingestion_pipeline import IngestionPipeline
+from .upload_registry import UploadRegistry
 
 
 class DocumentService:
@@ -14,8 +20,13 @@ class DocumentService:
     Main interface for document operations - coordinates all document-related services
     """
     
-    def __init__(self):
-        """Initialize the document service with all required components"""
+    def __init__(self, embeddings: Optional[Embeddings] = None):
+        """
+        Initialize the document service with all required components
+        
+        Args:
+            embeddings: Shared embeddings instance; the model is loaded here if omitted
+        """
         backend_dir = os.path.abspath(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
         
         self.documents_folder = os.path.join(backend_dir, settings.RAG_DOCUMENTS_FOLDER)
@@ -29,7 +40,22 @@ class DocumentService:
         
         self.vector_store_manager = VectorStoreManager(
             vector_store_path=self.vector_store_path,
-            embedding_model_name=settings.EMBEDDING_MODEL
+            embedding_model_name=settings.EMBEDDING_MODEL,
+            embeddings=embeddings
+        )
+        
+        self.manifest = IndexManifest(
+            os.path.join(self.vector_store_path, "index_manifest.json")
+        )
+        
+        self._index_lock = threading.RLock()
+        
+        self.loader_pool = DocumentLoader.create_pool()
+        
+        self.pipeline = IngestionPipeline(
+            processor=self.processor,
+            vector_store_manager=self.vector_store_manager,
+            executor=self.loader_pool
         )
         
         self.upload_handler = UploadHandler(
@@ -39,6 +65,10 @@ class DocumentService:
         
         os.makedirs(self.documents_folder, exist_ok=True)
         os.makedirs(self.uploads_folder, exist_ok=True)
+        
+        self.upload_registry = UploadRegistry(
+            os.path.join(self.uploads_folder, ".upload_registry.json")
+        )
     
     def load_all_documents(self) -> List[Document]:
         """
@@ -48,7 +78,7 @@ class DocumentService:
             List of loaded documents
         """
         folder_paths = [self.documents_folder, self.uploads_folder]
-        return DocumentLoader.load_multiple_folders(folder_paths)
+        return DocumentLoader.load_multiple_folders(folder_paths, executor=self.loader_pool)
     
     def process_documents(self, documents: List[Document]) -> List[Document]:
         """
@@ -83,56 +113,190 @@ class DocumentService:
         """
         return self.vector_store_manager.load_vector_store()
     
-    def query_vector_store(self, query: str, k: int = 5) -> List[Document]:
+    def query_vector_store(self, 
+                           query: str, 
+                           k: Optional[int] = None, 
+                           mode: Optional[str] = None) -> List[Document]:
         """
         Query the vector store for relevant documents
         
         Args:
             query: The query string
-            k: Number of documents to retrieve
+            k: Maximum number of documents to retrieve; defaults to settings.RETRIEVAL_MAX_K
+            mode: "dense", "lexical" or "hybrid" retrieval; defaults to settings.RETRIEVAL_MODE
+            
+        Returns:
+            List of relevant document chunks, most relevant first
+        """
+        return self.vector_store_manager.query_vector_store(query, k, mode=mode)
+    
+    async def aquery_vector_store(self, 
+                                  query: str, 
+                                  k: Optional[int] = None, 
+                                  embedding: Optional[List[float]] = None,
+                                  mode: Optional[str] = None) -> List[Document]:
+        """
+        Query the vector store without blocking the event loop
+        
+        Args:
+            query: The query string
+            k: Maximum number of documents to retrieve; defaults to settings.RETRIEVAL_MAX_K
+            embedding: Precomputed embedding of the query; the query is embedded if omitted
+            mode: "dense", "lexical" or "hybrid" retrieval; defaults to settings.RETRIEVAL_MODE
+            
+        Returns:
+            List of relevant document chunks, most relevant first
+        """
+        return await self.vector_store_manager.aquery_vector_store(query, k, embedding, mode=mode)
+    
+    async def aembed_query(self, query: str) -> List[float]:
+        """
+        Embed a query with the vector store's embedding model without blocking the event loop
+        
+        Args:
+            query: The query string
             
         Returns:
-            List of relevant document chunks
+            Embedding vector of the query
+        """
+        return await self.vector_store_manager.aembed_query(query)
+    
+    async def aembed_queries(self, queries: List[str]) -> List[List[float]]:
         """
-        return self.vector_store_manager.query_vector_store(query, k)
+        Embed many queries in one batched model call without blocking the event loop
+        
+        Args:
+            queries: The query strings
+            
+        Returns:
+            Embedding vectors in the same order as the queries
+        """
+        return await self.vector_store_manager.aembed_queries(queries)
+    
+    @property
+    def index_version(self) -> int:
+        """Counter that changes whenever the indexed content changes"""
+        return self.vector_store_manager.index_version
+    
+    def close(self) -> None:
+        """Release the resources held by the vector store manager and stop the loader processes"""
+        self.vector_store_manager.close()
+        if self.loader_pool is not None:
+            self.loader_pool.shutdown(cancel_futures=True)
     
     def setup_rag_system(self) -> Dict[str, Any]:
         """
         Set up the RAG system by coordinating all components
         
+        Only files that were added or changed since the last run are chunked and
+        embedded; chunks of changed and removed files are deleted from the store.
+        Files that could not be ingested are recorded and skipped until they change.
+        
         Returns:
-            Status dictionary
+            Status dictionary; files that are not indexed because they failed are listed
+            with their error under "failed_files" and make the status "warning"
         """
+        with self._index_lock:
+            return self._sync_vector_store()
+    
+    def _sync_vector_store(self) -> Dict[str, Any]:
+        """Bring the vector store in line with the source folders; caller holds the index lock"""
         try:
             folder_paths = [self.documents_folder, self.uploads_folder]
             
-            existing_vector_store = self.vector_store_manager.load_vector_store()
-            if existing_vector_store and not self.vector_store_manager.is_vector_store_outdated(folder_paths):
-                return {
+            if self.vector_store_manager.vector_store_exists() and not self.manifest.exists():
+                print("Vector store has no index manifest, rebuilding...")
+                self.vector_store_manager.reset_vector_store()
+                self.manifest.clear()
+            elif not self.vector_store_manager.vector_store_exists():
+                self.manifest.clear()
+            elif not self.vector_store_manager.lexical_index.exists():
+                print("Vector store has no lexical index, building it...")
+                self.vector_store_manager.rebuild_lexical_index()
+            
+            file_paths = DocumentLoader.list_files(folder_paths)
+            diff = self.manifest.diff(file_paths)
+            
+            if not diff.has_changes and self.manifest.exists():
+                self.manifest.save()
+                return self._with_failures({
                     "status": "success", 
                     "message": "Vector store is up-to-date, skipping document processing"
-                }
+                })
             
-            print("Building/rebuilding vector store...")
-            documents = self.load_all_documents()
-            
-            if not documents:
+            if not file_paths and not diff.removed:
                 return {"status": "warning", "message": "No documents found to process"}
             
-            processed_docs = self.process_documents(documents)
-            vector_store = self.create_vector_store(processed_docs)
+            print(f"Updating vector store: {len(diff.added)} added, "
+                  f"{len(diff.changed)} changed, {len(diff.removed)} removed files")
             
-            if vector_store is None:
-                return {"status": "error", "message": "Failed to create vector store"}
+            for file_path in diff.removed:
+                if self.vector_store_manager.delete_documents(self.manifest.chunk_ids(file_path)):
+                    self.manifest.remove(file_path)
+            self.vector_store_manager.lexical_index.save()
             
-            return {
+            stats = self._index_files(diff.added + diff.changed) if diff.added or diff.changed else {"chunks": 0}
+            
+            return self._with_failures({
                 "status": "success", 
-                "message": f"Successfully processed {len(documents)} documents into {len(processed_docs)} chunks"
-            }
+                "message": f"Successfully processed {len(diff.added) + len(diff.changed)} documents "
+                           f"into {stats['chunks']} chunks ({len(diff.removed)} removed)"
+            })
             
         except Exception as e:
             return {"status": "error", "message": f"Error setting up RAG system: {str(e)}"}
     
+    def index_files(self, file_paths: List[str], batch_size: Optional[int] = None) -> int:
+        """
+        Stream the given files into the vector store, replacing chunks from earlier versions
+        
+        Args:
+            file_paths: Paths of the files to index
+            batch_size: Chunks embedded and added per batch; defaults to settings.INGESTION_BATCH_SIZE
+            
+        Returns:
+            Number of chunks added to the vector store
+        """
+        if not file_paths:
+            return 0
+        
+        with self._index_lock:
+            return self._index_files(file_paths, batch_size)["chunks"]
+    
+    def _with_failures(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the files recorded as failed to a sync result"""
+        failures = self.manifest.failures()
+        if not failures:
+            return result
+        
+        return {
+            **result,
+            "status": "warning",
+            "message": f"{result['message']}; {len(failures)} documents could not be processed and are skipped until they change",
+            "failed_files": failures
+        }
+    
+    def _index_files(self, file_paths: List[str], batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """Index files, recording the ones that fail in the manifest; caller holds the index lock"""
+        try:
+            for file_path in file_paths:
+                if not self.vector_store_manager.delete_documents(self.manifest.chunk_ids(file_path)):
+                    raise RuntimeError(f"Could not delete previous chunks of {file_path}")
+                self.manifest.remove(file_path)
+            
+            self.vector_store_manager.load_vector_store(create_if_missing=True)
+            stats = self.pipeline.run(
+                file_paths, 
+                on_file_indexed=self.manifest.record, 
+                batch_size=batch_size,
+                on_file_failed=self.manifest.record_failure
+            )
+        finally:
+            self.manifest.save()
+            self.vector_store_manager.lexical_index.save()
+        
+        return stats
+    
     def save_uploaded_document(self, file_content: bytes, filename: str) -> Dict[str, Any]:
         """
         Handle document upload with intelligent vector store updating
@@ -144,45 +308,270 @@ class DocumentService:
         Returns:
             Status dictionary with document information
         """
+        save_result = self.store_uploaded_document(file_content, filename)
+        
+        if save_result["status"] == "error" or save_result.get("duplicate"):
+            return save_result
+        
+        return self.index_uploaded_document(
+            save_result["file_path"], 
+            save_result["document_id"], 
+            filename,
+            save_result["content_hash"]
+        )
+    
+    def store_uploaded_document(self, file_content: bytes, filename: str) -> Dict[str, Any]:
+        """
+        Save an uploaded document to the uploads folder without indexing it
+        
+        Args:
+            file_content: The binary content of the uploaded file
+            filename: The name of the uploaded file
+            
+        Returns:
+            Status dictionary with the document id and file path
+        """
         try:
-            save_result = self.upload_handler.save_uploaded_file(file_content, filename)
+            return self._deduplicate(self.upload_handler.save_uploaded_file(file_content, filename))
+        except Exception as e:
+            return {"status": "error", "message": f"Error processing upload: {str(e)}"}
+    
+    async def store_upload_stream(self, upload_file, filename: str) -> Dict[str, Any]:
+        """
+        Stream an uploaded document to the uploads folder without indexing it
+        
+        Args:
+            upload_file: Object exposing an async read(size) method, e.g. FastAPI's UploadFile
+            filename: The name of the uploaded file
+            
+        Returns:
+            Status dictionary with the document id, file path and content hash
+            
+        Raises:
+            UploadTooLargeError: If the upload exceeds settings.MAX_UPLOAD_SIZE
+        """
+        save_result = await self.upload_handler.save_upload_stream(
+            upload_file, 
+            filename, 
+            max_size=settings.MAX_UPLOAD_SIZE
+        )
+        return self._deduplicate(save_result)
+    
+    def _deduplicate(self, save_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Drop a freshly saved upload whose content is already stored
+        
+        Args:
+            save_result: Status dictionary returned by the upload handler
+            
+        Returns:
+            The save result, or a success dictionary pointing at the existing document
+            with "duplicate" set when the content was uploaded before
+        """
+        if save_result["status"] == "error":
+            return save_result
+        
+        existing = self.upload_registry.register_if_absent(
+            save_result["content_hash"],
+            save_result["document_id"],
+            save_result["document_name"],
+            save_result["file_path"]
+        )
+        
+        if existing is None:
+            return {**save_result, "duplicate": False}
+        
+        os.remove(save_result["file_path"])
+        print(f"Duplicate upload of {existing['file_path']}, skipping processing")
+        
+        return {
+            "status": "success",
+            "message": "Document already uploaded, skipping processing",
+            "document_id": existing["document_id"],
+            "document_name": save_result["document_name"],
+            "file_path": existing["file_path"],
+            "content_hash": save_result["content_hash"],
+            "duplicate": True
+        }
+    
+    async def store_bulk_uploads(self, upload_files: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Stream several uploads and zip archives to the uploads folder without indexing them
+        
+        Every file is validated, size-checked and deduplicated on its own, so one
+        bad file does not reject the whole request.
+        
+        Args:
+            upload_files: FastAPI UploadFile objects; .zip files are extracted
+        
+        Returns:
+            One status dictionary per stored document, in upload order
+        """
+        results = []
+        
+        for upload_file in upload_files:
+            filename = upload_file.filename or "upload"
+            
+            if len(results) >= settings.BULK_UPLOAD_MAX_FILES:
+                results.append({
+                    "status": "error",
+                    "document_name": filename,
+                    "message": f"Skipped: more than {settings.BULK_UPLOAD_MAX_FILES} documents in one request"
+                })
+                continue
             
-            if save_result["status"] == "error":
-                return save_result
+            if filename.lower().endswith(".zip"):
+                extracted = await asyncio.to_thread(
+                    self.upload_handler.save_archive,
+                    upload_file.file,
+                    filename,
+                    settings.MAX_UPLOAD_SIZE,
+                    settings.BULK_UPLOAD_MAX_FILES - len(results)
+                )
+                results.extend(self._deduplicate(result) for result in extracted)
+                continue
             
-            file_path = save_result["file_path"]
-            doc_id = save_result["document_id"]
+            try:
+                save_result = await self.store_upload_stream(upload_file, filename)
+            except UploadTooLargeError as e:
+                save_result = {"status": "error", "message": str(e)}
             
+            results.append({"document_name": filename, **save_result})
+        
+        return results
+    
+    def index_uploaded_documents(self, uploads: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Add several saved uploads to the vector store in one ingestion run
+        
+        The files are parsed in parallel and their combined chunks are embedded and
+        committed in batches of settings.BULK_INGESTION_BATCH_SIZE.
+        
+        Args:
+            uploads: Save results of store_bulk_uploads for the new (non-duplicate) documents
+        
+        Returns:
+            Status dictionary with the total number of chunks and a result per file
+        """
+        file_paths = [upload["file_path"] for upload in uploads]
+        
+        try:
+            num_chunks = self.index_files(file_paths, batch_size=settings.BULK_INGESTION_BATCH_SIZE)
+            error = None
+        except Exception as e:
+            print(f"Error indexing bulk upload: {e}")
+            num_chunks, error = 0, str(e)
+        
+        files = []
+        for upload in uploads:
+            indexed = self.manifest.is_indexed(upload["file_path"])
+            if not indexed:
+                self._discard_upload(upload["file_path"], upload["content_hash"])
+            
+            files.append({
+                "document_id": upload["document_id"],
+                "document_name": upload["document_name"],
+                "status": "success" if indexed else "error",
+                "chunks": len(self.manifest.chunk_ids(upload["file_path"])) if indexed else 0
+            })
+        
+        num_indexed = sum(1 for file in files if file["status"] == "success")
+        if error is not None and num_indexed == 0:
+            return {"status": "error", "message": f"Error processing bulk upload: {error}", "files": files}
+        
+        return {
+            "status": "success" if num_indexed == len(files) else "warning",
+            "message": f"Indexed {num_indexed} of {len(files)} documents into {num_chunks} chunks",
+            "chunks": num_chunks,
+            "files": files
+        }
+    
+    def index_uploaded_document(self, 
+                                file_path: str, 
+                                doc_id: str, 
+                                filename: str,
+                                content_hash: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Add a saved upload to the vector store
+        
+        Args:
+            file_path: Path of the saved upload
+            doc_id: Id assigned to the document
+            filename: The original name of the uploaded file
+            content_hash: Content hash the upload was registered under
+            
+        Returns:
+            Status dictionary with document information and the number of chunks added;
+            if indexing failed, the saved file and its registry entry are removed so that
+            a re-upload is processed again
+        """
+        result = self._index_uploaded_document(file_path, doc_id, filename)
+        
+        if result["status"] == "error":
+            self._discard_upload(file_path, content_hash)
+        
+        return result
+    
+    def _discard_upload(self, file_path: str, content_hash: Optional[str]) -> None:
+        """
+        Forget an upload whose indexing failed
+        
+        Removes its registry entry, any chunks indexed from it and the saved file, so the
+        next sync does not pick the file up and a re-upload of the content is indexed again.
+        
+        Args:
+            file_path: Path of the saved upload
+            content_hash: Content hash the upload was registered under, if any
+        """
+        if content_hash:
+            self.upload_registry.remove(content_hash)
+        
+        with self._index_lock:
+            if file_path in self.manifest.entries:
+                if self.vector_store_manager.delete_documents(self.manifest.chunk_ids(file_path)):
+                    self.manifest.remove(file_path)
+                    self.manifest.save()
+                    self.vector_store_manager.lexical_index.save()
+            
+            if os.path.exists(file_path):
+                os.remove(file_path)
+    
+    def _index_uploaded_document(self, file_path: str, doc_id: str, filename: str) -> Dict[str, Any]:
+        """Add a saved upload to the vector store"""
+        try:
             try:
-                processed_new_docs = self.upload_handler.load_and_process_uploaded_file(file_path)
+                num_chunks = self.index_files([file_path])
                 
-                if self.vector_store_manager.add_documents_to_existing_store(processed_new_docs):
+                if self.manifest.is_indexed(file_path):
                     return {
                         "status": "success",
                         "message": "Document uploaded and added to existing vector store successfully",
                         "document_id": doc_id,
-                        "document_name": filename
+                        "document_name": filename,
+                        "chunks": num_chunks
                     }
                 else:
-                    print("Could not add to existing store, rebuilding...")
+                    print("Could not index uploaded document, synchronizing vector store...")
                     
             except Exception as e:
-                print(f"Error adding to existing store: {e}, rebuilding...")
+                print(f"Error adding to existing store: {e}, synchronizing vector store...")
             
-            rebuild_status = self.setup_rag_system()
+            sync_status = self.setup_rag_system()
             
-            if rebuild_status["status"] == "error":
+            if sync_status["status"] == "error" or not self.manifest.is_indexed(file_path):
+                error = self.manifest.failures().get(file_path, sync_status["message"])
                 return {
                     "status": "error",
-                    "message": f"Document saved but error rebuilding vector store: {rebuild_status['message']}"
+                    "message": f"Document saved but error updating vector store: {error}"
                 }
             
             return {
                 "status": "success",
-                "message": "Document uploaded and processed successfully (vector store rebuilt)",
+                "message": "Document uploaded and processed successfully (vector store synchronized)",
                 "document_id": doc_id,
-                "document_name": filename
+                "document_name": filename,
+                "chunks": len(self.manifest.chunk_ids(file_path))
             }
             
         except Exception as e:
-            return {"status": "error", "message": f"Error processing upload: {str(e)}"}
\ No newline at end of file
+            return {"status": "error", "message": f"Error processing upload: {str(e)}"}
@@ -0,0 +1,111 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import Callable, Dict, List, Optional, Set, Tuple, Any
+
+from src.config.settings import settings
+
+
+class EmbeddingBatcher:
+    """
+    Collects concurrent query-embedding requests into batches embedded in one model call
+    
+    A batch is sent when it reaches max_batch_size or max_wait_ms after its first
+    request arrived, whichever comes first. Identical texts within a batch are
+    embedded once.
+    """
+    
+    def __init__(self,
+                 embed_batch: Callable[[List[str]], List[List[float]]],
+                 executor: Optional[Executor] = None,
+                 max_batch_size: Optional[int] = None,
+                 max_wait_ms: Optional[float] = None):
+        """
+        Initialize the embedding batcher
+        
+        Args:
+            embed_batch: Blocking function embedding a list of texts
+            executor: Executor running embed_batch; the event loop's default executor if omitted
+            max_batch_size: Maximum texts per model call; defaults to settings.QUERY_EMBEDDING_BATCH_SIZE
+            max_wait_ms: Longest time a request waits for others to join its batch;
+                defaults to settings.QUERY_EMBEDDING_MAX_WAIT_MS
+        """
+        self.embed_batch = embed_batch
+        self.executor = executor
+        self.max_batch_size = max_batch_size or settings.QUERY_EMBEDDING_BATCH_SIZE
+        self.max_wait_ms = settings.QUERY_EMBEDDING_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms
+        
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        
+        self.requests = 0
+        self.batches = 0
+    
+    async def embed(self, text: str) -> List[float]:
+        """
+        Embed a text as part of the next batch
+        
+        Args:
+            text: Text to embed
+        
+        Returns:
+            Embedding vector of the text
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        self.requests += 1
+        
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait_ms / 1000, self._flush)
+        
+        return await future
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get batching counters
+        
+        Returns:
+            Dictionary with the number of requests, model calls and the average batch size
+        """
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_size": self.requests / self.batches if self.batches else 0.0,
+        }
+    
+    def _flush(self) -> None:
+        """Send the pending requests as one batch"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        batch, self._pending = self._pending, []
+        if batch:
+            self.batches += 1
+            # The event loop only keeps weak references to tasks; hold on until the batch is done
+            task = asyncio.ensure_future(self._embed_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _embed_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """Embed a batch off the event loop and resolve the waiting requests"""
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        
+        try:
+            loop = asyncio.get_running_loop()
+            vectors = await loop.run_in_executor(self.executor, self.embed_batch, texts)
+            if len(vectors) != len(texts):
+                raise ValueError(f"Expected {len(texts)} embeddings, got {len(vectors)}")
+            by_text = dict(zip(texts, vectors))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text[text])
@@ -0,0 +1,208 @@
+import os
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Any
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class EmbeddingCache:
+    """
+    Persistent content-addressed store of embedding vectors backed by SQLite
+    """
+    
+    _MAX_QUERY_PARAMS = 500
+    
+    def __init__(self, cache_path: str):
+        """
+        Initialize the embedding cache
+        
+        Args:
+            cache_path: Path of the SQLite file holding the cached vectors
+        """
+        self.cache_path = cache_path
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(cache_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._connection.commit()
+    
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        """
+        Build the cache key for a text embedded with a given model
+        
+        Args:
+            model_name: Name of the embedding model
+            text: Text that was embedded
+        
+        Returns:
+            Hex digest identifying the (model, text) pair
+        """
+        digest = hashlib.sha256()
+        digest.update(model_name.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+    
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """
+        Look up several keys at once
+        
+        Args:
+            keys: Cache keys to look up
+        
+        Returns:
+            Dictionary with the vectors of the keys that were found
+        """
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        
+        with self._lock:
+            for start in range(0, len(unique_keys), self._MAX_QUERY_PARAMS):
+                batch = unique_keys[start:start + self._MAX_QUERY_PARAMS]
+                placeholders = ",".join("?" for _ in batch)
+                rows = self._connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        
+        return found
+    
+    def set_many(self, items: Dict[str, List[float]]) -> None:
+        """
+        Store several vectors at once
+        
+        Args:
+            items: Dictionary mapping cache keys to vectors
+        """
+        if not items:
+            return
+        
+        rows = [
+            (key, np.asarray(vector, dtype=np.float32).tobytes())
+            for key, vector in items.items()
+        ]
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                rows
+            )
+            self._connection.commit()
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+    
+    def close(self) -> None:
+        """Close the underlying database connection"""
+        with self._lock:
+            self._connection.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only sends cache misses to the underlying model
+    """
+    
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, model_name: str):
+        """
+        Initialize the cached embeddings
+        
+        Args:
+            embeddings: Embeddings used to compute vectors missing from the cache
+            cache: Persistent embedding cache
+            model_name: Name of the embedding model, part of every cache key
+        """
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_name = model_name
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed documents, reusing cached vectors for texts seen before
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            List of embedding vectors in the same order as the texts
+        """
+        if not texts:
+            return []
+        
+        keys = [EmbeddingCache.make_key(self.model_name, text) for text in texts]
+        vectors = self.cache.get_many(keys)
+        
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        
+        if missing:
+            new_vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), new_vectors))
+            self.cache.set_many(computed)
+            vectors.update(computed)
+        
+        with self._counter_lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+        
+        return [vectors[key] for key in keys]
+    
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a query; queries are not persisted in the cache
+        
+        Args:
+            text: Query text
+        
+        Returns:
+            Embedding vector
+        """
+        return self.embeddings.embed_query(text)
+    
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed several queries in one model call; queries are not persisted in the cache
+        
+        Models that encode queries differently from documents are called once per query.
+        
+        Args:
+            texts: Query texts
+        
+        Returns:
+            List of embedding vectors in the same order as the texts
+        """
+        if getattr(self.embeddings, "query_encode_kwargs", None):
+            return [self.embeddings.embed_query(text) for text in texts]
+        return self.embeddings.embed_documents(texts)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache hit and miss counters
+        
+        Returns:
+            Dictionary with hits, misses, hit rate and number of cached vectors
+        """
+        with self._counter_lock:
+            hits, misses = self.hits, self.misses
+        
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "entries": len(self.cache),
+        }
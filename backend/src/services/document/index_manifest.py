@@ -0,0 +1,217 @@
+import os
+import json
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, Any, List
+
+
+@dataclass
+class ManifestDiff:
+    """
+    Difference between the indexed files and the files currently on disk
+    """
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+class IndexManifest:
+    """
+    Persisted record of which source files are indexed and which chunk ids they produced
+    
+    Files that could not be ingested are recorded with their size, mtime and the error,
+    so they are skipped until they change instead of failing on every sync.
+    """
+    
+    def __init__(self, manifest_path: str):
+        """
+        Initialize the manifest
+        
+        Args:
+            manifest_path: Path of the JSON file holding the manifest
+        """
+        self.manifest_path = manifest_path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.load()
+    
+    def exists(self) -> bool:
+        """Check if the manifest has been persisted"""
+        return os.path.exists(self.manifest_path)
+    
+    def load(self) -> None:
+        """Load the manifest from disk, starting empty if it is missing or invalid"""
+        self.entries = {}
+        if not self.exists():
+            return
+        
+        try:
+            with open(self.manifest_path, 'r') as f:
+                self.entries = json.load(f).get("files", {})
+        except (json.JSONDecodeError, IOError, AttributeError):
+            print(f"Warning: Could not read index manifest at: {self.manifest_path}")
+    
+    def save(self) -> None:
+        """Atomically write the manifest to disk"""
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"files": self.entries}, f)
+        os.replace(tmp_path, self.manifest_path)
+    
+    def clear(self) -> None:
+        """Forget every indexed file"""
+        self.entries = {}
+    
+    @staticmethod
+    def file_hash(file_path: str) -> str:
+        """
+        Compute the content hash of a file
+        
+        Args:
+            file_path: Path to the file
+        
+        Returns:
+            SHA-256 hex digest of the file content
+        """
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def diff(self, file_paths: List[str]) -> ManifestDiff:
+        """
+        Compare the manifest with the files currently on disk
+        
+        Files whose size and mtime are unchanged are trusted without hashing;
+        files that were only touched keep their chunks and get their stats refreshed.
+        Files deleted after they were listed count as removed, or are skipped if they
+        were never indexed. Files that failed to ingest are reported as failed while
+        their size and mtime are unchanged, and as changed once they are modified.
+        
+        Args:
+            file_paths: Paths of the files that should be indexed
+        
+        Returns:
+            ManifestDiff describing added, changed, removed, unchanged and failed files
+        """
+        result = ManifestDiff()
+        current = set(file_paths)
+        
+        for file_path in file_paths:
+            entry = self.entries.get(file_path)
+            try:
+                if entry is None:
+                    if not os.path.exists(file_path):
+                        raise FileNotFoundError(file_path)
+                    result.added.append(file_path)
+                    continue
+                
+                stat = os.stat(file_path)
+                if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                    (result.failed if "error" in entry else result.unchanged).append(file_path)
+                    continue
+                
+                if "error" in entry:
+                    result.changed.append(file_path)
+                    continue
+                
+                if self.file_hash(file_path) == entry["sha256"]:
+                    entry["size"] = stat.st_size
+                    entry["mtime_ns"] = stat.st_mtime_ns
+                    result.unchanged.append(file_path)
+                else:
+                    result.changed.append(file_path)
+            except FileNotFoundError:
+                current.discard(file_path)
+        
+        result.removed = [path for path in self.entries if path not in current]
+        return result
+    
+    def chunk_ids(self, file_path: str) -> List[str]:
+        """
+        Get the chunk ids recorded for a file
+        
+        Args:
+            file_path: Path to the file
+        
+        Returns:
+            List of chunk ids, empty if the file is not indexed
+        """
+        entry = self.entries.get(file_path)
+        return list(entry["chunk_ids"]) if entry else []
+    
+    def record(self, file_path: str, file_hash: str, chunk_ids: List[str]) -> None:
+        """
+        Record a freshly indexed file
+        
+        Args:
+            file_path: Path to the file
+            file_hash: Content hash of the file when it was indexed
+            chunk_ids: Ids of the chunks added to the vector store
+        """
+        stat = os.stat(file_path)
+        self.entries[file_path] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_hash,
+            "chunk_ids": chunk_ids,
+        }
+    
+    def record_failure(self, file_path: str, error: str) -> None:
+        """
+        Record a file that could not be ingested, so it is skipped until it changes
+        
+        Args:
+            file_path: Path to the file
+            error: Why ingesting the file failed
+        """
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            self.entries.pop(file_path, None)
+            return
+        
+        self.entries[file_path] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "chunk_ids": [],
+            "error": error,
+        }
+    
+    def is_indexed(self, file_path: str) -> bool:
+        """
+        Check if a file has been ingested successfully
+        
+        Args:
+            file_path: Path to the file
+        
+        Returns:
+            True if the file is recorded without an error
+        """
+        entry = self.entries.get(file_path)
+        return entry is not None and "error" not in entry
+    
+    def failures(self) -> Dict[str, str]:
+        """
+        Get the files that could not be ingested
+        
+        Returns:
+            Dictionary of file path to the recorded error
+        """
+        return {path: entry["error"] for path, entry in self.entries.items() if "error" in entry}
+    
+    def remove(self, file_path: str) -> None:
+        """
+        Forget a file
+        
+        Args:
+            file_path: Path to the file
+        """
+        self.entries.pop(file_path, None)
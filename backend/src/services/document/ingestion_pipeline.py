@@ -0,0 +1,166 @@
+import time
+import hashlib
+from concurrent.futures import Executor
+from typing import List, Dict, Any, Callable, Optional
+from langchain.schema import Document
+
+from src.config.settings import settings
+from .document_loader import DocumentLoader
+from .document_processor import DocumentProcessor
+from .vector_store_manager import VectorStoreManager
+from .index_manifest import IndexManifest
+
+
+class IngestionPipeline:
+    """
+    Streams files into the vector store: load page -> split -> sanitize -> embed and add in fixed-size batches
+    
+    Only one batch of chunks (plus the pages of the files being parsed) is held
+    in memory at a time, regardless of the size of the corpus.
+    """
+    
+    def __init__(self,
+                 processor: DocumentProcessor,
+                 vector_store_manager: VectorStoreManager,
+                 batch_size: Optional[int] = None,
+                 max_workers: Optional[int] = None,
+                 executor: Optional[Executor] = None,
+                 progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Initialize the ingestion pipeline
+        
+        Args:
+            processor: Document processor used to split and sanitize pages
+            vector_store_manager: Vector store manager receiving the chunk batches
+            batch_size: Number of chunks embedded and added per batch; defaults to settings.INGESTION_BATCH_SIZE
+            max_workers: Number of loader processes; defaults to settings.DOCUMENT_LOADER_WORKERS
+            executor: Long-lived loader pool from DocumentLoader.create_pool; a temporary pool is used if omitted
+            progress_callback: Called with the running statistics after every batch
+        """
+        self.processor = processor
+        self.vector_store_manager = vector_store_manager
+        self.batch_size = batch_size or settings.INGESTION_BATCH_SIZE
+        self.max_workers = max_workers
+        self.executor = executor
+        self.progress_callback = progress_callback or self._print_progress
+    
+    @staticmethod
+    def chunk_id(file_path: str, file_hash: str, index: int) -> str:
+        """
+        Build the deterministic id of a chunk
+        
+        Args:
+            file_path: Path to the source file
+            file_hash: Content hash of the source file
+            index: Position of the chunk within the file
+        
+        Returns:
+            Chunk id
+        """
+        path_digest = hashlib.sha1(file_path.encode("utf-8")).hexdigest()[:16]
+        return f"{path_digest}-{file_hash[:16]}-{index}"
+    
+    def run(self,
+            file_paths: List[str],
+            on_file_indexed: Optional[Callable[[str, str, List[str]], None]] = None,
+            batch_size: Optional[int] = None,
+            on_file_failed: Optional[Callable[[str, str], None]] = None) -> Dict[str, Any]:
+        """
+        Ingest files into the vector store
+        
+        A file that cannot be loaded or chunked is skipped and its already committed chunks
+        are deleted again; a batch that cannot be added to the vector store aborts the run.
+        
+        Args:
+            file_paths: Paths of the files to ingest
+            on_file_indexed: Called with (file_path, file_hash, chunk_ids) once every
+                chunk of a file has been committed to the vector store
+            batch_size: Chunks per batch for this run; defaults to the pipeline's batch size
+            on_file_failed: Called with (file_path, error) for every skipped file
+        
+        Returns:
+            Statistics of the run
+        
+        Raises:
+            RuntimeError: If a batch could not be added to the vector store
+        """
+        stats = {
+            "files_total": len(file_paths),
+            "files_indexed": 0,
+            "files_failed": 0,
+            "chunks": 0,
+            "batches": 0,
+            "elapsed_seconds": 0.0,
+        }
+        start_time = time.perf_counter()
+        batch_size = batch_size or self.batch_size
+        
+        batch: List[Document] = []
+        batch_ids: List[str] = []
+        completed_files = []
+        
+        def flush():
+            if batch:
+                try:
+                    added = self.vector_store_manager.add_documents_to_existing_store(list(batch), ids=list(batch_ids))
+                except Exception as e:
+                    raise RuntimeError(f"Could not add a batch of {len(batch)} chunks to the vector store: {e}") from e
+                if not added:
+                    raise RuntimeError(f"Could not add a batch of {len(batch)} chunks to the vector store")
+                stats["chunks"] += len(batch)
+                stats["batches"] += 1
+                batch.clear()
+                batch_ids.clear()
+            
+            for file_path, file_hash, chunk_ids in completed_files:
+                if on_file_indexed:
+                    on_file_indexed(file_path, file_hash, chunk_ids)
+                stats["files_indexed"] += 1
+            completed_files.clear()
+            
+            stats["elapsed_seconds"] = time.perf_counter() - start_time
+            self.progress_callback(dict(stats))
+        
+        def fail(file_path: str, error: str) -> None:
+            stats["files_failed"] += 1
+            if on_file_failed:
+                on_file_failed(file_path, error)
+        
+        for file_path, documents in DocumentLoader.iter_files(file_paths, self.max_workers, self.executor, fail):
+            chunk_ids: List[str] = []
+            batch_start = len(batch)
+            
+            try:
+                file_hash = IndexManifest.file_hash(file_path)
+                for chunk in self.processor.iter_chunks(documents):
+                    chunk_id = self.chunk_id(file_path, file_hash, len(chunk_ids))
+                    chunk_ids.append(chunk_id)
+                    batch.append(chunk)
+                    batch_ids.append(chunk_id)
+                    
+                    if len(batch) >= batch_size:
+                        flush()
+                        batch_start = 0
+            except RuntimeError:
+                raise
+            except Exception as e:
+                print(f"Error processing document {file_path}: {str(e)}")
+                pending_ids = set(batch_ids[batch_start:])
+                flushed_ids = [cid for cid in chunk_ids if cid not in pending_ids]
+                del batch[batch_start:]
+                del batch_ids[batch_start:]
+                self.vector_store_manager.delete_documents(flushed_ids)
+                fail(file_path, str(e))
+                continue
+            
+            completed_files.append((file_path, file_hash, chunk_ids))
+        
+        flush()
+        return stats
+    
+    @staticmethod
+    def _print_progress(stats: Dict[str, Any]) -> None:
+        """Default progress reporter"""
+        print(f"Ingestion progress: {stats['files_indexed']}/{stats['files_total']} files, "
+              f"{stats['chunks']} chunks in {stats['batches']} batches "
+              f"({stats['elapsed_seconds']:.1f}s)")
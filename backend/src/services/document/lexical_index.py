@@ -0,0 +1,338 @@
+import os
+import re
+import json
+import math
+import heapq
+import threading
+from collections import Counter
+from typing import Dict, Any, List, Tuple
+from langchain.schema import Document
+
+
+class BM25Index:
+    """
+    Persisted BM25 inverted index over the chunks of the vector store, for exact-term lookups
+    
+    Identifiers such as "ERR-1042", "SKU_889" or "v2.1" are indexed as whole tokens as well as
+    by their parts, so they can be found even when dense retrieval misses them. Only the chunk
+    texts are persisted; the postings are rebuilt in memory when the index is loaded.
+    
+    Saves append the chunks added and deleted since the last save to a log next to the
+    snapshot file. The snapshot is rewritten, outside the index lock, once the log holds more
+    than COMPACT_RATIO records per indexed chunk. Both files carry a generation number so a log
+    left over from before an interrupted compaction is not replayed over the newer snapshot.
+    """
+    
+    K1 = 1.5
+    B = 0.75
+    COMMON_TERM_RATIO = 0.1
+    COMPACT_RATIO = 0.5
+    
+    _TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+    _PART_PATTERN = re.compile(r"[a-z0-9]+")
+    _STOPWORDS = frozenset(
+        "a an and are as at be by can do does for from has have how i in is it its me my of on or "
+        "our that the their there this to was what when where which who why will with you your".split()
+    )
+    
+    def __init__(self, index_path: str):
+        """
+        Initialize the lexical index
+        
+        Args:
+            index_path: Path of the JSON file holding the index
+        """
+        self.index_path = index_path
+        self.log_path = f"{index_path}.log"
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._pending: List[Dict[str, Any]] = []
+        self._rewrite = False
+        self._generation = 0
+        self._log_records = 0
+        self._documents: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self.load()
+    
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        """
+        Split a text into index terms
+        
+        Args:
+            text: Text to split
+        
+        Returns:
+            Lowercased terms without stopwords; compound identifiers are followed by their parts
+        """
+        terms = []
+        for token in cls._TOKEN_PATTERN.findall(text.lower()):
+            if token in cls._STOPWORDS:
+                continue
+            terms.append(token)
+            if not token.isalnum():
+                terms.extend(part for part in cls._PART_PATTERN.findall(token) if part not in cls._STOPWORDS)
+        return terms
+    
+    def exists(self) -> bool:
+        """Check if the index has been persisted"""
+        return os.path.exists(self.index_path) or os.path.exists(self.log_path)
+    
+    def load(self) -> None:
+        """Load the index from disk, starting empty if it is missing or invalid"""
+        with self._lock:
+            self._reset()
+            self._pending = []
+            self._rewrite = False
+            self._generation = 0
+            self._log_records = 0
+            if not self.exists():
+                return
+            
+            try:
+                if os.path.exists(self.index_path):
+                    with open(self.index_path, 'r') as f:
+                        data = json.load(f)
+                    self._generation = data.get("generation", 0)
+                    for chunk_id, (text, metadata) in data["documents"].items():
+                        self._index(chunk_id, text, metadata)
+                self._replay_log()
+            except (json.JSONDecodeError, IOError, KeyError, TypeError, ValueError):
+                print(f"Warning: Could not read lexical index at: {self.index_path}")
+                self._reset()
+    
+    def save(self) -> None:
+        """
+        Persist the changes made since the last save
+        
+        The changes are appended to the log, or the snapshot is rewritten when the log has
+        grown past COMPACT_RATIO of the index or the index was cleared. Searches and updates
+        only wait for the changes to be handed over, not for the file writes.
+        """
+        with self._save_lock:
+            with self._lock:
+                if not self._pending and not self._rewrite:
+                    return
+                
+                records, self._pending = self._pending, []
+                compact = self._rewrite or self._log_records + len(records) > self.COMPACT_RATIO * len(self._documents)
+                documents = dict(self._documents) if compact else None
+                self._rewrite = False
+            
+            os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+            if compact:
+                self._write_snapshot(documents)
+            else:
+                self._append_log(records)
+    
+    def clear(self) -> None:
+        """Forget every indexed chunk"""
+        with self._lock:
+            self._reset()
+            self._pending = []
+            self._rewrite = True
+    
+    def add(self, documents: List[Document], ids: List[str]) -> None:
+        """
+        Index chunks, replacing chunks already indexed under the same ids
+        
+        Args:
+            documents: Chunks to index
+            ids: Ids of the chunks, the same as in the vector store
+        """
+        with self._lock:
+            for chunk_id, doc in zip(ids, documents):
+                self._remove(chunk_id)
+                self._index(chunk_id, doc.page_content, dict(doc.metadata))
+                self._pending.append({"id": chunk_id, "text": doc.page_content, "metadata": dict(doc.metadata)})
+    
+    def delete(self, ids: List[str]) -> None:
+        """
+        Remove chunks from the index
+        
+        Args:
+            ids: Ids of the chunks to remove
+        """
+        with self._lock:
+            for chunk_id in ids:
+                self._remove(chunk_id)
+                self._pending.append({"delete": chunk_id})
+    
+    def search(self, query: str, k: int) -> List[Document]:
+        """
+        Find the chunks with the highest BM25 score for a query
+        
+        Query terms are scored from the rarest to the most frequent. Terms found in more
+        than COMMON_TERM_RATIO of the chunks only add to the score of chunks already matched
+        by a rarer term, so a lookup like "SKU-1042" does not walk the postings of "sku".
+        
+        Args:
+            query: The query string
+            k: Maximum number of chunks to return
+        
+        Returns:
+            Matching chunks, best first, with their score in the "bm25_score" metadata
+        """
+        terms = Counter(self.tokenize(query))
+        
+        with self._lock:
+            num_docs = len(self._documents)
+            if not terms or num_docs == 0:
+                return []
+            
+            avg_length = self._total_length / num_docs or 1.0
+            common_df = self.COMMON_TERM_RATIO * num_docs
+            scores: Dict[str, float] = {}
+            
+            matched = sorted(
+                ((term, query_count, self._postings[term]) for term, query_count in terms.items() if term in self._postings),
+                key=lambda item: len(item[2])
+            )
+            
+            for term, query_count, postings in matched:
+                idf = math.log(1 + (num_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                
+                if scores and len(postings) > common_df:
+                    chunk_counts = [(chunk_id, postings[chunk_id]) for chunk_id in scores if chunk_id in postings]
+                else:
+                    chunk_counts = postings.items()
+                
+                for chunk_id, count in chunk_counts:
+                    norm = self.K1 * (1 - self.B + self.B * self._lengths[chunk_id] / avg_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + query_count * idf * count * (self.K1 + 1) / (count + norm)
+            
+            best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            results = []
+            for chunk_id, score in best:
+                text, metadata = self._documents[chunk_id]
+                results.append(Document(
+                    page_content=text,
+                    metadata={**metadata, "bm25_score": round(score, 4)},
+                    id=chunk_id
+                ))
+            return results
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._documents)
+    
+    def _index(self, chunk_id: str, text: str, metadata: Dict[str, Any]) -> None:
+        """Add a chunk and its postings; caller holds the lock"""
+        counts = Counter(self.tokenize(text))
+        for term, count in counts.items():
+            self._postings.setdefault(term, {})[chunk_id] = count
+        
+        length = sum(counts.values())
+        self._documents[chunk_id] = (text, metadata)
+        self._lengths[chunk_id] = length
+        self._total_length += length
+    
+    def _remove(self, chunk_id: str) -> None:
+        """Drop a chunk and its postings; caller holds the lock"""
+        entry = self._documents.pop(chunk_id, None)
+        if entry is None:
+            return
+        
+        for term in set(self.tokenize(entry[0])):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(chunk_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(chunk_id, 0)
+    
+    def _replay_log(self) -> None:
+        """Apply the log records written since the snapshot; caller holds the lock"""
+        if not os.path.exists(self.log_path):
+            return
+        
+        with open(self.log_path, 'r') as f:
+            lines = f.read().split("\n")
+        try:
+            generation = json.loads(lines[0]).get("generation")
+        except json.JSONDecodeError:
+            generation = None
+        if generation != self._generation:
+            # Left over from before the snapshot was last rewritten
+            os.remove(self.log_path)
+            return
+        
+        for position, line in enumerate(lines[1:], start=1):
+            if not line:
+                break
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A save was interrupted while appending; keep the complete records before it
+                with open(self.log_path, 'r+') as f:
+                    f.truncate(len("".join(f"{kept}\n" for kept in lines[:position]).encode()))
+                break
+            if "delete" in record:
+                self._remove(record["delete"])
+            else:
+                self._remove(record["id"])
+                self._index(record["id"], record["text"], record["metadata"])
+            self._log_records += 1
+    
+    def _append_log(self, records: List[Dict[str, Any]]) -> None:
+        """Append records to the log, starting it if needed; caller holds the save lock"""
+        new_log = not os.path.exists(self.log_path)
+        with open(self.log_path, 'a') as f:
+            if new_log:
+                f.write(json.dumps({"generation": self._generation}) + "\n")
+            f.writelines(json.dumps(record) + "\n" for record in records)
+        self._log_records += len(records)
+    
+    def _write_snapshot(self, documents: Dict[str, Tuple[str, Dict[str, Any]]]) -> None:
+        """Atomically replace the snapshot and start an empty log; caller holds the save lock"""
+        generation = self._generation + 1
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"generation": generation, "documents": documents}, f)
+        os.replace(tmp_path, self.index_path)
+        
+        tmp_path = f"{self.log_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(json.dumps({"generation": generation}) + "\n")
+        os.replace(tmp_path, self.log_path)
+        self._generation = generation
+        self._log_records = 0
+    
+    def _reset(self) -> None:
+        """Empty the in-memory index; caller holds the lock"""
+        self._documents = {}
+        self._postings = {}
+        self._lengths = {}
+        self._total_length = 0
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int, rrf_k: int = 60) -> List[Document]:
+    """
+    Merge several rankings of chunks with reciprocal rank fusion
+    
+    Args:
+        rankings: Rankings to merge, best first in each
+        k: Maximum number of chunks to return
+        rrf_k: Rank offset damping the weight of the top ranks
+    
+    Returns:
+        Fused ranking; a chunk found by several rankings keeps the metadata of all of them
+    """
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking):
+            key = doc.id or doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank + 1)
+            if key in documents:
+                documents[key].metadata.update(
+                    {name: value for name, value in doc.metadata.items() if name not in documents[key].metadata}
+                )
+            else:
+                documents[key] = Document(page_content=doc.page_content, metadata=dict(doc.metadata), id=doc.id)
+    
+    fused = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [documents[key] for key in fused]
@@ -0,0 +1,143 @@
+"""
+Diversification of retrieved chunks: maximal marginal relevance and merging of overlapping neighbor chunks
+"""
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from langchain.schema import Document
+
+
+DUPLICATE_SIMILARITY = 0.95
+MIN_MERGE_OVERLAP = 20
+
+
+def maximal_marginal_relevance(query_embedding: List[float],
+                               candidate_embeddings: List[List[float]],
+                               k: int,
+                               lambda_mult: float = 0.5,
+                               duplicate_similarity: Optional[float] = DUPLICATE_SIMILARITY) -> List[int]:
+    """
+    Select candidates that are relevant to the query but not similar to each other
+    
+    Cosine similarities between the query and the candidates and between every pair of
+    candidates are computed once as matrix products; each step then picks the candidate
+    maximizing lambda * relevance - (1 - lambda) * similarity to the already selected ones.
+    
+    Args:
+        query_embedding: Embedding of the query
+        candidate_embeddings: Embeddings of the candidates, most relevant first
+        k: Maximum number of candidates to select
+        lambda_mult: Trade-off between relevance (1) and diversity (0)
+        duplicate_similarity: Candidates at least this similar to a selected one are never selected
+    
+    Returns:
+        Indices of the selected candidates in selection order
+    """
+    candidates = np.asarray(candidate_embeddings, dtype=np.float32)
+    if k <= 0 or candidates.size == 0:
+        return []
+    
+    query = np.asarray(query_embedding, dtype=np.float32)
+    candidates = candidates / np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+    
+    relevance = candidates @ query
+    pairwise = candidates @ candidates.T
+    
+    selected = [int(np.argmax(relevance))]
+    available = np.ones(len(candidates), dtype=bool)
+    available[selected[0]] = False
+    max_similarity = pairwise[selected[0]].copy()
+    
+    while len(selected) < min(k, len(candidates)):
+        if duplicate_similarity is not None:
+            available &= max_similarity < duplicate_similarity
+        if not available.any():
+            break
+        
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, pairwise[best], out=max_similarity)
+    
+    return selected
+
+
+def merge_overlapping(first: str, second: str) -> str:
+    """
+    Join two consecutive chunks, writing the text they share only once
+    
+    Args:
+        first: Text of the earlier chunk
+        second: Text of the following chunk
+    
+    Returns:
+        The joined text
+    """
+    for overlap in range(min(len(first), len(second)), MIN_MERGE_OVERLAP - 1, -1):
+        if first.endswith(second[:overlap]):
+            return first + second[overlap:]
+    return f"{first} {second}"
+
+
+def collapse_neighbor_chunks(docs: List[Document]) -> List[Document]:
+    """
+    Merge retrieved chunks that are consecutive chunks of the same file into one passage
+    
+    Chunk positions are read from the ids given by IngestionPipeline.chunk_id
+    ("<path digest>-<file hash>-<index>"); documents without such an id are kept as they are.
+    Each passage takes the place of its best ranked chunk and the highest relevance score.
+    
+    Args:
+        docs: Retrieved chunks, most relevant first
+    
+    Returns:
+        Passages, most relevant first
+    """
+    positions = sorted(
+        (position, rank) for rank, doc in enumerate(docs)
+        if (position := _chunk_position(doc.id)) is not None
+    )
+    
+    groups: Dict[int, List[int]] = {rank: [rank] for rank in range(len(docs))}
+    previous: Optional[Tuple[str, int]] = None
+    group = None
+    
+    for (file_key, index), rank in positions:
+        if previous == (file_key, index - 1):
+            groups[group].append(rank)
+            del groups[rank]
+        else:
+            group = rank
+        previous = (file_key, index)
+    
+    passages = []
+    for members in sorted(groups.values(), key=min):
+        if len(members) == 1:
+            passages.append(docs[members[0]])
+            continue
+        
+        text = docs[members[0]].page_content
+        for rank in members[1:]:
+            text = merge_overlapping(text, docs[rank].page_content)
+        
+        metadata = dict(docs[members[0]].metadata)
+        scores = [docs[rank].metadata["relevance_score"] for rank in members if "relevance_score" in docs[rank].metadata]
+        if scores:
+            metadata["relevance_score"] = max(scores)
+        passages.append(Document(page_content=text, metadata=metadata, id=docs[members[0]].id))
+    
+    return passages
+
+
+def _chunk_position(chunk_id: Optional[str]) -> Optional[Tuple[str, int]]:
+    """Split a chunk id into the file it belongs to and its index within the file"""
+    if not chunk_id:
+        return None
+    
+    file_key, _, index = chunk_id.rpartition("-")
+    if not file_key or not index.isdigit():
+        return None
+    return file_key, int(index)
@@ -1,11 +1,25 @@
 import os
 import uuid
-from typing import Dict, Any
+import asyncio
+import hashlib
+import zipfile
+import tempfile
+from typing import Dict, Any, List, Optional, Tuple
 from langchain_community.document_loaders import TextLoader, PyPDFLoader
 
+from src.config.settings import settings
 from .document_processor import DocumentProcessor
 
 
+class UploadTooLargeError(Exception):
+    """
+    Raised when an upload stream exceeds the maximum allowed size
+    """
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        super().__init__(f"File too large. Maximum size is {max_size / 1024 / 1024}MB")
+
+
 class UploadHandler:
     """
     Handles document upload operations
@@ -54,14 +68,195 @@ class UploadHandler:
                 "status": "success",
                 "document_id": doc_id,
                 "document_name": filename,
-                "file_path": file_path
+                "file_path": file_path,
+                "content_hash": hashlib.sha256(file_content).hexdigest(),
+                "size": len(file_content)
+            }
+            
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Error saving document: {str(e)}"
             }
+    
+    async def save_upload_stream(self, 
+                                 upload_file, 
+                                 filename: str, 
+                                 max_size: int,
+                                 chunk_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Stream an upload to a temporary file, enforcing the size limit and hashing the
+        content in the same pass, then atomically move it into the uploads folder
+        
+        Args:
+            upload_file: Object exposing an async read(size) method, e.g. FastAPI's UploadFile
+            filename: The name of the uploaded file
+            max_size: Maximum allowed size in bytes
+            chunk_size: Number of bytes read per iteration; defaults to settings.UPLOAD_CHUNK_SIZE
+            
+        Returns:
+            Status dictionary with file information, including the SHA-256 content hash
+            
+        Raises:
+            UploadTooLargeError: As soon as more than max_size bytes have been received
+        """
+        validation_result = self._validate_file(filename)
+        if validation_result["status"] == "error":
+            return validation_result
+        
+        chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+        digest = hashlib.sha256()
+        size = 0
+        
+        tmp_file = self._create_temp_file()
+        
+        try:
+            with tmp_file:
+                while True:
+                    chunk = await upload_file.read(chunk_size)
+                    if not chunk:
+                        break
+                    
+                    size += len(chunk)
+                    if size > max_size:
+                        raise UploadTooLargeError(max_size)
+                    
+                    digest.update(chunk)
+                    await asyncio.to_thread(tmp_file.write, chunk)
             
+            doc_id, file_path = self._commit_temp_file(tmp_file.name, filename)
+            
+        except UploadTooLargeError:
+            os.remove(tmp_file.name)
+            raise
         except Exception as e:
+            if os.path.exists(tmp_file.name):
+                os.remove(tmp_file.name)
             return {
                 "status": "error",
                 "message": f"Error saving document: {str(e)}"
             }
+        
+        print(f"Document saved: {file_path}")
+        
+        return {
+            "status": "success",
+            "document_id": doc_id,
+            "document_name": filename,
+            "file_path": file_path,
+            "content_hash": digest.hexdigest(),
+            "size": size
+        }
+    
+    def save_archive(self, 
+                     archive_file, 
+                     archive_name: str, 
+                     max_size: int,
+                     max_files: Optional[int] = None,
+                     chunk_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Extract the supported documents of a zip archive into the uploads folder
+        
+        Members are streamed out one at a time with the same size limit and hashing
+        as single uploads; directory structure inside the archive is discarded.
+        
+        Args:
+            archive_file: Seekable binary file object holding the zip archive
+            archive_name: The name of the uploaded archive, used in result names
+            max_size: Maximum allowed size in bytes of each extracted member
+            max_files: Maximum number of members extracted; defaults to settings.BULK_UPLOAD_MAX_FILES
+            chunk_size: Number of bytes read per iteration; defaults to settings.UPLOAD_CHUNK_SIZE
+        
+        Returns:
+            One status dictionary per supported member, in archive order
+        """
+        max_files = max_files or settings.BULK_UPLOAD_MAX_FILES
+        chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+        
+        try:
+            archive = zipfile.ZipFile(archive_file)
+        except zipfile.BadZipFile:
+            return [{
+                "status": "error",
+                "document_name": archive_name,
+                "message": f"Invalid zip archive: {archive_name}"
+            }]
+        
+        results = []
+        with archive:
+            members = [
+                info for info in archive.infolist()
+                if not info.is_dir()
+                and not os.path.basename(info.filename).startswith(".")
+                and self._validate_file(info.filename)["status"] == "success"
+            ]
+            
+            for info in members[:max_files]:
+                filename = os.path.basename(info.filename)
+                result = self._extract_member(archive, info, max_size, chunk_size)
+                results.append({**result, "document_name": f"{archive_name}/{filename}"})
+            
+            for info in members[max_files:]:
+                results.append({
+                    "status": "error",
+                    "document_name": f"{archive_name}/{os.path.basename(info.filename)}",
+                    "message": f"Skipped: archive holds more than {max_files} documents"
+                })
+        
+        return results
+    
+    def _extract_member(self, 
+                        archive: zipfile.ZipFile, 
+                        info: zipfile.ZipInfo, 
+                        max_size: int, 
+                        chunk_size: int) -> Dict[str, Any]:
+        """Stream one archive member to the uploads folder"""
+        if info.file_size > max_size:
+            return {"status": "error", "message": str(UploadTooLargeError(max_size))}
+        
+        digest = hashlib.sha256()
+        size = 0
+        tmp_file = self._create_temp_file()
+        
+        try:
+            with tmp_file, archive.open(info) as member:
+                for chunk in iter(lambda: member.read(chunk_size), b""):
+                    size += len(chunk)
+                    if size > max_size:
+                        raise UploadTooLargeError(max_size)
+                    
+                    digest.update(chunk)
+                    tmp_file.write(chunk)
+            
+            doc_id, file_path = self._commit_temp_file(tmp_file.name, info.filename)
+        
+        except Exception as e:
+            if os.path.exists(tmp_file.name):
+                os.remove(tmp_file.name)
+            message = str(e) if isinstance(e, UploadTooLargeError) else f"Error saving document: {str(e)}"
+            return {"status": "error", "message": message}
+        
+        return {
+            "status": "success",
+            "document_id": doc_id,
+            "file_path": file_path,
+            "content_hash": digest.hexdigest(),
+            "size": size
+        }
+    
+    def _create_temp_file(self):
+        """Open a temporary file in the uploads folder that is ignored by the loaders"""
+        return tempfile.NamedTemporaryFile(
+            dir=self.uploads_folder, prefix=".upload-", suffix=".part", delete=False
+        )
+    
+    def _commit_temp_file(self, tmp_path: str, filename: str) -> Tuple[str, str]:
+        """Move a completed temporary file to its final name and return (document id, path)"""
+        doc_id = str(uuid.uuid4())
+        _, file_extension = os.path.splitext(filename)
+        file_path = os.path.join(self.uploads_folder, f"{doc_id}{file_extension}")
+        os.replace(tmp_path, file_path)
+        return doc_id, file_path
     
     def load_and_process_uploaded_file(self, file_path: str):
         """
@@ -0,0 +1,102 @@
+import os
+import json
+import time
+import threading
+from typing import Dict, Any, Optional
+
+
+class UploadRegistry:
+    """
+    Persisted mapping of upload content hashes to the documents already stored for them
+    """
+    
+    def __init__(self, registry_path: str):
+        """
+        Initialize the upload registry
+        
+        Args:
+            registry_path: Path of the JSON file holding the registry
+        """
+        self.registry_path = registry_path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+    
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Load the registry from disk, starting empty if it is missing or invalid"""
+        if not os.path.exists(self.registry_path):
+            return {}
+        
+        try:
+            with open(self.registry_path, 'r') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            print(f"Warning: Could not read upload registry at: {self.registry_path}")
+            return {}
+    
+    def _save(self) -> None:
+        """Atomically write the registry to disk; caller holds the lock"""
+        tmp_path = f"{self.registry_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.registry_path)
+    
+    def get(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the document stored for a content hash
+        
+        Args:
+            content_hash: SHA-256 of the uploaded content
+        
+        Returns:
+            Registry entry or None if no stored file has this content
+        """
+        with self._lock:
+            entry = self._entries.get(content_hash)
+            if entry and not os.path.exists(entry["file_path"]):
+                del self._entries[content_hash]
+                self._save()
+                return None
+            return dict(entry) if entry else None
+    
+    def register_if_absent(self, content_hash: str, document_id: str,
+                           document_name: str, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Register an upload unless a file with the same content is already stored
+        
+        Args:
+            content_hash: SHA-256 of the uploaded content
+            document_id: Id assigned to the upload
+            document_name: Original name of the uploaded file
+            file_path: Path where the upload is stored
+        
+        Returns:
+            The existing entry if the content is a duplicate, None if the upload was registered
+        """
+        with self._lock:
+            entry = self._entries.get(content_hash)
+            if entry and os.path.exists(entry["file_path"]):
+                return dict(entry)
+            
+            self._entries[content_hash] = {
+                "document_id": document_id,
+                "document_name": document_name,
+                "file_path": file_path,
+                "uploaded_at": time.time(),
+            }
+            self._save()
+            return None
+    
+    def remove(self, content_hash: str) -> None:
+        """
+        Forget a content hash
+        
+        Args:
+            content_hash: SHA-256 of the uploaded content
+        """
+        with self._lock:
+            if self._entries.pop(content_hash, None) is not None:
+                self._save()
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,36 @@
+"""
+Vector backends storing chunk embeddings for the VectorStoreManager
+"""
+from typing import Dict, Type
+
+from .base import VectorBackend
+from .chroma_backend import ChromaBackend
+from .compression import VectorCompressor
+from .numpy_backend import NumpyBackend
+
+BACKENDS: Dict[str, Type[VectorBackend]] = {
+    "chroma": ChromaBackend,
+    "numpy": NumpyBackend,
+}
+
+
+def get_backend_class(name: str) -> Type[VectorBackend]:
+    """
+    Look up a vector backend by name
+    
+    Args:
+        name: Name of the backend, "chroma" or "numpy"
+    
+    Returns:
+        The backend class
+    
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown vector backend: {name}. Use one of: {', '.join(BACKENDS)}")
+
+
+__all__ = ["VectorBackend", "ChromaBackend", "NumpyBackend", "VectorCompressor", "BACKENDS", "get_backend_class"]
@@ -0,0 +1,123 @@
+from abc import ABC, abstractmethod
+from typing import Iterator, List, Tuple
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+
+
+class VectorBackend(ABC):
+    """
+    Storage and nearest-neighbor search of chunk embeddings behind the VectorStoreManager
+    
+    Search results are (document, relevance score) pairs, most relevant first, where the
+    relevance score is the cosine similarity of the query and the chunk (higher is more relevant),
+    whatever the backend or distance space, and documents carry their chunk id.
+    """
+    
+    def __init__(self, path: str, embeddings: Embeddings):
+        """
+        Open the backend stored at a path, starting empty if nothing is stored there yet
+        
+        Args:
+            path: Directory holding the backend's files
+            embeddings: Embeddings used to embed added chunks
+        """
+        self.path = path
+        self.embeddings = embeddings
+    
+    @classmethod
+    def create(cls, path: str, embeddings: Embeddings, documents: List[Document], ids: List[str]) -> "VectorBackend":
+        """
+        Build a new backend at a path from chunks
+        
+        Args:
+            path: Empty directory holding the backend's files
+            embeddings: Embeddings used to embed the chunks
+            documents: Chunks to index
+            ids: Ids of the chunks
+        
+        Returns:
+            The new backend
+        """
+        backend = cls(path, embeddings)
+        backend.add(documents, ids)
+        return backend
+    
+    @classmethod
+    @abstractmethod
+    def exists(cls, path: str) -> bool:
+        """Check if the backend has persisted data at a path"""
+    
+    @abstractmethod
+    def add(self, documents: List[Document], ids: List[str]) -> None:
+        """
+        Embed and store chunks, replacing chunks stored under the same ids
+        
+        Args:
+            documents: Chunks to store
+            ids: Ids of the chunks
+        """
+    
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None:
+        """
+        Remove chunks
+        
+        Args:
+            ids: Ids of the chunks to remove
+        """
+    
+    @abstractmethod
+    def search(self, embedding: List[float], k: int) -> List[Tuple[Document, float]]:
+        """
+        Find the chunks nearest to an embedding
+        
+        Args:
+            embedding: Query embedding
+            k: Maximum number of chunks to return
+        
+        Returns:
+            (document, relevance score) pairs, most relevant first
+        """
+    
+    @abstractmethod
+    def search_with_embeddings(self, 
+                               embedding: List[float], 
+                               k: int) -> Tuple[List[Tuple[Document, float]], List[List[float]]]:
+        """
+        Find the chunks nearest to an embedding, together with their stored embeddings
+        
+        Args:
+            embedding: Query embedding
+            k: Maximum number of chunks to return
+        
+        Returns:
+            Tuple of (document, relevance score) pairs, most relevant first, and their embeddings
+        """
+    
+    def search_batch(self, embeddings: List[List[float]], k: int) -> List[List[Tuple[Document, float]]]:
+        """
+        Find the chunks nearest to each of several embeddings
+        
+        Args:
+            embeddings: Query embeddings
+            k: Maximum number of chunks to return per query
+        
+        Returns:
+            One list of (document, relevance score) pairs per query
+        """
+        return [self.search(embedding, k) for embedding in embeddings]
+    
+    @abstractmethod
+    def iter_documents(self, page_size: int) -> Iterator[Tuple[List[str], List[Document]]]:
+        """
+        Iterate over every stored chunk
+        
+        Args:
+            page_size: Number of chunks per page
+        
+        Yields:
+            Tuples of chunk ids and documents
+        """
+    
+    def close(self) -> None:
+        """Release the backend's resources"""
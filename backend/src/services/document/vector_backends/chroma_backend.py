@@ -0,0 +1,207 @@
+import os
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+from langchain_chroma import Chroma
+from chromadb.api.shared_system_client import SharedSystemClient
+
+from src.config.settings import settings
+from .base import VectorBackend
+
+
+class ChromaBackend(VectorBackend):
+    """
+    Vector backend storing chunks in a persistent Chroma collection (HNSW approximate search)
+    
+    The HNSW distance space, graph degree (M) and construction ef are fixed when the collection
+    is created; the search ef of an existing collection is updated when it is opened.
+    
+    Distances are converted to cosine similarity for the space the collection was built
+    with, assuming normalized embeddings (as produced by all-MiniLM-L6-v2): "l2" distances
+    are squared Euclidean distances, 2 - 2 * cosine, and "cosine" and "ip" distances are
+    1 - cosine. Relevance scores therefore mean the same for every space and backend.
+    """
+    
+    SPACES = ("l2", "cosine", "ip")
+    
+    def __init__(self, 
+                 path: str, 
+                 embeddings: Embeddings, 
+                 vector_store: Optional[Chroma] = None,
+                 hnsw: Optional[Dict[str, Any]] = None):
+        """
+        Open the Chroma collection stored at a path, creating it if missing
+        
+        Args:
+            path: Persist directory of the collection
+            embeddings: Embeddings used to embed added chunks
+            vector_store: Already opened collection to wrap
+            hnsw: HNSW configuration (space, max_neighbors, ef_construction, ef_search);
+                defaults to the CHROMA_HNSW_* settings
+        
+        Raises:
+            ValueError: If the distance space is unknown
+        """
+        super().__init__(path, embeddings)
+        self.hnsw = hnsw or self.hnsw_configuration()
+        if self.hnsw.get("space", "l2") not in self.SPACES:
+            raise ValueError(f"Unknown HNSW space: {self.hnsw['space']}. Use one of: {', '.join(self.SPACES)}")
+        
+        if vector_store is None:
+            vector_store = Chroma(
+                persist_directory=path,
+                embedding_function=embeddings,
+                collection_configuration={"hnsw": dict(self.hnsw)}
+            )
+            self._sync_hnsw(vector_store)
+        self.vector_store = vector_store
+        self.space = self._collection_space()
+    
+    @classmethod
+    def create(cls, 
+               path: str, 
+               embeddings: Embeddings, 
+               documents: List[Document], 
+               ids: List[str], 
+               hnsw: Optional[Dict[str, Any]] = None) -> "ChromaBackend":
+        """
+        Build a new collection at a path from chunks
+        
+        Args:
+            path: Persist directory of the collection
+            embeddings: Embeddings used to embed the chunks
+            documents: Chunks to index
+            ids: Ids of the chunks
+            hnsw: HNSW configuration; defaults to the CHROMA_HNSW_* settings
+        
+        Returns:
+            The new backend
+        """
+        hnsw = hnsw or cls.hnsw_configuration()
+        vector_store = Chroma.from_documents(
+            documents=documents,
+            embedding=embeddings,
+            persist_directory=path,
+            ids=ids,
+            collection_configuration={"hnsw": dict(hnsw)}
+        )
+        return cls(path, embeddings, vector_store=vector_store, hnsw=hnsw)
+    
+    @staticmethod
+    def hnsw_configuration() -> Dict[str, Any]:
+        """
+        Get the HNSW configuration from the settings
+        
+        Returns:
+            Chroma HNSW configuration with the space, M, construction ef and search ef
+        """
+        return {
+            "space": settings.CHROMA_HNSW_SPACE,
+            "max_neighbors": settings.CHROMA_HNSW_M,
+            "ef_construction": settings.CHROMA_HNSW_CONSTRUCTION_EF,
+            "ef_search": settings.CHROMA_HNSW_SEARCH_EF,
+        }
+    
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        return os.path.exists(os.path.join(path, "chroma.sqlite3"))
+    
+    def add(self, documents: List[Document], ids: List[str]) -> None:
+        self.vector_store.add_documents(documents, ids=ids)
+    
+    def delete(self, ids: List[str]) -> None:
+        self.vector_store.delete(ids=ids)
+    
+    def search(self, embedding: List[float], k: int) -> List[Tuple[Document, float]]:
+        scored = self.vector_store.similarity_search_by_vector_with_relevance_scores(embedding, k=k)
+        to_relevance = self._relevance_score_fn()
+        return [(doc, to_relevance(distance)) for doc, distance in scored]
+    
+    def search_with_embeddings(self, 
+                               embedding: List[float], 
+                               k: int) -> Tuple[List[Tuple[Document, float]], List[List[float]]]:
+        results = self.vector_store._collection.query(
+            query_embeddings=[embedding],
+            n_results=k,
+            include=["documents", "metadatas", "distances", "embeddings"]
+        )
+        
+        to_relevance = self._relevance_score_fn()
+        scored = [
+            (Document(page_content=text, metadata=metadata or {}, id=doc_id), to_relevance(distance))
+            for doc_id, text, metadata, distance in zip(
+                results["ids"][0], results["documents"][0], results["metadatas"][0], results["distances"][0]
+            )
+        ]
+        return scored, list(results["embeddings"][0])
+    
+    def iter_documents(self, page_size: int) -> Iterator[Tuple[List[str], List[Document]]]:
+        offset = 0
+        while True:
+            page = self.vector_store.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                return
+            
+            yield page["ids"], [
+                Document(page_content=text, metadata=metadata or {})
+                for text, metadata in zip(page["documents"], page["metadatas"])
+            ]
+            offset += len(page["ids"])
+    
+    def close(self) -> None:
+        """
+        Release the Chroma client and stop the shared system serving this path
+        
+        Chroma caches one system per persist directory for the whole process, so without
+        this a collection re-created after the directory was removed would keep writing
+        through the old, deleted database files.
+        """
+        client = self.vector_store._client
+        close_client = getattr(client, "close", None)
+        if close_client is not None:
+            close_client()
+        
+        identifier = getattr(client, "_identifier", None)
+        system = SharedSystemClient._identifier_to_system.pop(identifier, None)
+        SharedSystemClient._identifier_to_refcount.pop(identifier, None)
+        if system is not None:
+            system.stop()
+    
+    def _sync_hnsw(self, vector_store: Chroma) -> None:
+        """
+        Apply the configured search ef to an existing collection and report build parameters that differ
+        
+        Chroma reads the search ef when it loads the HNSW index on the first query, so this
+        must run before the collection is searched.
+        """
+        configuration = vector_store._collection.configuration
+        current = configuration.get("hnsw") if isinstance(configuration, dict) else None
+        if not isinstance(current, dict):
+            return
+        
+        fixed = [name for name in ("space", "max_neighbors", "ef_construction") 
+                 if name in self.hnsw and current.get(name) != self.hnsw[name]]
+        if fixed:
+            print(f"Warning: Vector store was built with HNSW {', '.join(f'{name}={current.get(name)}' for name in fixed)}; "
+                  f"remove {self.path} to rebuild it with the configured values")
+        
+        if "ef_search" in self.hnsw and current.get("ef_search") != self.hnsw["ef_search"]:
+            vector_store._collection.modify(configuration={"hnsw": {"ef_search": self.hnsw["ef_search"]}})
+    
+    def _collection_space(self) -> str:
+        """Get the distance space the collection was built with"""
+        configuration = self.vector_store._collection.configuration
+        hnsw = configuration.get("hnsw") if isinstance(configuration, dict) else None
+        if isinstance(hnsw, dict) and hnsw.get("space") in self.SPACES:
+            return hnsw["space"]
+        
+        metadata = self.vector_store._collection.metadata
+        if isinstance(metadata, dict) and metadata.get("hnsw:space") in self.SPACES:
+            return metadata["hnsw:space"]
+        return self.hnsw.get("space", "l2")
+    
+    def _relevance_score_fn(self) -> Callable[[float], float]:
+        """Get the function converting the collection's distances to cosine similarities"""
+        if self.space == "l2":
+            return lambda distance: 1.0 - distance / 2.0
+        return lambda distance: 1.0 - distance
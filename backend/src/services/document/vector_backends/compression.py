@@ -0,0 +1,198 @@
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+
+
+class VectorCompressor:
+    """
+    Compact codes of normalized embeddings, scanned in the first pass of a search
+    
+    Vectors are optionally reduced to fewer dimensions, either by keeping the first
+    dimensions ("truncate") or by projecting them on their principal components ("pca"),
+    and optionally quantized to int8 with one scale per vector. Scores of the codes
+    approximate the inner products of the full vectors; the search rescores a shortlist
+    with the full-precision vectors.
+    
+    The principal components are fitted without centering, which best preserves inner
+    products. They are refitted each time the number of vectors doubles until they were
+    fitted on PCA_STABLE_ROWS vectors, so an index built file by file still ends up with
+    components fitted on a representative sample.
+    """
+    
+    QUANTIZATIONS = ("none", "int8")
+    REDUCTIONS = ("truncate", "pca")
+    PCA_STABLE_ROWS = 10000
+    BLOCK_ROWS = 16384
+    
+    def __init__(self,
+                 dim: int,
+                 quantization: str = "none",
+                 dimensions: int = 0,
+                 reduction: str = "truncate",
+                 projection: Optional[np.ndarray] = None,
+                 fitted_rows: int = 0):
+        """
+        Initialize the compressor
+        
+        Args:
+            dim: Dimension of the full vectors
+            quantization: "none" or "int8"
+            dimensions: Dimensions kept by the reduction, 0 or dim keeps them all
+            reduction: "truncate" or "pca"
+            projection: Fitted principal components (dimensions x dim), for "pca"
+            fitted_rows: Number of vectors the principal components were fitted on
+        
+        Raises:
+            ValueError: If the quantization or reduction is unknown
+        """
+        self.validate(quantization, reduction)
+        self.dim = dim
+        self.quantization = quantization
+        self.dimensions = dimensions if 0 < dimensions < dim else dim
+        self.reduction = reduction if self.dimensions < dim else "truncate"
+        self.projection = projection if self.reduction == "pca" else None
+        self.fitted_rows = fitted_rows if self.projection is not None else 0
+    
+    @classmethod
+    def validate(cls, quantization: str, reduction: str) -> None:
+        """
+        Check compression parameters
+        
+        Args:
+            quantization: Quantization to check
+            reduction: Reduction to check
+        
+        Raises:
+            ValueError: If the quantization or reduction is unknown
+        """
+        if quantization not in cls.QUANTIZATIONS:
+            raise ValueError(f"Unknown vector quantization: {quantization}. Use one of: {', '.join(cls.QUANTIZATIONS)}")
+        if reduction not in cls.REDUCTIONS:
+            raise ValueError(f"Unknown vector reduction: {reduction}. Use one of: {', '.join(cls.REDUCTIONS)}")
+    
+    @property
+    def enabled(self) -> bool:
+        """Whether vectors are stored in a compact form next to the full vectors"""
+        return self.quantization != "none" or self.dimensions < self.dim
+    
+    @property
+    def code_dtype(self) -> np.dtype:
+        return np.dtype(np.int8 if self.quantization == "int8" else np.float32)
+    
+    @property
+    def bytes_per_vector(self) -> int:
+        """Size of the code of one vector, including its scale"""
+        return self.dimensions * self.code_dtype.itemsize + (4 if self.quantization == "int8" else 0)
+    
+    def params(self) -> Dict[str, Any]:
+        """
+        Get the parameters recorded with the index
+        
+        Returns:
+            Dictionary with the quantization, dimensions, reduction and PCA sample size
+        """
+        return {
+            "quantization": self.quantization,
+            "dimensions": self.dimensions,
+            "reduction": self.reduction,
+            "fitted_rows": self.fitted_rows,
+        }
+    
+    def same_config(self, other: "VectorCompressor") -> bool:
+        """Check if two compressors produce codes of the same kind"""
+        return (self.quantization, self.dimensions, self.reduction) == (other.quantization, other.dimensions, other.reduction)
+    
+    def needs_fit(self, rows: int) -> bool:
+        """
+        Check if the principal components should be (re)fitted
+        
+        Args:
+            rows: Number of stored vectors
+        
+        Returns:
+            True if there are no components yet, or the vectors doubled since an early fit
+        """
+        if self.reduction != "pca":
+            return False
+        if self.projection is None:
+            return rows > 0
+        return self.fitted_rows < self.PCA_STABLE_ROWS and rows >= 2 * self.fitted_rows
+    
+    def fit(self, vectors: np.ndarray) -> None:
+        """
+        Fit the principal components on vectors
+        
+        Args:
+            vectors: Normalized vectors, one per row
+        """
+        if self.reduction != "pca":
+            return
+        
+        second_moment = np.zeros((self.dim, self.dim), dtype=np.float64)
+        for start in range(0, len(vectors), self.BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + self.BLOCK_ROWS], dtype=np.float64)
+            second_moment += block.T @ block
+        
+        _, eigenvectors = np.linalg.eigh(second_moment)
+        self.projection = np.ascontiguousarray(eigenvectors[:, ::-1][:, :self.dimensions].T, dtype=np.float32)
+        self.fitted_rows = len(vectors)
+    
+    def reduce(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Reduce vectors to the kept dimensions
+        
+        Args:
+            vectors: Vectors, one per row
+        
+        Returns:
+            Reduced float32 vectors
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.dimensions == self.dim:
+            return vectors
+        if self.reduction == "pca":
+            return vectors @ self.projection.T
+        return vectors[:, :self.dimensions]
+    
+    def encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Compute the codes of vectors
+        
+        Args:
+            vectors: Normalized vectors, one per row
+        
+        Returns:
+            Tuple of the codes and, for int8, the scale of each vector
+        """
+        reduced = self.reduce(vectors)
+        if self.quantization != "int8":
+            return np.ascontiguousarray(reduced, dtype=np.float32), None
+        
+        scales = np.maximum(np.abs(reduced).max(axis=1), 1e-12) / 127.0
+        codes = np.clip(np.rint(reduced / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    
+    def score(self, queries: np.ndarray, codes: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+        """
+        Approximate the inner products of queries with the encoded vectors
+        
+        Codes are converted to float32 a block of BLOCK_ROWS rows at a time, so the scan
+        never holds a full-precision copy of the index.
+        
+        Args:
+            queries: Normalized query vectors, one per row
+            codes: Codes of the stored vectors
+            scales: Scales of the stored vectors, for int8
+        
+        Returns:
+            Matrix of approximate scores, one row per query
+        """
+        reduced = self.reduce(queries)
+        scores = np.empty((len(reduced), len(codes)), dtype=np.float32)
+        
+        for start in range(0, len(codes), self.BLOCK_ROWS):
+            block = np.asarray(codes[start:start + self.BLOCK_ROWS], dtype=np.float32)
+            scores[:, start:start + len(block)] = reduced @ block.T
+        
+        if scales is not None:
+            scores *= scales
+        return scores
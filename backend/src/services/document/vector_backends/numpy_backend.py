@@ -0,0 +1,523 @@
+import os
+import json
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+
+from src.config.settings import settings
+from .base import VectorBackend
+from .compression import VectorCompressor
+
+
+class NumpyBackend(VectorBackend):
+    """
+    Vector backend doing exact search over embeddings stored in a memory-mapped file
+    
+    Embeddings are L2-normalized float32 rows appended to VECTORS_FILE and opened read-only
+    with np.memmap, so startup only reads the chunk texts and the OS shares the embedding
+    pages between worker processes. Chunk texts and metadata are appended to CHUNKS_FILE,
+    one JSON line per added chunk, with tombstone lines for deleted chunks; both files are
+    compacted once more than COMPACT_RATIO of the rows are deleted. Compaction writes both
+    files under the next generation number and commits them by rewriting META_FILE, so an
+    interrupted compaction leaves either the old or the new pair in use, never a mix.
+    Search scores a batch of queries with one matrix product and selects the top k with
+    argpartition. The relevance score is the cosine similarity.
+    
+    With int8 quantization or fewer dimensions configured, compact codes of the vectors are
+    kept in CODES_FILE (and SCALES_FILE for int8) and scanned instead of the full vectors;
+    the best k * rescore_factor rows are then rescored with their full-precision vectors, so
+    only the codes and the shortlisted rows are paged in. The compression parameters and
+    principal components are recorded with the index; codes are re-encoded from the full
+    vectors when the configured parameters change.
+    """
+    
+    VECTORS_FILE = "vectors.f32"
+    CODES_FILE = "vectors.codes"
+    SCALES_FILE = "vectors.scales"
+    PROJECTION_FILE = "vectors_projection.npy"
+    CHUNKS_FILE = "chunks.jsonl"
+    META_FILE = "vectors_meta.json"
+    COMPACT_RATIO = 0.5
+    
+    def __init__(self, 
+                 path: str, 
+                 embeddings: Embeddings,
+                 quantization: Optional[str] = None,
+                 dimensions: Optional[int] = None,
+                 reduction: Optional[str] = None,
+                 rescore_factor: Optional[int] = None):
+        """
+        Open the index stored at a path, starting empty if nothing is stored there yet
+        
+        Args:
+            path: Directory holding the index files
+            embeddings: Embeddings used to embed added chunks
+            quantization: "none" or "int8"; defaults to settings.VECTOR_QUANTIZATION
+            dimensions: Dimensions of the codes, 0 keeps all; defaults to settings.VECTOR_DIMENSIONS
+            reduction: "truncate" or "pca"; defaults to settings.VECTOR_REDUCTION
+            rescore_factor: Shortlist size per result rescored with the full vectors, 0 disables
+                rescoring; defaults to settings.VECTOR_RESCORE_FACTOR
+        
+        Raises:
+            ValueError: If the quantization or reduction is unknown
+        """
+        super().__init__(path, embeddings)
+        self.quantization = quantization or settings.VECTOR_QUANTIZATION
+        self.dimensions = settings.VECTOR_DIMENSIONS if dimensions is None else dimensions
+        self.reduction = reduction or settings.VECTOR_REDUCTION
+        self.rescore_factor = settings.VECTOR_RESCORE_FACTOR if rescore_factor is None else rescore_factor
+        VectorCompressor.validate(self.quantization, self.reduction)
+        self._lock = threading.Lock()
+        self.dim: Optional[int] = None
+        self.compressor: Optional[VectorCompressor] = None
+        self._reset()
+        self._load()
+    
+    @classmethod
+    def create(cls, 
+               path: str, 
+               embeddings: Embeddings, 
+               documents: List[Document], 
+               ids: List[str], 
+               **options: Any) -> "NumpyBackend":
+        """
+        Build a new index at a path from chunks
+        
+        Args:
+            path: Directory holding the index files; existing index files are replaced
+            embeddings: Embeddings used to embed the chunks
+            documents: Chunks to index
+            ids: Ids of the chunks
+            **options: Compression options passed to the constructor
+        
+        Returns:
+            The new backend
+        """
+        for name in cls._stored_files(path):
+            os.remove(os.path.join(path, name))
+        
+        backend = cls(path, embeddings, **options)
+        backend.add(documents, ids)
+        return backend
+    
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        return os.path.exists(os.path.join(path, cls.META_FILE))
+    
+    @classmethod
+    def _stored_files(cls, path: str) -> List[str]:
+        """List the index files of every generation stored in a directory"""
+        if not os.path.isdir(path):
+            return []
+        prefixes = tuple(os.path.splitext(name)[0] for name in (cls.VECTORS_FILE, cls.CHUNKS_FILE))
+        return [name for name in os.listdir(path) if name.startswith(prefixes)]
+    
+    def add(self, documents: List[Document], ids: List[str]) -> None:
+        if not documents:
+            return
+        
+        vectors = self._normalize(self.embeddings.embed_documents([doc.page_content for doc in documents]))
+        
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                self.compressor = self._configured_compressor()
+                self._write_meta()
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the index dimension {self.dim}")
+            
+            os.makedirs(self.path, exist_ok=True)
+            with open(self._data_file(self.VECTORS_FILE), 'ab') as f:
+                f.write(vectors.tobytes())
+            with open(self._data_file(self.CHUNKS_FILE), 'a') as f:
+                for chunk_id, doc in zip(ids, documents):
+                    f.write(json.dumps({"id": chunk_id, "text": doc.page_content, "metadata": doc.metadata}) + "\n")
+            
+            if any(chunk_id in self._rows for chunk_id in ids):
+                # Superseding rows changes entries in place; searches keep the list they took
+                self._chunks = list(self._chunks)
+            for chunk_id, doc in zip(ids, documents):
+                self._append_row(chunk_id, doc.page_content, dict(doc.metadata))
+            self._remap()
+            
+            if self.compressor.needs_fit(len(self._rows)):
+                self._encode_all(refit=True)
+            elif self.compressor.enabled:
+                codes, scales = self.compressor.encode(vectors)
+                self._append_codes(codes, scales)
+                self._remap()
+    
+    def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            deleted = [chunk_id for chunk_id in ids if chunk_id in self._rows]
+            if not deleted:
+                return
+            
+            with open(self._data_file(self.CHUNKS_FILE), 'a') as f:
+                for chunk_id in deleted:
+                    f.write(json.dumps({"delete": chunk_id}) + "\n")
+            
+            valid, chunks = self._valid.copy(), list(self._chunks)
+            for chunk_id in deleted:
+                row = self._rows.pop(chunk_id)
+                valid[row] = False
+                chunks[row] = None
+            self._valid, self._chunks = valid, chunks
+            
+            if len(self._rows) < (1 - self.COMPACT_RATIO) * len(self._chunks):
+                self._compact()
+    
+    def search(self, embedding: List[float], k: int) -> List[Tuple[Document, float]]:
+        return self.search_batch([embedding], k)[0]
+    
+    def search_with_embeddings(self, 
+                               embedding: List[float], 
+                               k: int) -> Tuple[List[Tuple[Document, float]], List[List[float]]]:
+        matrix, chunks, rows, scores = self._top_k(self._normalize([embedding]), k)
+        hits = self._hits(chunks, rows[0], scores[0])
+        return [(doc, score) for _, doc, score in hits], [matrix[row].tolist() for row, _, _ in hits]
+    
+    def search_batch(self, embeddings: List[List[float]], k: int) -> List[List[Tuple[Document, float]]]:
+        _, chunks, rows, scores = self._top_k(self._normalize(embeddings), k)
+        return [
+            [(doc, score) for _, doc, score in self._hits(chunks, query_rows, query_scores)]
+            for query_rows, query_scores in zip(rows, scores)
+        ]
+    
+    def iter_documents(self, page_size: int) -> Iterator[Tuple[List[str], List[Document]]]:
+        with self._lock:
+            entries = [entry for entry in self._chunks if entry is not None]
+        
+        for start in range(0, len(entries), page_size):
+            page = entries[start:start + page_size]
+            yield [chunk_id for chunk_id, _, _ in page], [
+                Document(page_content=text, metadata=dict(metadata)) for _, text, metadata in page
+            ]
+    
+    def scanned_bytes_per_vector(self) -> int:
+        """
+        Get the bytes read per stored vector by the first pass of a search
+        
+        Returns:
+            Size of a code when compression is enabled, of a full vector otherwise
+        """
+        with self._lock:
+            if self.compressor is not None and self.compressor.enabled:
+                return self.compressor.bytes_per_vector
+            return 4 * (self.dim or 0)
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._rows)
+    
+    def close(self) -> None:
+        with self._lock:
+            self._matrix = np.zeros((0, self.dim or 0), dtype=np.float32)
+            self._codes = None
+            self._scales = None
+    
+    def _top_k(self, 
+               queries: np.ndarray, 
+               k: int) -> Tuple[np.ndarray, List[Optional[Tuple[str, str, Dict[str, Any]]]], List[np.ndarray], List[np.ndarray]]:
+        """
+        Score queries against every stored row and select the best rows of each query
+        
+        Args:
+            queries: Normalized query embeddings, one per row
+            k: Maximum number of rows per query
+        
+        Returns:
+            Tuple of the searched matrix, the chunks of its rows, and the selected rows and
+            their scores per query, best first. The chunk list is taken with the matrix without
+            copying: writers only append to it or replace it, so a concurrent delete or
+            compaction cannot change the entries of the searched rows.
+        """
+        with self._lock:
+            matrix, codes, scales, compressor = self._matrix, self._codes, self._scales, self.compressor
+            chunks, valid, count = self._chunks, self._valid, len(self._rows)
+        
+        k = min(k, count)
+        if k <= 0:
+            return matrix, chunks, [np.empty(0, dtype=np.int64)] * len(queries), [np.empty(0, dtype=np.float32)] * len(queries)
+        
+        if queries.shape[1] != matrix.shape[1]:
+            raise ValueError(f"Query dimension {queries.shape[1]} does not match the index dimension {matrix.shape[1]}")
+        
+        if codes is None:
+            rows, scores = self._select(queries @ matrix.T, valid, count, k)
+            return matrix, chunks, rows, scores
+        
+        approximate = compressor.score(queries, codes, scales)
+        if self.rescore_factor <= 0:
+            rows, scores = self._select(approximate, valid, count, k)
+            return matrix, chunks, rows, scores
+        
+        shortlist, _ = self._select(approximate, valid, count, min(k * self.rescore_factor, count), ordered=False)
+        shortlist = np.stack(shortlist)
+        exact = np.einsum("qd,qsd->qs", queries, matrix[shortlist])
+        rows, scores = self._select(exact, np.ones(exact.shape[1], dtype=bool), exact.shape[1], k)
+        return matrix, chunks, [candidates[selected] for candidates, selected in zip(shortlist, rows)], scores
+    
+    @staticmethod
+    def _select(scores: np.ndarray, 
+                valid: np.ndarray, 
+                count: int, 
+                k: int, 
+                ordered: bool = True) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """Select the k best valid columns of each row of a score matrix with argpartition"""
+        if count < len(valid):
+            scores[:, ~valid] = -np.inf
+        
+        if k < scores.shape[1]:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        
+        if ordered:
+            order = np.argsort(-top_scores, axis=1)
+            top, top_scores = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+        return list(top), list(top_scores)
+    
+    @staticmethod
+    def _hits(chunks: List[Optional[Tuple[str, str, Dict[str, Any]]]], 
+              rows: np.ndarray, 
+              scores: np.ndarray) -> List[Tuple[int, Document, float]]:
+        """Build the (row, document, relevance score) triples of selected rows from the chunks searched with them"""
+        hits = []
+        for row, score in zip(rows, scores):
+            entry = chunks[row] if row < len(chunks) else None
+            if entry is None:
+                continue
+            chunk_id, text, metadata = entry
+            hits.append((int(row), Document(page_content=text, metadata=dict(metadata), id=chunk_id), float(score)))
+        return hits
+    
+    def _normalize(self, vectors: List[List[float]]) -> np.ndarray:
+        """Convert vectors to a float32 matrix of unit-length rows"""
+        matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    
+    def _configured_compressor(self) -> VectorCompressor:
+        """Build the compressor of the configured parameters for the index dimension"""
+        return VectorCompressor(self.dim, self.quantization, self.dimensions, self.reduction)
+    
+    def _load(self) -> None:
+        """Replay the chunks file and map the index files, starting empty if nothing is stored"""
+        if not self.exists(self.path):
+            return
+        
+        try:
+            with open(self._file(self.META_FILE), 'r') as f:
+                meta = json.load(f)
+            self.dim = meta["dim"]
+            self.generation = meta.get("generation", 0)
+            self.compressor = self._stored_compressor(meta.get("compression") or {})
+            self._remove_other_generations()
+            
+            if os.path.exists(self._data_file(self.CHUNKS_FILE)):
+                with open(self._data_file(self.CHUNKS_FILE), 'r') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        record = json.loads(line)
+                        if "delete" in record:
+                            row = self._rows.pop(record["delete"], None)
+                            if row is not None:
+                                self._chunks[row] = None
+                        else:
+                            self._append_row(record["id"], record["text"], record.get("metadata") or {})
+            
+            self._truncate_to_chunks()
+            self._remap()
+            
+            configured = self._configured_compressor()
+            if not configured.same_config(self.compressor):
+                print(f"Re-encoding vector index at {self.path} with {configured.params()}")
+                self.compressor = configured
+                self._encode_all(refit=True)
+            elif self.compressor.enabled and (self._codes is None or self.compressor.needs_fit(len(self._rows))):
+                self._encode_all(refit=self.compressor.needs_fit(len(self._rows)))
+        except (json.JSONDecodeError, IOError, KeyError, TypeError, ValueError):
+            print(f"Warning: Could not read vector index at: {self.path}")
+            self._reset()
+    
+    def _stored_compressor(self, params: Dict[str, Any]) -> VectorCompressor:
+        """Rebuild the compressor recorded with the index"""
+        projection_path = self._file(self.PROJECTION_FILE)
+        projection = np.load(projection_path) if os.path.exists(projection_path) else None
+        return VectorCompressor(
+            self.dim,
+            params.get("quantization", "none"),
+            params.get("dimensions", 0),
+            params.get("reduction", "truncate"),
+            projection,
+            params.get("fitted_rows", 0)
+        )
+    
+    def _truncate_to_chunks(self) -> None:
+        """Make the vectors file and the chunks file agree after an interrupted write"""
+        vectors_path = self._data_file(self.VECTORS_FILE)
+        row_bytes = 4 * self.dim
+        stored_rows = os.path.getsize(vectors_path) // row_bytes if os.path.exists(vectors_path) else 0
+        
+        if stored_rows < len(self._chunks):
+            for entry in self._chunks[stored_rows:]:
+                if entry is not None:
+                    self._rows.pop(entry[0], None)
+            del self._chunks[stored_rows:]
+        
+        if os.path.exists(vectors_path) and os.path.getsize(vectors_path) != len(self._chunks) * row_bytes:
+            os.truncate(vectors_path, len(self._chunks) * row_bytes)
+    
+    def _append_row(self, chunk_id: str, text: str, metadata: Dict[str, Any]) -> None:
+        """Register a new row, superseding the row of the same chunk id; caller holds the lock"""
+        previous = self._rows.get(chunk_id)
+        if previous is not None:
+            self._chunks[previous] = None
+        
+        self._rows[chunk_id] = len(self._chunks)
+        self._chunks.append((chunk_id, text, metadata))
+    
+    def _append_codes(self, codes: np.ndarray, scales: Optional[np.ndarray]) -> None:
+        """Append the codes of new rows; caller holds the lock"""
+        with open(self._file(self.CODES_FILE), 'ab') as f:
+            f.write(codes.tobytes())
+        if scales is not None:
+            with open(self._file(self.SCALES_FILE), 'ab') as f:
+                f.write(scales.tobytes())
+    
+    def _encode_all(self, refit: bool = False) -> None:
+        """
+        Rewrite the codes of every row from the full vectors; caller holds the lock
+        
+        Args:
+            refit: Fit the principal components on the valid rows first
+        """
+        if refit:
+            self.compressor.fit(self._matrix[np.flatnonzero(self._valid)])
+        
+        for name in (self.CODES_FILE, self.SCALES_FILE, self.PROJECTION_FILE):
+            if os.path.exists(self._file(name)):
+                os.remove(self._file(name))
+        
+        if self.compressor.enabled:
+            for name in (self.CODES_FILE, self.SCALES_FILE):
+                open(self._file(name), 'wb').close()
+            for start in range(0, len(self._matrix), VectorCompressor.BLOCK_ROWS):
+                self._append_codes(*self.compressor.encode(self._matrix[start:start + VectorCompressor.BLOCK_ROWS]))
+        if self.compressor.projection is not None:
+            np.save(self._file(self.PROJECTION_FILE), self.compressor.projection)
+        
+        self._write_meta()
+        self._remap()
+    
+    def _remap(self) -> None:
+        """Map the index files again after rows were appended; caller holds the lock"""
+        count = len(self._chunks)
+        if count == 0 or self.dim is None:
+            self._matrix = np.zeros((0, self.dim or 0), dtype=np.float32)
+        else:
+            self._matrix = np.memmap(self._data_file(self.VECTORS_FILE), dtype=np.float32, mode='r', shape=(count, self.dim))
+        self._valid = np.array([entry is not None for entry in self._chunks], dtype=bool)
+        
+        self._codes, self._scales = None, None
+        if self.compressor is None or not self.compressor.enabled or count == 0:
+            return
+        
+        codes_path = self._file(self.CODES_FILE)
+        code_bytes = self.compressor.dimensions * self.compressor.code_dtype.itemsize
+        if not os.path.exists(codes_path) or os.path.getsize(codes_path) != count * code_bytes:
+            return
+        
+        self._codes = np.memmap(codes_path, dtype=self.compressor.code_dtype, mode='r', 
+                                shape=(count, self.compressor.dimensions))
+        if self.compressor.quantization == "int8":
+            scales_path = self._file(self.SCALES_FILE)
+            if not os.path.exists(scales_path) or os.path.getsize(scales_path) != count * 4:
+                self._codes = None
+                return
+            self._scales = np.memmap(scales_path, dtype=np.float32, mode='r', shape=(count,))
+    
+    def _compact(self) -> None:
+        """
+        Rewrite the index files without the deleted rows; caller holds the lock
+        
+        The vectors and chunks of the next generation are written next to the current
+        ones and committed together by recording the new generation in the meta file.
+        Codes are removed before the commit and re-encoded after it.
+        """
+        keep = np.flatnonzero(self._valid)
+        vectors = np.asarray(self._matrix[keep])
+        entries = [self._chunks[row] for row in keep]
+        generation = self.generation + 1
+        
+        vectors.tofile(self._data_file(self.VECTORS_FILE, generation))
+        with open(self._data_file(self.CHUNKS_FILE, generation), 'w') as f:
+            for chunk_id, text, metadata in entries:
+                f.write(json.dumps({"id": chunk_id, "text": text, "metadata": metadata}) + "\n")
+        
+        self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+        self._codes, self._scales = None, None
+        for name in (self.CODES_FILE, self.SCALES_FILE):
+            if os.path.exists(self._file(name)):
+                os.remove(self._file(name))
+        
+        self.generation = generation
+        self._write_meta()
+        self._remove_other_generations()
+        
+        self._chunks = list(entries)
+        self._rows = {chunk_id: row for row, (chunk_id, _, _) in enumerate(entries)}
+        self._remap()
+        if self.compressor.enabled:
+            self._encode_all()
+    
+    def _write_meta(self) -> None:
+        """Record the index parameters; caller holds the lock"""
+        os.makedirs(self.path, exist_ok=True)
+        meta = {
+            "dim": self.dim,
+            "dtype": "float32",
+            "metric": "cosine",
+            "generation": self.generation,
+            "compression": self.compressor.params()
+        }
+        tmp_path = self._file(f"{self.META_FILE}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._file(self.META_FILE))
+    
+    def _reset(self) -> None:
+        """Empty the in-memory index"""
+        # Entries of _chunks are never changed in place once searches can see the list:
+        # new rows are appended, anything else builds a new list and swaps it in
+        self._chunks: List[Optional[Tuple[str, str, Dict[str, Any]]]] = []
+        self._rows: Dict[str, int] = {}
+        self._valid = np.zeros(0, dtype=bool)
+        self._matrix = np.zeros((0, self.dim or 0), dtype=np.float32)
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self.generation = 0
+    
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+    
+    def _data_file(self, name: str, generation: Optional[int] = None) -> str:
+        """Get the path of the vectors or chunks file of a generation, the current one by default"""
+        generation = self.generation if generation is None else generation
+        if generation == 0:
+            return self._file(name)
+        stem, extension = os.path.splitext(name)
+        return self._file(f"{stem}.{generation}{extension}")
+    
+    def _remove_other_generations(self) -> None:
+        """Delete vectors and chunks files not of the current generation, left by a finished or interrupted compaction"""
+        current = {os.path.basename(self._data_file(name)) for name in (self.VECTORS_FILE, self.CHUNKS_FILE)}
+        stems = tuple(f"{os.path.splitext(name)[0]}." for name in (self.VECTORS_FILE, self.CHUNKS_FILE))
+        extensions = tuple(os.path.splitext(name)[1] for name in (self.VECTORS_FILE, self.CHUNKS_FILE))
+        for name in os.listdir(self.path):
+            if name.startswith(stems) and name.endswith(extensions) and name not in current:
+                os.remove(self._file(name))
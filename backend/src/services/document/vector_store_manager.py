@@ -1,9 +1,20 @@
 import os
+import uuid
 import shutil
-from typing import List, Optional
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
 from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
+
+from src.config.settings import settings
+from src.utils.lru_cache import LRUCache
+from .embedding_batcher import EmbeddingBatcher
+from .retrieval_diversity import maximal_marginal_relevance, collapse_neighbor_chunks
+from .lexical_index import BM25Index, reciprocal_rank_fusion
+from .vector_backends import VectorBackend, get_backend_class
 
 
 class VectorStoreManager:
@@ -11,27 +22,58 @@ class VectorStoreManager:
     Manages vector store operations for document embeddings
     """
     
-    def __init__(self, vector_store_path: str, embedding_model_name: str):
+    RETRIEVAL_MODES = ("dense", "lexical", "hybrid")
+    
+    def __init__(self, 
+                 vector_store_path: str, 
+                 embedding_model_name: str,
+                 embeddings: Optional[Embeddings] = None,
+                 retrieval_workers: Optional[int] = None,
+                 vector_backend: Optional[str] = None):
         """
         Initialize the vector store manager
         
         Args:
             vector_store_path: Path to store the vector database
             embedding_model_name: Name of the embedding model to use
+            embeddings: Already loaded embeddings to share instead of loading the model again
+            retrieval_workers: Threads running async queries; defaults to settings.RETRIEVAL_WORKERS
+            vector_backend: Name of the vector backend; defaults to settings.VECTOR_BACKEND
+        
+        Raises:
+            ValueError: If the vector backend is unknown
         """
         self.vector_store_path = vector_store_path
-        self.embeddings = HuggingFaceEmbeddings(model_name=embedding_model_name)
+        self.embedding_model_name = embedding_model_name
+        self.embeddings = embeddings or HuggingFaceEmbeddings(model_name=embedding_model_name)
+        self.backend_class = get_backend_class(vector_backend or settings.VECTOR_BACKEND)
         self._vector_store_cache = None
+        self.index_version = 0
+        self._version_lock = threading.Lock()
+        self.query_embedding_cache = LRUCache(settings.QUERY_EMBEDDING_CACHE_SIZE)
+        self.retrieval_cache = LRUCache(settings.RETRIEVAL_CACHE_SIZE)
+        self._retrieval_executor = ThreadPoolExecutor(
+            max_workers=retrieval_workers or settings.RETRIEVAL_WORKERS,
+            thread_name_prefix="retrieval"
+        )
+        self.query_batcher = EmbeddingBatcher(
+            embed_batch=self._embed_query_batch,
+            executor=self._retrieval_executor
+        )
+        self.lexical_index = BM25Index(os.path.join(vector_store_path, "bm25_index.json"))
     
-    def create_vector_store(self, documents: List[Document]) -> Optional[Chroma]:
+    def create_vector_store(self, 
+                            documents: List[Document], 
+                            ids: Optional[List[str]] = None) -> Optional[VectorBackend]:
         """
         Create a vector store from processed documents
         
         Args:
             documents: List of processed document chunks
+            ids: Optional ids of the chunks, used to delete them later
             
         Returns:
-            Chroma vector store or None if creation fails
+            Vector backend or None if creation fails
         """
         if not documents:
             print("No documents provided for vector store creation")
@@ -42,15 +84,17 @@ class VectorStoreManager:
             
             os.makedirs(self.vector_store_path, exist_ok=True)
             
-            print(f"Creating Chroma vector store at: {self.vector_store_path}")
+            print(f"Creating {self.backend_class.__name__} vector store at: {self.vector_store_path}")
             
-            vector_store = Chroma.from_documents(
-                documents=documents,
-                embedding=self.embeddings,
-                persist_directory=self.vector_store_path
-            )
+            ids = ids or self._new_ids(documents)
+            vector_store = self.backend_class.create(self.vector_store_path, self.embeddings, documents, ids)
+            
+            self.lexical_index.clear()
+            self.lexical_index.add(documents, ids)
+            self.lexical_index.save()
             
             self._vector_store_cache = vector_store
+            self._bump_index_version()
             print("Vector store created successfully")
             
             return vector_store
@@ -59,24 +103,26 @@ class VectorStoreManager:
             print(f"Error creating vector store: {str(e)}")
             raise e
     
-    def load_vector_store(self) -> Optional[Chroma]:
+    def load_vector_store(self, create_if_missing: bool = False) -> Optional[VectorBackend]:
         """
         Load the vector store from disk or cache
         
+        Args:
+            create_if_missing: Create an empty vector store if none exists yet
+            
         Returns:
-            Chroma vector store or None if it doesn't exist
+            Vector backend or None if it doesn't exist
         """
         if self._vector_store_cache is not None:
             return self._vector_store_cache
         
-        if not self._vector_store_exists():
+        if not self._vector_store_exists() and not create_if_missing:
             return None
         
         try:
-            vector_store = Chroma(
-                persist_directory=self.vector_store_path,
-                embedding_function=self.embeddings
-            )
+            os.makedirs(self.vector_store_path, exist_ok=True)
+            
+            vector_store = self.backend_class(self.vector_store_path, self.embeddings)
             
             self._vector_store_cache = vector_store
             print("Loaded persistent vector store")
@@ -86,12 +132,15 @@ class VectorStoreManager:
             print(f"Error loading vector store: {str(e)}")
             return None
     
-    def add_documents_to_existing_store(self, new_documents: List[Document]) -> bool:
+    def add_documents_to_existing_store(self, 
+                                        new_documents: List[Document],
+                                        ids: Optional[List[str]] = None) -> bool:
         """
         Add new documents to existing vector store
         
         Args:
             new_documents: List of new document chunks to add
+            ids: Optional ids of the chunks, used to delete them later
             
         Returns:
             True if successful, False otherwise
@@ -101,35 +150,373 @@ class VectorStoreManager:
             return False
         
         try:
-            vector_store.add_documents(new_documents)
+            ids = ids or self._new_ids(new_documents)
+            vector_store.add(new_documents, ids)
+            self.lexical_index.add(new_documents, ids)
             print(f"Added {len(new_documents)} documents to existing vector store")
             return True
         except Exception as e:
             print(f"Error adding documents to vector store: {str(e)}")
             return False
+        finally:
+            self._bump_index_version()
     
-    def query_vector_store(self, query: str, k: int = 5) -> List[Document]:
+    def delete_documents(self, ids: List[str]) -> bool:
+        """
+        Delete document chunks from the vector store
+        
+        Args:
+            ids: Ids of the chunks to delete
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if not ids:
+            return True
+        
+        vector_store = self.load_vector_store()
+        if not vector_store:
+            return False
+        
+        try:
+            vector_store.delete(ids)
+            self.lexical_index.delete(ids)
+            print(f"Deleted {len(ids)} documents from vector store")
+            return True
+        except Exception as e:
+            print(f"Error deleting documents from vector store: {str(e)}")
+            return False
+        finally:
+            self._bump_index_version()
+    
+    def reset_vector_store(self) -> None:
+        """Remove the persisted vector store and drop the cached handle"""
+        self._cleanup_existing_store()
+        self.lexical_index.clear()
+        self._bump_index_version()
+    
+    def _bump_index_version(self) -> None:
+        """Mark the indexed content as changed so caches derived from it are invalidated"""
+        with self._version_lock:
+            self.index_version += 1
+    
+    def vector_store_exists(self) -> bool:
+        """Check if a persisted vector store exists"""
+        return self._vector_store_exists()
+    
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """
+        Normalize a query for use in cache keys
+        
+        Args:
+            query: The query string
+            
+        Returns:
+            Query with surrounding whitespace stripped and inner whitespace collapsed
+        """
+        return " ".join(query.split())
+    
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Embed a query, reusing the vector of an identical recent query
+        
+        Args:
+            query: The query string
+            
+        Returns:
+            Embedding vector of the query
+        """
+        key = (self.embedding_model_name, self.normalize_query(query))
+        embedding = self.query_embedding_cache.get(key)
+        
+        if embedding is None:
+            embedding = self.embeddings.embed_query(key[1])
+            self.query_embedding_cache.set(key, embedding)
+        
+        return embedding
+    
+    def query_vector_store(self, 
+                           query: str, 
+                           k: Optional[int] = None, 
+                           embedding: Optional[List[float]] = None,
+                           score_threshold: Optional[float] = None,
+                           mode: Optional[str] = None) -> List[Document]:
         """
         Query the vector store for relevant documents
         
+        In "dense" mode up to k chunks are searched with their relevance scores (cosine
+        similarity, higher is more relevant) and only those scoring at least score_threshold are
+        returned. When at least one chunk passes, the best settings.RETRIEVAL_MIN_K chunks
+        are always kept; when none passes, nothing is returned. Each chunk's score is stored
+        in its "relevance_score" metadata.
+        
+        With settings.RETRIEVAL_MMR enabled, settings.RETRIEVAL_MMR_FETCH_K candidates are
+        searched instead and diversified with maximal marginal relevance, and selected
+        chunks that are neighbors in the same file are merged into one passage.
+        
+        "lexical" mode searches the BM25 index only, and "hybrid" mode merges the dense and
+        lexical results with reciprocal rank fusion. BM25 scores have no comparable threshold,
+        so hybrid mode returns nothing when no dense result passes score_threshold, keeping
+        off-topic questions on the base prompt.
+        
+        Results are cached per (query, k, threshold, mode, index version), so a repeated query
+        is answered without searching again until the indexed content changes.
+        
         Args:
             query: The query string
-            k: Number of documents to retrieve
+            k: Maximum number of documents to retrieve; defaults to settings.RETRIEVAL_MAX_K
+            embedding: Precomputed embedding of the query; the query is embedded if omitted
+            score_threshold: Minimum relevance score; defaults to settings.RETRIEVAL_SCORE_THRESHOLD
+            mode: "dense", "lexical" or "hybrid"; defaults to settings.RETRIEVAL_MODE
             
         Returns:
-            List of relevant document chunks
+            List of relevant document chunks, most relevant first
+        
+        Raises:
+            ValueError: If the mode is unknown
         """
+        k, score_threshold, mode = self._retrieval_params(k, score_threshold, mode)
+        
+        cache_key = self._retrieval_cache_key(query, k, score_threshold, mode)
+        cached = self.retrieval_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+        
+        if mode == "lexical":
+            results = self.lexical_index.search(query, k)
+            self.retrieval_cache.set(cache_key, list(results))
+            return results
+        
         vector_store = self.load_vector_store()
         if not vector_store:
             print("No vector store available for querying")
             return []
         
         try:
-            results = vector_store.similarity_search(query, k=k)
-            return results
+            if embedding is None:
+                embedding = self.embed_query(query)
+            results = self._search_dense(vector_store, embedding, k, score_threshold)
+            if mode == "hybrid" and results:
+                results = reciprocal_rank_fusion([results, self.lexical_index.search(query, k)], k)
         except Exception as e:
             print(f"Error querying vector store: {str(e)}")
             return []
+        
+        self.retrieval_cache.set(cache_key, list(results))
+        return results
+    
+    async def aquery_vector_store(self, 
+                                  query: str, 
+                                  k: Optional[int] = None, 
+                                  embedding: Optional[List[float]] = None,
+                                  score_threshold: Optional[float] = None,
+                                  mode: Optional[str] = None) -> List[Document]:
+        """
+        Query the vector store on the retrieval thread pool, keeping the query
+        embedding and similarity search off the event loop
+        
+        Lexical-only queries are answered directly from the in-memory BM25 index.
+        
+        Args:
+            query: The query string
+            k: Maximum number of documents to retrieve; defaults to settings.RETRIEVAL_MAX_K
+            embedding: Precomputed embedding of the query; the query is embedded if omitted
+            score_threshold: Minimum relevance score; defaults to settings.RETRIEVAL_SCORE_THRESHOLD
+            mode: "dense", "lexical" or "hybrid"; defaults to settings.RETRIEVAL_MODE
+            
+        Returns:
+            List of relevant document chunks, most relevant first
+        
+        Raises:
+            ValueError: If the mode is unknown
+        """
+        k, score_threshold, mode = self._retrieval_params(k, score_threshold, mode)
+        
+        if mode == "lexical":
+            return self.query_vector_store(query, k, None, score_threshold, mode)
+        
+        cached = self.retrieval_cache.get(self._retrieval_cache_key(query, k, score_threshold, mode))
+        if cached is not None:
+            return list(cached)
+        
+        if embedding is None:
+            embedding = await self.aembed_query(query)
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._retrieval_executor, 
+            self.query_vector_store, 
+            query, k, embedding, score_threshold, mode
+        )
+    
+    def rebuild_lexical_index(self, page_size: int = 5000) -> int:
+        """
+        Rebuild the BM25 index from the chunks stored in the vector store
+        
+        Args:
+            page_size: Number of chunks read from the vector store at a time
+            
+        Returns:
+            Number of chunks indexed
+        """
+        vector_store = self.load_vector_store()
+        self.lexical_index.clear()
+        
+        count = 0
+        if vector_store:
+            for ids, documents in vector_store.iter_documents(page_size):
+                self.lexical_index.add(documents, ids)
+                count += len(ids)
+        
+        self.lexical_index.save()
+        self._bump_index_version()
+        print(f"Rebuilt lexical index with {count} chunks")
+        return count
+    
+    def _search_dense(self, 
+                      vector_store: VectorBackend, 
+                      embedding: List[float], 
+                      k: int, 
+                      score_threshold: float) -> List[Document]:
+        """Search the vector store by embedding, keeping the chunks passing the relevance threshold"""
+        if settings.RETRIEVAL_MMR:
+            return self._search_mmr(vector_store, embedding, k, score_threshold)
+        
+        return self.select_relevant(vector_store.search(embedding, k), score_threshold, settings.RETRIEVAL_MIN_K)
+    
+    def _retrieval_params(self, 
+                          k: Optional[int], 
+                          score_threshold: Optional[float], 
+                          mode: Optional[str]) -> Tuple[int, float, str]:
+        """Apply the retrieval defaults from the settings and validate the mode"""
+        k = k or settings.RETRIEVAL_MAX_K
+        score_threshold = settings.RETRIEVAL_SCORE_THRESHOLD if score_threshold is None else score_threshold
+        mode = mode or settings.RETRIEVAL_MODE
+        
+        if mode not in self.RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {mode}. Use one of: {', '.join(self.RETRIEVAL_MODES)}")
+        
+        return k, score_threshold, mode
+    
+    def _search_mmr(self, 
+                    vector_store: VectorBackend, 
+                    embedding: List[float], 
+                    k: int, 
+                    score_threshold: float) -> List[Document]:
+        """
+        Search a larger candidate set and pick a diverse subset of the relevant candidates
+        
+        Args:
+            vector_store: Vector store to search
+            embedding: Embedding of the query
+            k: Maximum number of chunks to select
+            score_threshold: Minimum relevance score of a candidate
+            
+        Returns:
+            Selected chunks with neighbor chunks merged, most relevant first
+        """
+        scored, embeddings = vector_store.search_with_embeddings(embedding, max(settings.RETRIEVAL_MMR_FETCH_K, k))
+        
+        candidates = self.select_relevant(scored, score_threshold, settings.RETRIEVAL_MIN_K)
+        selected = maximal_marginal_relevance(
+            embedding, 
+            embeddings[:len(candidates)], 
+            k, 
+            settings.RETRIEVAL_MMR_LAMBDA
+        )
+        
+        return collapse_neighbor_chunks([candidates[i] for i in selected])
+    
+    @staticmethod
+    def select_relevant(scored: List[Tuple[Document, float]], 
+                        score_threshold: float, 
+                        min_k: int) -> List[Document]:
+        """
+        Keep the search results that pass the relevance threshold
+        
+        Args:
+            scored: (document, relevance score) pairs, most relevant first
+            score_threshold: Minimum relevance score
+            min_k: Number of top results kept whenever at least one passes the threshold
+            
+        Returns:
+            The kept documents, with their score in the "relevance_score" metadata
+        """
+        passing = sum(1 for _, score in scored if score >= score_threshold)
+        if passing == 0:
+            return []
+        
+        kept = scored[:max(passing, min_k)]
+        for doc, score in kept:
+            doc.metadata["relevance_score"] = round(float(score), 4)
+        return [doc for doc, _ in kept]
+    
+    async def aembed_query(self, query: str) -> List[float]:
+        """
+        Embed a query without blocking the event loop
+        
+        Concurrent queries are micro-batched into a single model call on the retrieval thread pool.
+        
+        Args:
+            query: The query string
+            
+        Returns:
+            Embedding vector of the query
+        """
+        key = (self.embedding_model_name, self.normalize_query(query))
+        embedding = self.query_embedding_cache.get(key)
+        
+        if embedding is None:
+            embedding = await self.query_batcher.embed(key[1])
+            self.query_embedding_cache.set(key, embedding)
+        
+        return embedding
+    
+    async def aembed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embed many queries in one model call on the retrieval thread pool
+        
+        Args:
+            queries: The query strings
+            
+        Returns:
+            Embedding vectors in the same order as the queries
+        """
+        keys = [(self.embedding_model_name, self.normalize_query(query)) for query in queries]
+        embeddings = {key: self.query_embedding_cache.get(key) for key in dict.fromkeys(keys)}
+        missing = [key for key, embedding in embeddings.items() if embedding is None]
+        
+        if missing:
+            loop = asyncio.get_running_loop()
+            vectors = await loop.run_in_executor(
+                self._retrieval_executor, 
+                self._embed_query_batch, 
+                [text for _, text in missing]
+            )
+            for key, vector in zip(missing, vectors):
+                embeddings[key] = vector
+                self.query_embedding_cache.set(key, vector)
+        
+        return [embeddings[key] for key in keys]
+    
+    def _embed_query_batch(self, queries: List[str]) -> List[List[float]]:
+        """Embed several queries at once, in one model call when the embeddings support it"""
+        embed_queries = getattr(self.embeddings, "embed_queries", None)
+        if callable(embed_queries):
+            return embed_queries(queries)
+        return [self.embeddings.embed_query(query) for query in queries]
+    
+    def _retrieval_cache_key(self, query: str, k: int, score_threshold: float, mode: str) -> tuple:
+        """Build the retrieval cache key of a query against the current index version"""
+        return (self.normalize_query(query), k, score_threshold, mode, self.index_version)
+    
+    def close(self) -> None:
+        """Stop the retrieval thread pool, waiting for running queries, and persist the lexical index"""
+        self._retrieval_executor.shutdown(wait=True, cancel_futures=True)
+        self.lexical_index.save()
+        if self._vector_store_cache is not None:
+            self._vector_store_cache.close()
     
     def is_vector_store_outdated(self, document_folders: List[str]) -> bool:
         """
@@ -159,8 +546,17 @@ class VectorStoreManager:
         except Exception:
             return True
     
+    @staticmethod
+    def _new_ids(documents: List[Document]) -> List[str]:
+        """Generate ids for chunks added without one, so both indexes share them"""
+        return [str(uuid.uuid4()) for _ in documents]
+    
     def _cleanup_existing_store(self):
-        """Clean up existing vector store directory"""
+        """Close the cached handle, so the backend lets go of its files, and remove the vector store directory"""
+        if self._vector_store_cache is not None:
+            self._vector_store_cache.close()
+            self._vector_store_cache = None
+        
         if os.path.exists(self.vector_store_path):
             try:
                 shutil.rmtree(self.vector_store_path)
@@ -169,12 +565,8 @@ class VectorStoreManager:
                 print(f"Warning: Could not remove existing vector store: {e}")
     
     def _vector_store_exists(self) -> bool:
-        """Check if vector store exists and has content"""
-        if not os.path.exists(self.vector_store_path):
-            return False
-        
+        """Check if the configured backend has a persisted vector store"""
         try:
-            contents = os.listdir(self.vector_store_path)
-            return len(contents) > 0
+            return self.backend_class.exists(self.vector_store_path)
         except Exception:
             return False
\ No newline at end of file
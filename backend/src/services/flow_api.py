@@ -1,36 +1,80 @@
-from typing import Dict, Any, Optional, List
+import httpx
+from typing import Dict, Any, Optional, List, AsyncIterator
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 from src.config.settings import settings
 from src.utils.token_manager import TokenManager
+from src.utils.http_client import create_async_client
+from src.utils.context_packer import ContextPacker, PackedContext
 from src.config.prompts import PROMPTS
 
 class FlowAPIService:
     """
     Service to interact with CI&T Flow APIs using LangChain's ChatOpenAI
     """
-    def __init__(self):
-        self.token_manager = TokenManager()
+    def __init__(self, 
+                 http_client: Optional[httpx.AsyncClient] = None, 
+                 context_packer: Optional[ContextPacker] = None):
+        """
+        Initialize the Flow API service
+        
+        Args:
+            http_client: Shared pooled HTTP client; a new one is created if omitted
+            context_packer: Fits the context chunks into the token budget; a new one is created if omitted
+        """
+        self.http_client = http_client or create_async_client()
+        self.token_manager = TokenManager(http_client=self.http_client)
+        self.context_packer = context_packer or ContextPacker()
         self.chat_model = None
+        self._chat_model_token = None
     
     async def _get_chat_model(self):
         """
         Gets a ChatOpenAI instance with a valid token
         
+        The instance is reused across requests and only rebuilt when the token rotates;
+        every instance sends its requests through the shared pooled HTTP client.
+        
         Returns:
             ChatOpenAI instance configured with a valid token
         """
         token = await self.token_manager.get_valid_token()
         
-        return ChatOpenAI(
-            base_url=settings.FLOW_API_BASE_URL,
-            api_key=token,
-            model=settings.FLOW_MODEL,
-            default_headers={
-                "FlowAgent": settings.FLOW_AGENT,
-                "FlowTenant": settings.FLOW_TENANT,
-            }
-        )
+        if self.chat_model is None or token != self._chat_model_token:
+            self.chat_model = ChatOpenAI(
+                base_url=settings.FLOW_API_BASE_URL,
+                api_key=token,
+                model=settings.FLOW_MODEL,
+                default_headers={
+                    "FlowAgent": settings.FLOW_AGENT,
+                    "FlowTenant": settings.FLOW_TENANT,
+                },
+                http_async_client=self.http_client
+            )
+            self._chat_model_token = token
+        
+        return self.chat_model
+    
+    def start(self) -> None:
+        """Start renewing the Flow API token in the background"""
+        self.token_manager.start_background_refresh()
+    
+    async def aclose(self) -> None:
+        """Stop the token refresh and close the pooled HTTP client"""
+        await self.token_manager.stop_background_refresh()
+        await self.http_client.aclose()
+    
+    def pack_context(self, context_chunks: Optional[List[str]] = None) -> PackedContext:
+        """
+        Fit the context chunks into the context token budget
+        
+        Args:
+            context_chunks: Optional list of document chunks, most relevant first
+        
+        Returns:
+            PackedContext with the chunks that fit and the tokens used and dropped
+        """
+        return self.context_packer.pack(context_chunks or [])
     
     async def generate_response(self, 
                                message: str, 
@@ -40,30 +84,67 @@ class FlowAPIService:
         
         Args:
             message: The user's message
-            context_chunks: Optional list of document chunks to provide context
+            context_chunks: Optional list of document chunks to provide context, most relevant first
         
         Returns:
-            Dictionary containing the LLM response
+            Dictionary containing the LLM response and the token accounting of the context
         """
         try:
             chat_model = await self._get_chat_model()
+            packed = self.pack_context(context_chunks)
+            messages = self._build_messages(message, packed.chunks)
             
-            if context_chunks and len(context_chunks) > 0:
-                context_text = "\n\n".join(context_chunks)
-                system_content = PROMPTS["rag"].format(context=context_text)
-            else:
-                system_content = PROMPTS["base"]
-            
-            messages = [
-                SystemMessage(content=system_content),
-                HumanMessage(content=message)
-            ]
-            
-            response = chat_model.invoke(messages)
+            response = await chat_model.ainvoke(messages)
             
             return {
                 "status": "success",
                 "response": response.content,
+                "context_tokens": packed.stats(),
             }
         except Exception as e:
-            return {"status": "error", "message": f"Error generating response: {str(e)}"}
\ No newline at end of file
+            return {"status": "error", "message": f"Error generating response: {str(e)}"}
+    
+    async def stream_response(self, 
+                              message: str, 
+                              context_chunks: Optional[List[str]] = None,
+                              packed_context: Optional[PackedContext] = None) -> AsyncIterator[str]:
+        """
+        Stream a response from the CI&T Flow LLM token by token
+        
+        Args:
+            message: The user's message
+            context_chunks: Optional list of document chunks to provide context, most relevant first
+            packed_context: Result of pack_context for the chunks, if the caller already packed them
+        
+        Yields:
+            Pieces of the response text as they arrive
+        """
+        chat_model = await self._get_chat_model()
+        packed = packed_context or self.pack_context(context_chunks)
+        messages = self._build_messages(message, packed.chunks)
+        
+        async for chunk in chat_model.astream(messages):
+            if chunk.content:
+                yield chunk.content
+    
+    def _build_messages(self, message: str, context_chunks: Optional[List[str]] = None) -> List[Any]:
+        """
+        Build the prompt messages, using the RAG prompt when context is available
+        
+        Args:
+            message: The user's message
+            context_chunks: Optional list of document chunks to provide context
+        
+        Returns:
+            List of system and human messages
+        """
+        if context_chunks and len(context_chunks) > 0:
+            context_text = "\n\n".join(context_chunks)
+            system_content = PROMPTS["rag"].format(context=context_text)
+        else:
+            system_content = PROMPTS["base"]
+        
+        return [
+            SystemMessage(content=system_content),
+            HumanMessage(content=message)
+        ]
\ No newline at end of file
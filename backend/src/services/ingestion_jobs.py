@@ -0,0 +1,139 @@
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional
+
+from src.config.settings import settings
+
+
+class IngestionJobManager:
+    """
+    Runs document ingestion jobs on a bounded worker pool, off the event loop, and tracks their status
+    """
+    
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    
+    def __init__(self, max_workers: Optional[int] = None, history_size: Optional[int] = None):
+        """
+        Initialize the job manager
+        
+        Args:
+            max_workers: Number of ingestion worker threads; defaults to settings.UPLOAD_WORKERS
+            history_size: Number of finished jobs kept for status queries; defaults to settings.JOB_HISTORY_SIZE
+        """
+        self.history_size = history_size or settings.JOB_HISTORY_SIZE
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.UPLOAD_WORKERS,
+            thread_name_prefix="ingestion"
+        )
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def submit(self, func: Callable[..., Dict[str, Any]], *args, **info) -> Dict[str, Any]:
+        """
+        Queue an ingestion job
+        
+        Args:
+            func: Callable doing the work; returns a status dictionary, optionally with a "chunks"
+                count and a per-file "files" list
+            *args: Arguments passed to func
+            **info: Extra fields stored on the job, e.g. document_id and document_name
+        
+        Returns:
+            Snapshot of the queued job
+        """
+        job_id = str(uuid.uuid4())
+        job = {
+            **info,
+            "job_id": job_id,
+            "status": self.QUEUED,
+            "message": "Job queued",
+            "chunks": None,
+            "files": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "queued_seconds": None,
+            "processing_seconds": None,
+        }
+        
+        with self._lock:
+            self._jobs[job_id] = job
+            self._prune()
+            snapshot = dict(job)
+        
+        self._executor.submit(self._run, job_id, func, args)
+        return snapshot
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a snapshot of a job
+        
+        Args:
+            job_id: Id of the job
+        
+        Returns:
+            Job dictionary or None if the job is unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Count the tracked jobs by status
+        
+        Returns:
+            Dictionary mapping status to number of jobs
+        """
+        counts = {self.QUEUED: 0, self.RUNNING: 0, self.DONE: 0, self.FAILED: 0}
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+        return counts
+    
+    def shutdown(self) -> None:
+        """Stop accepting jobs, drop queued ones and wait for running ones"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+    
+    def _run(self, job_id: str, func: Callable[..., Dict[str, Any]], args: tuple) -> None:
+        """Execute a job and record its outcome"""
+        self._update(job_id, status=self.RUNNING, message="Job running", started_at=time.time())
+        
+        try:
+            result = func(*args)
+            status = self.FAILED if result.get("status") == "error" else self.DONE
+            message = result.get("message", "")
+            chunks = result.get("chunks")
+            files = result.get("files")
+        except Exception as e:
+            status, message, chunks, files = self.FAILED, f"Error processing job: {str(e)}", None, None
+        
+        self._update(job_id, status=status, message=message, chunks=chunks, files=files, finished_at=time.time())
+    
+    def _update(self, job_id: str, **fields) -> None:
+        """Update the fields of a job and derive its timings"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            
+            job.update(fields)
+            if job["started_at"] is not None:
+                job["queued_seconds"] = job["started_at"] - job["created_at"]
+            if job["finished_at"] is not None:
+                job["processing_seconds"] = job["finished_at"] - job["started_at"]
+    
+    def _prune(self) -> None:
+        """Drop the oldest finished jobs beyond the history size"""
+        finished = [
+            job_id for job_id, job in self._jobs.items()
+            if job["status"] in (self.DONE, self.FAILED)
+        ]
+        for job_id in finished[:max(0, len(self._jobs) - self.history_size)]:
+            del self._jobs[job_id]
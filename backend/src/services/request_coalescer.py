@@ -0,0 +1,132 @@
+import copy
+import asyncio
+from typing import Dict, Any, Hashable, Callable, Awaitable, AsyncIterator, List, Optional
+
+
+class _Broadcast:
+    """
+    Events of one in-flight stream, replayed to every subscriber from the start
+    """
+    
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.condition = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+
+
+class RequestCoalescer:
+    """
+    Shares the work of identical requests that are in flight at the same time
+    
+    The first request for a key runs the work; requests arriving with the same key
+    before it finishes wait for that result instead of doing the work again. The
+    work runs in its own task so a disconnecting client does not cancel it for the
+    others.
+    """
+    
+    def __init__(self):
+        self._pending: Dict[Hashable, asyncio.Task] = {}
+        self._streams: Dict[Hashable, _Broadcast] = {}
+        self.leaders = 0
+        self.followers = 0
+    
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run the work for a key, or join the identical run already in flight
+        
+        Args:
+            key: Identity of the request
+            factory: Called without arguments to start the work when nothing is in flight
+        
+        Returns:
+            A private copy of the result
+        """
+        task = self._pending.get(key)
+        
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(factory())
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        else:
+            self.followers += 1
+        
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result)
+    
+    async def stream(self, 
+                     key: Hashable, 
+                     factory: Callable[[], AsyncIterator[Dict[str, Any]]]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream the events for a key, or subscribe to the identical stream already in flight
+        
+        Subscribers that join late first receive every event produced so far.
+        
+        Args:
+            key: Identity of the request
+            factory: Called without arguments to start the event stream when nothing is in flight
+        
+        Yields:
+            Private copies of the stream's events
+        """
+        broadcast = self._streams.get(key)
+        
+        if broadcast is None:
+            self.leaders += 1
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            broadcast.task = asyncio.ensure_future(self._produce(key, broadcast, factory))
+        else:
+            self.followers += 1
+        
+        position = 0
+        while True:
+            async with broadcast.condition:
+                await broadcast.condition.wait_for(
+                    lambda: len(broadcast.events) > position or broadcast.done
+                )
+                events = broadcast.events[position:]
+                finished = broadcast.done
+            
+            for event in events:
+                yield copy.deepcopy(event)
+            position += len(events)
+            
+            if finished and position == len(broadcast.events):
+                if broadcast.error is not None:
+                    raise broadcast.error
+                return
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Count coalesced requests
+        
+        Returns:
+            Dictionary with the number of requests that did the work (leaders), requests
+            that shared another's work (followers) and requests currently in flight
+        """
+        return {
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "in_flight": len(self._pending) + len(self._streams),
+        }
+    
+    async def _produce(self, 
+                       key: Hashable, 
+                       broadcast: _Broadcast, 
+                       factory: Callable[[], AsyncIterator[Dict[str, Any]]]) -> None:
+        """Consume the source stream and publish its events to the subscribers"""
+        try:
+            async for event in factory():
+                async with broadcast.condition:
+                    broadcast.events.append(event)
+                    broadcast.condition.notify_all()
+        except Exception as e:
+            broadcast.error = e
+        finally:
+            self._streams.pop(key, None)
+            async with broadcast.condition:
+                broadcast.done = True
+                broadcast.condition.notify_all()
@@ -0,0 +1,156 @@
+"""
+Token-budgeted packing of retrieved chunks into the LLM prompt
+"""
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import tiktoken
+
+from src.config.settings import settings
+
+
+@lru_cache(maxsize=None)
+def _load_encoding(model_name: str) -> Optional[Any]:
+    """
+    Load the tokenizer of a model, falling back to cl100k_base for unknown models
+    
+    Args:
+        model_name: Name of the LLM
+    
+    Returns:
+        tiktoken encoding, or None if no encoding could be loaded
+    """
+    try:
+        try:
+            return tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        print(f"Warning: Could not load tokenizer for {model_name}, estimating token counts: {str(e)}")
+        return None
+
+
+@dataclass
+class PackedContext:
+    """
+    Chunks selected for the prompt and the token accounting of the selection
+    """
+    chunks: List[str] = field(default_factory=list)
+    tokens_used: int = 0
+    tokens_dropped: int = 0
+    chunks_truncated: int = 0
+    chunks_dropped: int = 0
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the token accounting reported in the response context
+        
+        Returns:
+            Dictionary with tokens used and dropped and chunks truncated and dropped
+        """
+        return {
+            "tokens_used": self.tokens_used,
+            "tokens_dropped": self.tokens_dropped,
+            "chunks_truncated": self.chunks_truncated,
+            "chunks_dropped": self.chunks_dropped,
+        }
+
+
+class ContextPacker:
+    """
+    Fills a token budget with retrieved chunks in relevance order
+    
+    Chunks are taken in the order given (most relevant first). A chunk that does
+    not fit is truncated to the remaining budget when enough of it is left to be
+    useful, and dropped otherwise, in which case smaller later chunks may still fit.
+    """
+    
+    SEPARATOR = "\n\n"
+    MIN_TRUNCATED_TOKENS = 64
+    CHARS_PER_TOKEN = 4
+    
+    def __init__(self,
+                 model_name: Optional[str] = None,
+                 token_budget: Optional[int] = None,
+                 encoding: Optional[Any] = None):
+        """
+        Initialize the context packer
+        
+        Args:
+            model_name: LLM whose tokenizer counts the tokens; defaults to settings.FLOW_MODEL
+            token_budget: Maximum context tokens, 0 disables the limit; defaults to settings.CONTEXT_TOKEN_BUDGET
+            encoding: Tokenizer with encode/decode; loaded for the model if omitted
+        """
+        self.model_name = model_name or settings.FLOW_MODEL
+        self.token_budget = settings.CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+        self.encoding = encoding if encoding is not None else _load_encoding(self.model_name)
+    
+    def count_tokens(self, text: str) -> int:
+        """
+        Count the tokens of a text
+        
+        Args:
+            text: Text to count
+        
+        Returns:
+            Number of tokens, estimated from the length if no tokenizer is available
+        """
+        if self.encoding is None:
+            return -(-len(text) // self.CHARS_PER_TOKEN)
+        return len(self.encoding.encode(text))
+    
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        Cut a text down to its first tokens
+        
+        Args:
+            text: Text to cut
+            max_tokens: Number of tokens to keep
+        
+        Returns:
+            The truncated text
+        """
+        if self.encoding is None:
+            return text[:max_tokens * self.CHARS_PER_TOKEN]
+        return self.encoding.decode(self.encoding.encode(text)[:max_tokens])
+    
+    def pack(self, chunks: List[str]) -> PackedContext:
+        """
+        Select the chunks that fit the token budget
+        
+        Args:
+            chunks: Retrieved chunks, most relevant first
+        
+        Returns:
+            PackedContext with the selected chunks and the tokens used and dropped
+        """
+        packed = PackedContext()
+        counts = [self.count_tokens(chunk) for chunk in chunks]
+        
+        if self.token_budget <= 0:
+            packed.chunks = list(chunks)
+            packed.tokens_used = sum(counts)
+            return packed
+        
+        separator_tokens = self.count_tokens(self.SEPARATOR)
+        remaining = self.token_budget
+        
+        for chunk, tokens in zip(chunks, counts):
+            available = remaining - (separator_tokens if packed.chunks else 0)
+            
+            if tokens <= available:
+                packed.chunks.append(chunk)
+                packed.tokens_used += tokens
+                remaining = available - tokens
+            elif available >= self.MIN_TRUNCATED_TOKENS:
+                packed.chunks.append(self.truncate(chunk, available))
+                packed.tokens_used += available
+                packed.tokens_dropped += tokens - available
+                packed.chunks_truncated += 1
+                remaining = 0
+            else:
+                packed.tokens_dropped += tokens
+                packed.chunks_dropped += 1
+        
+        return packed
@@ -0,0 +1,27 @@
+"""
+Factory for the pooled HTTP client shared by the Flow API calls
+"""
+import httpx
+from src.config.settings import settings
+
+
+def create_async_client() -> httpx.AsyncClient:
+    """
+    Create a long-lived HTTP client with keep-alive connection pooling
+    
+    The client is meant to be created once per application lifespan and shared,
+    so requests to the Flow API reuse open connections instead of paying a new
+    TCP and TLS handshake every time.
+    
+    Returns:
+        httpx.AsyncClient configured from the Flow HTTP client settings
+    """
+    return httpx.AsyncClient(
+        http2=settings.FLOW_HTTP2,
+        limits=httpx.Limits(
+            max_connections=settings.FLOW_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.FLOW_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.FLOW_KEEPALIVE_EXPIRY
+        ),
+        timeout=settings.FLOW_HTTP_TIMEOUT
+    )
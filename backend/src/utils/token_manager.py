@@ -1,9 +1,9 @@
 import os
 import json
 import time
+import asyncio
 import httpx
 import jwt
-from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 from src.config.settings import settings
 
@@ -11,7 +11,14 @@ class TokenManager:
     """
     Manages the access token for the Flow API, checking its validity and updating it when necessary.
     """
-    def __init__(self):
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        """
+        Initialize the token manager
+        
+        Args:
+            http_client: Shared pooled HTTP client; a short-lived client is used per request if omitted
+        """
+        self.http_client = http_client
         self.token_file_path = os.path.join(os.path.dirname(__file__), '..', '..', '.flow_token.json')
         self.client_id = settings.FLOW_CLIENT_ID
         self.client_secret = settings.FLOW_CLIENT_SECRET
@@ -20,6 +27,15 @@ class TokenManager:
         self.app_to_access = "llm-api"
         
         self.expiry_buffer = 300
+        self.refresh_lead = 60
+        self.retry_delay = 30
+        
+        self._token_data: Optional[Dict[str, Any]] = None
+        self._expires_at = 0.0
+        self._failed_until = 0.0
+        self._refreshing = False
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
     
     def _read_token_file(self) -> Optional[Dict[str, Any]]:
         """
@@ -47,30 +63,61 @@ class TokenManager:
         with open(self.token_file_path, 'w') as f:
             json.dump(token_data, f)
     
-    def _is_token_valid(self, token_data: Dict[str, Any]) -> bool:
+    def _token_expiry(self, token_data: Optional[Dict[str, Any]]) -> float:
         """
-        Checks if the token is still valid
+        Decodes the expiry time of a token
         
         Args:
             token_data: Dictionary containing token information
             
         Returns:
-            True if token is valid and not about to expire, False otherwise
+            Expiry as a UNIX timestamp, 0 if the token is missing or invalid
         """
         if not token_data or 'access_token' not in token_data:
-            return False
+            return 0.0
         
         try:
             token = token_data['access_token']
             decoded = jwt.decode(token, options={"verify_signature": False})
+            return float(decoded.get('exp', 0))
             
-            exp_time = decoded.get('exp', 0)
-            current_time = time.time()
-            
-            return exp_time > current_time + self.expiry_buffer
-            
-        except (jwt.PyJWTError, KeyError):
-            return False
+        except (jwt.PyJWTError, KeyError, TypeError, ValueError):
+            return 0.0
+    
+    def _set_token(self, token_data: Dict[str, Any]) -> None:
+        """
+        Keeps a token and its decoded expiry in memory
+        
+        Args:
+            token_data: Dictionary containing token information
+        """
+        self._token_data = token_data
+        self._expires_at = self._token_expiry(token_data)
+    
+    def _has_fresh_token(self) -> bool:
+        """Checks the in-memory token without touching the file or decoding it again"""
+        return self._token_data is not None and self._expires_at > time.time() + self.expiry_buffer
+    
+    def _servable_token(self) -> Optional[str]:
+        """
+        Gets the in-memory token if it can be served without waiting on the auth server
+        
+        A token inside the expiry buffer is still served while another caller or the
+        background task is renewing it. After a failed refresh the existing token is served
+        until retry_delay has passed, so concurrent requests do not retry one after another.
+        
+        Returns:
+            The access token, or None if the caller has to refresh it
+        """
+        if not self._token_data or 'access_token' not in self._token_data:
+            return None
+        
+        now = time.time()
+        if self._expires_at > now + self.expiry_buffer or now < self._failed_until:
+            return self._token_data['access_token']
+        if self._expires_at > now and self._refreshing:
+            return self._token_data['access_token']
+        return None
     
     async def _fetch_new_token(self) -> Dict[str, Any]:
         """
@@ -94,40 +141,125 @@ class TokenManager:
             "appToAccess": self.app_to_access
         }
         
+        if self.http_client is not None:
+            return await self._post_token_request(self.http_client, headers, payload)
+        
         async with httpx.AsyncClient() as client:
-            response = await client.post(
-                self.token_url,
-                headers=headers,
-                json=payload,
-                timeout=30.0
-            )
-            
-            response.raise_for_status()
-            return response.json()
+            return await self._post_token_request(client, headers, payload)
+    
+    async def _post_token_request(self, 
+                                  client: httpx.AsyncClient, 
+                                  headers: Dict[str, str], 
+                                  payload: Dict[str, str]) -> Dict[str, Any]:
+        """Send the token request with the given client"""
+        response = await client.post(
+            self.token_url,
+            headers=headers,
+            json=payload,
+            timeout=30.0
+        )
+        
+        response.raise_for_status()
+        return response.json()
     
     async def get_valid_token(self) -> str:
         """
         Returns a valid access token, renewing it if necessary
         
+        The token is served from memory; the token file is only read on a cold start.
+        Callers only wait for a refresh when the token has expired, or when it is about to
+        expire and nothing else is renewing it; concurrent callers share a single refresh.
+        
         Returns:
             String containing the access token
             
         Raises:
             Exception: If unable to obtain a valid token
         """
-        token_data = self._read_token_file()
+        token = self._servable_token()
+        if token is not None:
+            return token
+        
+        async with self._lock:
+            if self._token_data is None:
+                token_data = self._read_token_file()
+                if token_data:
+                    self._set_token(token_data)
+            
+            token = self._servable_token()
+            if token is not None:
+                return token
+            if time.time() < self._failed_until:
+                raise Exception("Could not obtain a valid token")
+            
+            await self._refresh_token()
+            return self._token_data['access_token']
+    
+    async def _refresh_token(self) -> None:
+        """
+        Fetches a new token and stores it in memory and in the token file; caller holds the lock
         
-        if not self._is_token_valid(token_data):
-            print("Token expired or invalid. Fetching new token...")
+        A failure is remembered for retry_delay seconds, during which the existing token is
+        served without calling the auth server again.
+        
+        Raises:
+            Exception: If no token could be fetched and no previous token is available
+        """
+        print("Token expired or invalid. Fetching new token...")
+        self._refreshing = True
+        try:
+            token_data = await self._fetch_new_token()
+            self._write_token_file(token_data)
+            self._set_token(token_data)
+            self._failed_until = 0.0
+            print("New token successfully obtained!")
+        except Exception as e:
+            print(f"Error fetching new token: {str(e)}")
+            self._failed_until = time.time() + self.retry_delay
+            if self._token_data and 'access_token' in self._token_data:
+                print("Using existing token, even though it may be expired")
+            else:
+                raise Exception("Could not obtain a valid token")
+        finally:
+            self._refreshing = False
+    
+    def start_background_refresh(self) -> None:
+        """
+        Start renewing the token ahead of its expiry so requests never wait on the auth round trip
+        
+        Does nothing when no client credentials are configured.
+        """
+        if not self.client_id or not self.client_secret:
+            return
+        
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+    
+    async def stop_background_refresh(self) -> None:
+        """Stop the background refresh task"""
+        if self._refresh_task is None:
+            return
+        
+        self._refresh_task.cancel()
+        try:
+            await self._refresh_task
+        except asyncio.CancelledError:
+            pass
+        self._refresh_task = None
+    
+    async def _refresh_loop(self) -> None:
+        """Sleep until shortly before the expiry buffer is reached, then renew the token"""
+        while True:
             try:
-                token_data = await self._fetch_new_token()
-                self._write_token_file(token_data)
-                print("New token successfully obtained!")
+                await self.get_valid_token()
+                delay = self._expires_at - self.expiry_buffer - self.refresh_lead - time.time()
+                await asyncio.sleep(max(delay, self.retry_delay))
+                
+                async with self._lock:
+                    await self._refresh_token()
+                    
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                print(f"Error fetching new token: {str(e)}")
-                if token_data and 'access_token' in token_data:
-                    print("Using existing token, even though it may be expired")
-                else:
-                    raise Exception("Could not obtain a valid token")
-        
-        return token_data['access_token']
\ No newline at end of file
+                print(f"Background token refresh failed: {str(e)}")
+                await asyncio.sleep(self.retry_delay)
@@ -9,7 +9,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 from fastapi.testclient import TestClient
 from src.main import app
-from src.services.document_service import DocumentService
+from src.api.dependencies import get_chatbot_service, get_document_service, get_job_manager
 from src.services.flow_api import FlowAPIService
 
 @pytest.fixture
@@ -32,12 +32,33 @@ def mock_flow_api():
 @pytest.fixture
 def mock_document_service():
     """
-    Creates a mock of the DocumentService
+    Creates a mock of the DocumentService injected into the API routes
     """
-    with patch('src.services.document_service.DocumentService') as mock:
-        mock_instance = MagicMock()
-        mock.return_value = mock_instance
-        yield mock_instance
+    mock_instance = MagicMock()
+    app.dependency_overrides[get_document_service] = lambda: mock_instance
+    yield mock_instance
+    app.dependency_overrides.pop(get_document_service, None)
+
+@pytest.fixture
+def mock_job_manager():
+    """
+    Creates a mock of the IngestionJobManager injected into the API routes
+    """
+    mock_instance = MagicMock()
+    mock_instance.submit.return_value = {"job_id": "test-job", "status": "queued"}
+    app.dependency_overrides[get_job_manager] = lambda: mock_instance
+    yield mock_instance
+    app.dependency_overrides.pop(get_job_manager, None)
+
+@pytest.fixture
+def mock_chatbot_service():
+    """
+    Creates a mock of the ChatbotService injected into the API routes
+    """
+    mock_instance = MagicMock()
+    app.dependency_overrides[get_chatbot_service] = lambda: mock_instance
+    yield mock_instance
+    app.dependency_overrides.pop(get_chatbot_service, None)
 
 @pytest.fixture
 def temp_docs_dir():
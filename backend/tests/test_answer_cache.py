@@ -0,0 +1,101 @@
+import pytest
+from unittest.mock import patch
+from langchain.schema import Document
+from src.services.answer_cache import SemanticAnswerCache
+
+RESPONSE = {"status": "success", "response": "AI is..."}
+
+class TestSemanticAnswerCache:
+    
+    @pytest.fixture
+    def cache(self):
+        return SemanticAnswerCache(max_entries=2, ttl_seconds=60, similarity_threshold=0.9)
+    
+    def test_similar_question_hits(self, cache):
+        """Tests that a near-duplicate question with the same context reuses the answer"""
+        # Arrange
+        cache.store([1.0, 0.0, 0.0], "ctx", 1, RESPONSE, latency_seconds=2.5)
+        
+        # Act
+        result = cache.lookup([0.98, 0.1, 0.0], "ctx", 1)
+        
+        # Assert
+        assert result == RESPONSE
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["saved_seconds"] == 2.5
+    
+    def test_dissimilar_question_or_context_misses(self, cache):
+        """Tests that different questions or different retrieved context do not hit"""
+        # Arrange
+        cache.store([1.0, 0.0, 0.0], "ctx", 1, RESPONSE, latency_seconds=2.5)
+        
+        # Act
+        different_question = cache.lookup([0.0, 1.0, 0.0], "ctx", 1)
+        different_context = cache.lookup([1.0, 0.0, 0.0], "other-ctx", 1)
+        
+        # Assert
+        assert different_question is None
+        assert different_context is None
+        assert cache.stats()["misses"] == 2
+    
+    def test_index_change_invalidates(self, cache):
+        """Tests that a newer index version drops every cached answer"""
+        # Arrange
+        cache.store([1.0, 0.0, 0.0], "ctx", 1, RESPONSE, latency_seconds=1.0)
+        
+        # Act
+        result = cache.lookup([1.0, 0.0, 0.0], "ctx", 2)
+        
+        # Assert
+        assert result is None
+        assert cache.stats()["entries"] == 0
+        assert cache.stats()["invalidations"] == 1
+    
+    def test_answer_from_stale_index_is_not_stored(self, cache):
+        """Tests that an answer generated before an index change is discarded"""
+        # Arrange
+        cache.lookup([1.0, 0.0, 0.0], "ctx", 2)
+        
+        # Act
+        cache.store([1.0, 0.0, 0.0], "ctx", 1, RESPONSE, latency_seconds=1.0)
+        
+        # Assert
+        assert cache.stats()["entries"] == 0
+    
+    def test_lru_eviction(self, cache):
+        """Tests that the least recently used answer is evicted first"""
+        # Arrange
+        cache.store([1.0, 0.0, 0.0], "a", 1, RESPONSE, latency_seconds=1.0)
+        cache.store([1.0, 0.0, 0.0], "b", 1, RESPONSE, latency_seconds=1.0)
+        cache.lookup([1.0, 0.0, 0.0], "a", 1)
+        
+        # Act
+        cache.store([1.0, 0.0, 0.0], "c", 1, RESPONSE, latency_seconds=1.0)
+        
+        # Assert
+        assert cache.lookup([1.0, 0.0, 0.0], "a", 1) is not None
+        assert cache.lookup([1.0, 0.0, 0.0], "b", 1) is None
+    
+    def test_ttl_expiry(self, cache):
+        """Tests that answers older than the TTL are not served"""
+        # Arrange
+        with patch('src.services.answer_cache.time.monotonic', return_value=1000.0):
+            cache.store([1.0, 0.0, 0.0], "ctx", 1, RESPONSE, latency_seconds=1.0)
+        
+        # Act
+        with patch('src.services.answer_cache.time.monotonic', return_value=1061.0):
+            result = cache.lookup([1.0, 0.0, 0.0], "ctx", 1)
+        
+        # Assert
+        assert result is None
+        assert cache.stats()["entries"] == 0
+    
+    def test_fingerprint_depends_on_content_and_order(self):
+        """Tests that the context fingerprint changes with the retrieved chunks"""
+        # Arrange
+        a, b = Document(page_content="A"), Document(page_content="B")
+        
+        # Act / Assert
+        assert SemanticAnswerCache.fingerprint([a, b]) == SemanticAnswerCache.fingerprint([Document(page_content="A"), b])
+        assert SemanticAnswerCache.fingerprint([a, b]) != SemanticAnswerCache.fingerprint([b, a])
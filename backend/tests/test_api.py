@@ -1,10 +1,10 @@
+import json
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
 from fastapi.testclient import TestClient
 
 class TestAPIEndpoints:
     
-    @patch('src.api.endpoints.chatbot_service')
     def test_chat_success(self, mock_chatbot_service, test_client):
         """Tests the chat endpoint with successful response"""
         # Arrange
@@ -29,9 +29,8 @@ class TestAPIEndpoints:
         assert data["status"] == "success"
         assert "Artificial Intelligence" in data["response"]
         assert data["context"]["num_docs_retrieved"] == 2
-        mock_chatbot_service.process_message.assert_called_once_with("What is Artificial Intelligence?")
+        mock_chatbot_service.process_message.assert_called_once_with("What is Artificial Intelligence?", retrieval_mode=None)
     
-    @patch('src.api.endpoints.chatbot_service')
     def test_chat_error(self, mock_chatbot_service, test_client):
         """Tests the chat endpoint with error response"""
         # Arrange
@@ -51,9 +50,9 @@ class TestAPIEndpoints:
         data = response.json()
         assert "detail" in data
         assert "API error" in data["detail"]
-        mock_chatbot_service.process_message.assert_called_once_with("What is Artificial Intelligence?")
+        mock_chatbot_service.process_message.assert_called_once_with("What is Artificial Intelligence?", retrieval_mode=None)
     
-    def test_chat_empty_message(self, test_client):
+    def test_chat_empty_message(self, mock_chatbot_service, test_client):
         """Tests the chat endpoint with empty message"""
         # Act
         response = test_client.post(
@@ -67,7 +66,7 @@ class TestAPIEndpoints:
         assert "detail" in data
         assert "Message cannot be empty" in data["detail"]
     
-    def test_chat_invalid_json(self, test_client):
+    def test_chat_invalid_json(self, mock_chatbot_service, test_client):
         """Tests the chat endpoint with invalid JSON"""
         # Act
         response = test_client.post(
@@ -79,7 +78,7 @@ class TestAPIEndpoints:
         # Assert
         assert response.status_code == 422  # Unprocessable Entity
     
-    def test_chat_missing_message(self, test_client):
+    def test_chat_missing_message(self, mock_chatbot_service, test_client):
         """Tests the chat endpoint with missing message field"""
         # Act
         response = test_client.post(
@@ -90,16 +89,109 @@ class TestAPIEndpoints:
         # Assert
         assert response.status_code == 422  # Unprocessable Entity
     
-    @patch('src.api.endpoints.document_service')
-    def test_upload_document_success(self, mock_document_service, test_client):
-        """Tests the document upload endpoint with successful response"""
+    def test_chat_batch(self, mock_chatbot_service, test_client):
+        """Tests the batch chat endpoint returning a result per message in input order"""
         # Arrange
-        mock_document_service.save_uploaded_document.return_value = {
+        mock_chatbot_service.process_batch = AsyncMock(return_value=[
+            {"status": "success", "response": "First answer", "context": {"num_docs_retrieved": 1}},
+            {"status": "success", "response": "Second answer"}
+        ])
+        
+        # Act
+        response = test_client.post(
+            "/api/chat/batch",
+            json={"messages": ["What is AI?", "", "What is ML?"]}
+        )
+        
+        # Assert
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "warning"
+        assert [r["index"] for r in data["results"]] == [0, 1, 2]
+        assert data["results"][0]["response"] == "First answer"
+        assert data["results"][1] == {
+            "index": 1, "status": "error", "response": None, "message": "Message cannot be empty", "context": None
+        }
+        assert data["results"][2]["response"] == "Second answer"
+        mock_chatbot_service.process_batch.assert_awaited_once_with(["What is AI?", "What is ML?"], retrieval_mode=None)
+    
+    def test_chat_batch_only_empty_messages(self, mock_chatbot_service, test_client):
+        """Tests that a batch of blank messages gets an error per message without reaching the chatbot"""
+        # Arrange
+        mock_chatbot_service.process_batch = AsyncMock()
+        
+        # Act
+        response = test_client.post("/api/chat/batch", json={"messages": ["", "   "]})
+        
+        # Assert
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "error"
+        assert [r["message"] for r in data["results"]] == ["Message cannot be empty"] * 2
+        mock_chatbot_service.process_batch.assert_not_called()
+    
+    def test_chat_batch_too_many_messages(self, mock_chatbot_service, test_client):
+        """Tests that oversized batches are rejected"""
+        # Act
+        with patch('src.api.endpoints.settings') as mock_settings:
+            mock_settings.BATCH_CHAT_MAX_MESSAGES = 2
+            response = test_client.post(
+                "/api/chat/batch",
+                json={"messages": ["a", "b", "c"]}
+            )
+        
+        # Assert
+        assert response.status_code == 400
+        mock_chatbot_service.process_batch.assert_not_called()
+    
+    def test_chat_retrieval_mode(self, mock_chatbot_service, test_client):
+        """Tests that the retrieval mode of a request is passed on and validated"""
+        # Arrange
+        mock_chatbot_service.process_message = AsyncMock(return_value={"status": "success", "response": "SKU-123 is..."})
+        
+        # Act
+        response = test_client.post("/api/chat", json={"message": "SKU-123", "retrieval_mode": "lexical"})
+        invalid = test_client.post("/api/chat", json={"message": "SKU-123", "retrieval_mode": "fuzzy"})
+        
+        # Assert
+        assert response.status_code == 200
+        assert invalid.status_code == 422
+        mock_chatbot_service.process_message.assert_called_once_with("SKU-123", retrieval_mode="lexical")
+    
+    def test_chat_stream(self, mock_chatbot_service, test_client):
+        """Tests the streaming chat endpoint sending events as server-sent events"""
+        # Arrange
+        async def fake_stream(message, retrieval_mode=None):
+            yield {"event": "context", "context": {"num_docs_retrieved": 1, "sources": [{"source": "ai.pdf", "page": 1}]}}
+            yield {"event": "token", "content": "AI is"}
+            yield {"event": "done", "status": "success"}
+        
+        mock_chatbot_service.stream_message = fake_stream
+        
+        # Act
+        response = test_client.post(
+            "/api/chat/stream",
+            json={"message": "What is Artificial Intelligence?"}
+        )
+        
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+        assert [lines[0] for lines in events] == ["event: context", "event: token", "event: done"]
+        assert json.loads(events[0][1][len("data: "):])["context"]["num_docs_retrieved"] == 1
+        assert json.loads(events[1][1][len("data: "):]) == {"content": "AI is"}
+    
+    def test_upload_document_success(self, mock_document_service, mock_job_manager, test_client):
+        """Tests the document upload endpoint accepting the file for background processing"""
+        # Arrange
+        mock_document_service.store_upload_stream = AsyncMock(return_value={
             "status": "success",
-            "message": "Document uploaded and processed successfully",
             "document_id": "test-uuid",
-            "document_name": "test.pdf"
-        }
+            "document_name": "test.pdf",
+            "file_path": "uploads/test-uuid.pdf",
+            "content_hash": "abc123"
+        })
         
         # Act
         with open("tests/test_api.py", "rb") as f:
@@ -111,21 +203,25 @@ class TestAPIEndpoints:
         )
         
         # Assert
-        assert response.status_code == 200
+        assert response.status_code == 202
         data = response.json()
-        assert data["status"] == "success"
+        assert data["status"] == "accepted"
         assert data["document_id"] == "test-uuid"
         assert data["document_name"] == "test.pdf"
-        mock_document_service.save_uploaded_document.assert_called_once()
+        assert data["job_id"] == "test-job"
+        mock_document_service.store_upload_stream.assert_awaited_once()
+        mock_job_manager.submit.assert_called_once()
+        args, kwargs = mock_job_manager.submit.call_args
+        assert args[0] == mock_document_service.index_uploaded_document
+        assert args[1:] == ("uploads/test-uuid.pdf", "test-uuid", "test.pdf", "abc123")
     
-    @patch('src.api.endpoints.document_service')
-    def test_upload_document_error(self, mock_document_service, test_client):
+    def test_upload_document_error(self, mock_document_service, mock_job_manager, test_client):
         """Tests the document upload endpoint with error response"""
         # Arrange
-        mock_document_service.save_uploaded_document.return_value = {
+        mock_document_service.store_upload_stream = AsyncMock(return_value={
             "status": "error",
             "message": "Error processing document"
-        }
+        })
         
         # Act
         with open("tests/test_api.py", "rb") as f:
@@ -141,9 +237,10 @@ class TestAPIEndpoints:
         data = response.json()
         assert data["status"] == "error"
         assert "Error processing document" in data["message"]
-        mock_document_service.save_uploaded_document.assert_called_once()
+        mock_document_service.store_upload_stream.assert_awaited_once()
+        mock_job_manager.submit.assert_not_called()
     
-    def test_upload_document_unsupported_type(self, test_client):
+    def test_upload_document_unsupported_type(self, mock_document_service, mock_job_manager, test_client):
         """Tests the document upload endpoint with unsupported file type"""
         # Act
         with open("tests/test_api.py", "rb") as f:
@@ -158,4 +255,96 @@ class TestAPIEndpoints:
         assert response.status_code == 415
         data = response.json()
         assert data["status"] == "error"
-        assert "Unsupported file type" in data["message"]
\ No newline at end of file
+        assert "Unsupported file type" in data["message"]
+    
+    def test_upload_documents_bulk(self, mock_document_service, mock_job_manager, test_client):
+        """Tests the bulk upload endpoint queuing one job for every new document"""
+        # Arrange
+        new_upload = {
+            "status": "success",
+            "document_id": "doc-1",
+            "document_name": "a.txt",
+            "file_path": "uploads/doc-1.txt",
+            "content_hash": "abc123",
+            "duplicate": False
+        }
+        mock_document_service.store_bulk_uploads = AsyncMock(return_value=[
+            new_upload,
+            {"status": "success", "document_id": "doc-0", "document_name": "b.txt", "duplicate": True},
+            {"status": "error", "document_name": "c.docx", "message": "Unsupported file type: .docx"}
+        ])
+        
+        # Act
+        response = test_client.post(
+            "/api/upload/bulk",
+            files=[
+                ("files", ("a.txt", b"first", "text/plain")),
+                ("files", ("b.txt", b"second", "text/plain")),
+                ("files", ("c.docx", b"third", "application/octet-stream"))
+            ]
+        )
+        
+        # Assert
+        assert response.status_code == 202
+        data = response.json()
+        assert data["status"] == "accepted"
+        assert data["job_id"] == "test-job"
+        assert [f["status"] for f in data["files"]] == ["accepted", "duplicate", "error"]
+        args, kwargs = mock_job_manager.submit.call_args
+        assert args == (mock_document_service.index_uploaded_documents, [new_upload])
+    
+    def test_upload_documents_bulk_nothing_new(self, mock_document_service, mock_job_manager, test_client):
+        """Tests that no job is queued when every document was uploaded before"""
+        # Arrange
+        mock_document_service.store_bulk_uploads = AsyncMock(return_value=[
+            {"status": "success", "document_id": "doc-0", "document_name": "b.txt", "duplicate": True}
+        ])
+        
+        # Act
+        response = test_client.post(
+            "/api/upload/bulk",
+            files=[("files", ("b.txt", b"second", "text/plain"))]
+        )
+        
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["files"][0]["duplicate"] is True
+        mock_job_manager.submit.assert_not_called()
+    
+    def test_get_job(self, mock_job_manager, test_client):
+        """Tests the job status endpoint"""
+        # Arrange
+        mock_job_manager.get.return_value = {
+            "job_id": "test-job",
+            "status": "done",
+            "message": "Document uploaded and added to existing vector store successfully",
+            "document_id": "test-uuid",
+            "document_name": "test.pdf",
+            "chunks": 12,
+            "created_at": 100.0,
+            "started_at": 100.5,
+            "finished_at": 102.0,
+            "queued_seconds": 0.5,
+            "processing_seconds": 1.5
+        }
+        
+        # Act
+        response = test_client.get("/api/jobs/test-job")
+        
+        # Assert
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "done"
+        assert data["chunks"] == 12
+        mock_job_manager.get.assert_called_once_with("test-job")
+    
+    def test_get_job_not_found(self, mock_job_manager, test_client):
+        """Tests the job status endpoint with an unknown job id"""
+        # Arrange
+        mock_job_manager.get.return_value = None
+        
+        # Act
+        response = test_client.get("/api/jobs/unknown")
+        
+        # Assert
+        assert response.status_code == 404
@@ -0,0 +1,192 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+from langchain.schema import Document
+from src.services.chatbot_service import ChatbotService
+from src.services.answer_cache import SemanticAnswerCache
+from src.services.request_coalescer import RequestCoalescer
+from src.utils.context_packer import PackedContext
+
+class TestChatbotService:
+    
+    @pytest.fixture
+    def chatbot(self):
+        document_service = MagicMock()
+        document_service.aquery_vector_store = AsyncMock(return_value=[
+            Document(page_content="AI is...", metadata={"source": "ai.pdf", "page": 2, "relevance_score": 0.82}),
+            Document(page_content="ML is...", metadata={"source": "ml.txt"})
+        ])
+        flow_api = MagicMock()
+        flow_api.generate_response = AsyncMock(return_value={"status": "success", "response": "Answer"})
+        flow_api.pack_context.side_effect = lambda chunks: PackedContext(chunks=list(chunks), tokens_used=6)
+        return ChatbotService(document_service=document_service, flow_api=flow_api)
+    
+    @pytest.mark.asyncio
+    async def test_process_message(self, chatbot):
+        """Tests that retrieval is awaited and its sources are reported as context"""
+        # Act
+        result = await chatbot.process_message("What is AI?")
+        
+        # Assert
+        assert result["response"] == "Answer"
+        assert result["context"]["num_docs_retrieved"] == 2
+        assert result["context"]["sources"] == [
+            {"source": "ai.pdf", "page": 2, "score": 0.82},
+            {"source": "ml.txt", "page": None, "score": None}
+        ]
+        chatbot.document_service.aquery_vector_store.assert_awaited_once_with("What is AI?", mode=None)
+        chatbot.document_service.query_vector_store.assert_not_called()
+        chatbot.flow_api.generate_response.assert_awaited_once_with("What is AI?", ["AI is...", "ML is..."])
+    
+    @pytest.mark.asyncio
+    async def test_process_message_reports_context_tokens(self, chatbot):
+        """Tests that the token accounting of the packed context is moved into the response context"""
+        # Arrange
+        context_tokens = {"tokens_used": 40, "tokens_dropped": 12, "chunks_truncated": 1, "chunks_dropped": 0}
+        chatbot.flow_api.generate_response.return_value = {
+            "status": "success", "response": "Answer", "context_tokens": context_tokens
+        }
+        
+        # Act
+        result = await chatbot.process_message("What is AI?")
+        
+        # Assert
+        assert "context_tokens" not in result
+        assert result["context"]["tokens_used"] == 40
+        assert result["context"]["tokens_dropped"] == 12
+    
+    @pytest.mark.asyncio
+    async def test_process_message_without_relevant_chunks(self, chatbot):
+        """Tests that no context chunks are sent when nothing passes the relevance threshold"""
+        # Arrange
+        chatbot.document_service.aquery_vector_store.return_value = []
+        
+        # Act
+        result = await chatbot.process_message("Hello!")
+        
+        # Assert
+        assert result["context"]["num_docs_retrieved"] == 0
+        chatbot.flow_api.generate_response.assert_awaited_once_with("Hello!", [])
+    
+    @pytest.mark.asyncio
+    async def test_process_message_error(self, chatbot):
+        """Tests that retrieval failures are returned as an error status"""
+        # Arrange
+        chatbot.document_service.aquery_vector_store.side_effect = Exception("Store unavailable")
+        
+        # Act
+        result = await chatbot.process_message("What is AI?")
+        
+        # Assert
+        assert result["status"] == "error"
+        assert "Store unavailable" in result["message"]
+    
+    @pytest.mark.asyncio
+    async def test_stream_message(self, chatbot):
+        """Tests that the context is streamed first, followed by the response tokens"""
+        # Arrange
+        async def fake_stream(message, context_chunks, packed_context=None):
+            assert packed_context.chunks == context_chunks
+            for token in ["Ans", "wer"]:
+                yield token
+        
+        chatbot.flow_api.stream_response = fake_stream
+        
+        # Act
+        events = [event async for event in chatbot.stream_message("What is AI?")]
+        
+        # Assert
+        assert [event["event"] for event in events] == ["context", "token", "token", "done"]
+        assert events[0]["context"]["num_docs_retrieved"] == 2
+        assert events[0]["context"]["tokens_used"] == 6
+        assert "".join(event["content"] for event in events if event["event"] == "token") == "Answer"
+    
+    @pytest.mark.asyncio
+    async def test_stream_message_error(self, chatbot):
+        """Tests that a failure while generating ends the stream with an error event"""
+        # Arrange
+        async def failing_stream(message, context_chunks, packed_context=None):
+            yield "Ans"
+            raise Exception("Connection reset")
+        
+        chatbot.flow_api.stream_response = failing_stream
+        
+        # Act
+        events = [event async for event in chatbot.stream_message("What is AI?")]
+        
+        # Assert
+        assert events[-1]["event"] == "error"
+        assert "Connection reset" in events[-1]["message"]
+    
+    @pytest.mark.asyncio
+    async def test_repeated_question_served_from_answer_cache(self, chatbot):
+        """Tests that a repeated question reuses the cached answer instead of calling the LLM"""
+        # Arrange
+        chatbot.answer_cache = SemanticAnswerCache(max_entries=10, ttl_seconds=60, similarity_threshold=0.95)
+        chatbot.document_service.aembed_query = AsyncMock(return_value=[0.1, 0.2, 0.3])
+        chatbot.document_service.index_version = 1
+        
+        # Act
+        first = await chatbot.process_message("What is AI?")
+        second = await chatbot.process_message("What is AI?")
+        
+        # Assert
+        assert second["response"] == first["response"]
+        assert first["context"]["cached"] is False
+        assert second["context"]["cached"] is True
+        chatbot.flow_api.generate_response.assert_awaited_once()
+        chatbot.document_service.aquery_vector_store.assert_awaited_with("What is AI?", embedding=[0.1, 0.2, 0.3], mode=None)
+    
+    @pytest.mark.asyncio
+    async def test_identical_concurrent_messages_are_coalesced(self, chatbot):
+        """Tests that a burst of the same question runs one retrieval and one LLM call"""
+        # Arrange
+        chatbot.coalescer = RequestCoalescer()
+        
+        async def slow_response(message, context_chunks):
+            await asyncio.sleep(0.05)
+            return {"status": "success", "response": "Answer"}
+        
+        chatbot.flow_api.generate_response.side_effect = slow_response
+        
+        # Act
+        results = await asyncio.gather(
+            chatbot.process_message("What is AI?"),
+            chatbot.process_message("What  is AI? "),
+            chatbot.process_message("What is AI?")
+        )
+        
+        # Assert
+        assert [result["response"] for result in results] == ["Answer"] * 3
+        chatbot.document_service.aquery_vector_store.assert_awaited_once()
+        chatbot.flow_api.generate_response.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_process_batch(self, chatbot):
+        """Tests that a batch is embedded in one call, answered with bounded concurrency and kept in order"""
+        # Arrange
+        chatbot.document_service.aembed_queries = AsyncMock(side_effect=lambda messages: [[float(len(m))] for m in messages])
+        chatbot.document_service.index_version = 1
+        in_flight, peak = 0, 0
+        
+        async def generate(message, context_chunks):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01 * (5 - len(message) % 5))
+            in_flight -= 1
+            return {"status": "success", "response": f"Answer to {message}"}
+        
+        chatbot.flow_api.generate_response.side_effect = generate
+        messages = [f"Question {i}" for i in range(6)]
+        
+        # Act
+        results = await chatbot.process_batch(messages[:3] + [" "] + messages[3:], concurrency=2)
+        
+        # Assert
+        assert [r["status"] for r in results] == ["success"] * 3 + ["error"] + ["success"] * 3
+        assert [r["response"] for r in results if r["status"] == "success"] == [f"Answer to {m}" for m in messages]
+        assert results[3]["message"] == "Message cannot be empty"
+        chatbot.document_service.aembed_queries.assert_awaited_once_with(messages)
+        assert chatbot.document_service.aquery_vector_store.await_count == 6
+        assert peak <= 2
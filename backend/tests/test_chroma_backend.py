@@ -0,0 +1,99 @@
+import os
+import numpy as np
+import pytest
+from unittest.mock import patch, MagicMock
+from langchain.schema import Document
+from src.services.document.vector_backends import ChromaBackend, NumpyBackend
+from src.services.document.vector_store_manager import VectorStoreManager
+
+class AngleEmbeddings:
+    """Embeds "<degrees>" as the unit vector at that angle from the query direction"""
+    
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+    
+    def embed_query(self, text):
+        angle = np.radians(float(text))
+        return [float(np.cos(angle)), float(np.sin(angle)), 0.0]
+
+class TestChromaBackend:
+
+    HNSW = {"space": "cosine", "max_neighbors": 32, "ef_construction": 200, "ef_search": 64}
+    
+    @patch('src.services.document.vector_backends.chroma_backend.Chroma')
+    def test_creates_collection_with_hnsw_configuration(self, mock_chroma):
+        """Tests that a new collection gets the configured HNSW parameters"""
+        # Arrange
+        mock_chroma.return_value._collection.configuration = {"hnsw": dict(self.HNSW)}
+        
+        # Act
+        backend = ChromaBackend("store", MagicMock(), hnsw=dict(self.HNSW))
+        
+        # Assert
+        assert mock_chroma.call_args.kwargs["collection_configuration"] == {"hnsw": self.HNSW}
+        backend.vector_store._collection.modify.assert_not_called()
+    
+    @patch('src.services.document.vector_backends.chroma_backend.Chroma')
+    def test_existing_collection_gets_search_ef_and_build_warning(self, mock_chroma, capsys):
+        """Tests that opening an existing collection updates its search ef and reports fixed parameters that differ"""
+        # Arrange
+        built = {"space": "l2", "max_neighbors": 32, "ef_construction": 200, "ef_search": 100}
+        mock_chroma.return_value._collection.configuration = {"hnsw": built}
+        
+        # Act
+        backend = ChromaBackend("store", MagicMock(), hnsw=dict(self.HNSW))
+        
+        # Assert
+        backend.vector_store._collection.modify.assert_called_once_with(configuration={"hnsw": {"ef_search": 64}})
+        assert "space=l2" in capsys.readouterr().out
+    
+    def test_rejects_unknown_space(self):
+        """Tests that unknown distance spaces are rejected"""
+        # Assert
+        with pytest.raises(ValueError):
+            ChromaBackend("store", MagicMock(), vector_store=MagicMock(), hnsw={"space": "hamming"})
+    
+    @pytest.mark.parametrize("space", ["l2", "cosine", "ip"])
+    def test_relevance_scores_match_numpy_backend(self, temp_docs_dir, space):
+        """Tests that every Chroma space reports the cosine similarity the NumPy backend does, so the threshold cuts alike"""
+        # Arrange
+        embeddings = AngleEmbeddings()
+        angles = ["0", "40", "55", "70", "120"]
+        documents = [Document(page_content=angle) for angle in angles]
+        hnsw = {"space": space, "max_neighbors": 16, "ef_construction": 100, "ef_search": 100}
+        chroma = ChromaBackend.create(os.path.join(temp_docs_dir, "chroma"), embeddings, documents, angles, hnsw=hnsw)
+        numpy = NumpyBackend.create(os.path.join(temp_docs_dir, "numpy"), embeddings, documents, angles, quantization="none", dimensions=0)
+        query = embeddings.embed_query("0")
+        
+        # Act
+        chroma_scored = chroma.search(query, k=5)
+        numpy_scored = numpy.search(query, k=5)
+        chroma_kept = VectorStoreManager.select_relevant(chroma_scored, 0.5, 1)
+        numpy_kept = VectorStoreManager.select_relevant(numpy_scored, 0.5, 1)
+        chroma.close()
+        
+        # Assert
+        assert [score for _, score in chroma_scored] == pytest.approx([score for _, score in numpy_scored], abs=1e-4)
+        assert [score for _, score in chroma_scored] == pytest.approx([np.cos(np.radians(float(a))) for a in angles], abs=1e-4)
+        assert [doc.id for doc in chroma_kept] == [doc.id for doc in numpy_kept] == ["0", "40", "55"]
+    
+    def test_reset_then_index_again(self, temp_docs_dir):
+        """Tests that a store reset while open can be re-created and written to, instead of failing as a readonly database"""
+        # Arrange
+        manager = VectorStoreManager(
+            os.path.join(temp_docs_dir, "store"), "test-model", embeddings=AngleEmbeddings(), vector_backend="chroma"
+        )
+        manager.create_vector_store([Document(page_content="0")], ["0"])
+        
+        # Act
+        manager.reset_vector_store()
+        manager.load_vector_store(create_if_missing=True)
+        added = manager.add_documents_to_existing_store([Document(page_content="40")], ["40"])
+        recreated = manager.create_vector_store([Document(page_content="55")], ["55"])
+        recreated.add([Document(page_content="70")], ["70"])
+        scored = recreated.search(AngleEmbeddings().embed_query("0"), k=5)
+        manager.close()
+        
+        # Assert
+        assert added is True
+        assert sorted(doc.id for doc, _ in scored) == ["55", "70"]
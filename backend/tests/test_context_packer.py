@@ -0,0 +1,90 @@
+from src.utils.context_packer import ContextPacker, PackedContext
+
+class WordEncoding:
+    """Tokenizer stand-in counting one token per word"""
+    
+    def encode(self, text):
+        return text.split(" ")
+    
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+class TestContextPacker:
+
+    def make_packer(self, token_budget):
+        packer = ContextPacker(model_name="test-model", token_budget=token_budget, encoding=WordEncoding())
+        packer.MIN_TRUNCATED_TOKENS = 3
+        return packer
+    
+    def test_chunks_within_budget_are_kept(self):
+        """Tests that chunks fitting the budget are all kept in order"""
+        # Arrange
+        packer = self.make_packer(token_budget=100)
+        
+        # Act
+        packed = packer.pack(["one two", "three four five"])
+        
+        # Assert
+        assert packed.chunks == ["one two", "three four five"]
+        assert packed.stats() == {"tokens_used": 5, "tokens_dropped": 0, "chunks_truncated": 0, "chunks_dropped": 0}
+    
+    def test_chunk_over_budget_is_truncated(self):
+        """Tests that the chunk crossing the budget is cut to the remaining tokens"""
+        # Arrange
+        packer = self.make_packer(token_budget=7)
+        
+        # Act
+        packed = packer.pack(["a b", "c d e f g h"])
+        
+        # Assert
+        assert packed.chunks == ["a b", "c d e f"]
+        assert packed.tokens_used == 6
+        assert packed.tokens_dropped == 2
+        assert packed.chunks_truncated == 1
+    
+    def test_small_remainder_drops_chunk_and_keeps_smaller_ones(self):
+        """Tests that a chunk is dropped when too little budget is left and smaller later chunks still fit"""
+        # Arrange
+        packer = self.make_packer(token_budget=6)
+        
+        # Act
+        packed = packer.pack(["a b c d", "e f g h i", "j"])
+        
+        # Assert
+        assert packed.chunks == ["a b c d", "j"]
+        assert packed.tokens_dropped == 5
+        assert packed.chunks_dropped == 1
+    
+    def test_zero_budget_disables_the_limit(self):
+        """Tests that a budget of 0 keeps every chunk"""
+        # Arrange
+        packer = self.make_packer(token_budget=0)
+        
+        # Act
+        packed = packer.pack(["a b c", "d e f"])
+        
+        # Assert
+        assert packed.chunks == ["a b c", "d e f"]
+        assert packed.tokens_used == 6
+    
+    def test_estimates_tokens_without_tokenizer(self):
+        """Tests that token counts fall back to a length estimate when no tokenizer is loaded"""
+        # Arrange
+        packer = self.make_packer(token_budget=0)
+        packer.encoding = None
+        
+        # Act
+        count = packer.count_tokens("x" * 10)
+        truncated = packer.truncate("x" * 10, 1)
+        
+        # Assert
+        assert count == 3
+        assert truncated == "xxxx"
+    
+    def test_empty_context(self):
+        """Tests that packing no chunks yields an empty context"""
+        # Act
+        packed = self.make_packer(token_budget=10).pack([])
+        
+        # Assert
+        assert packed == PackedContext()
@@ -0,0 +1,83 @@
+import os
+import pytest
+from unittest.mock import patch
+from src.services.document import DocumentLoader
+
+class TestDocumentLoader:
+    
+    @pytest.fixture
+    def corpus(self, temp_docs_dir):
+        """Creates two folders with several text files and one unreadable PDF"""
+        first = os.path.join(temp_docs_dir, "docs")
+        second = os.path.join(temp_docs_dir, "uploads")
+        os.makedirs(first)
+        os.makedirs(second)
+        for i in range(5):
+            with open(os.path.join(first, f"doc{i}.txt"), "w") as f:
+                f.write(f"document number {i}")
+        with open(os.path.join(second, "upload.txt"), "w") as f:
+            f.write("uploaded document")
+        with open(os.path.join(second, "broken.pdf"), "wb") as f:
+            f.write(b"not a pdf")
+        with open(os.path.join(second, "notes.docx"), "w") as f:
+            f.write("unsupported")
+        return [first, second]
+    
+    def test_list_files_filters_and_sorts(self, corpus):
+        """Tests that only supported files are listed, in sorted order"""
+        # Act
+        file_paths = DocumentLoader.list_files(corpus)
+        
+        # Assert
+        assert file_paths == sorted(file_paths)
+        assert len(file_paths) == 7
+        assert not any(path.endswith(".docx") for path in file_paths)
+    
+    def test_parallel_load_matches_sequential_order(self, corpus):
+        """Tests that the process pool yields the same documents in the same order"""
+        # Act
+        sequential = DocumentLoader.load_multiple_folders(corpus, max_workers=1)
+        parallel = DocumentLoader.load_multiple_folders(corpus, max_workers=3)
+        
+        # Assert
+        assert [doc.page_content for doc in parallel] == [doc.page_content for doc in sequential]
+        assert len(parallel) == 6
+    
+    def test_parallel_load_reports_errors(self, corpus, capsys):
+        """Tests that per-file errors are reported and the file skipped"""
+        # Act
+        loaded = list(DocumentLoader.iter_files(DocumentLoader.list_files(corpus), max_workers=2))
+        
+        # Assert
+        assert not any(path.endswith("broken.pdf") for path, _ in loaded)
+        assert "Error loading document" in capsys.readouterr().out
+    
+    def test_shared_pool_is_reused_across_loads(self, corpus):
+        """Tests that a pool from create_pool serves several loads, starting workers without fork"""
+        # Arrange
+        pool = DocumentLoader.create_pool(2)
+        file_paths = DocumentLoader.list_files(corpus)
+        
+        # Act
+        try:
+            first = list(DocumentLoader.iter_files(file_paths, max_workers=2, executor=pool))
+            second = DocumentLoader.load_multiple_folders(corpus, max_workers=2, executor=pool)
+            start_method = pool._mp_context.get_start_method()
+        finally:
+            pool.shutdown()
+        
+        # Assert
+        assert [path for path, _ in first] == [path for path in file_paths if not path.endswith("broken.pdf")]
+        assert len(second) == 6
+        assert start_method in ("forkserver", "spawn")
+        assert DocumentLoader.create_pool(1) is None
+    
+    @patch('src.services.document.document_loader.settings')
+    def test_worker_count_from_settings(self, mock_settings):
+        """Tests resolving the worker count from settings"""
+        # Arrange
+        mock_settings.DOCUMENT_LOADER_WORKERS = 0
+        
+        # Act / Assert
+        assert DocumentLoader.resolve_workers() == (os.cpu_count() or 1)
+        assert DocumentLoader.resolve_workers(3) == 3
@@ -1,249 +1,587 @@
 import os
+import threading
 import pytest
 from unittest.mock import patch, MagicMock
-from src.services.document_service import DocumentService
+from langchain.schema import Document
+from src.services.document import DocumentService, DocumentLoader
+from src.services.document.vector_store_manager import VectorStoreManager
+from src.services.document.vector_backends import ChromaBackend
 
 class TestDocumentService:
-    
-    @patch('src.services.document_service.HuggingFaceEmbeddings')
-    @patch('src.services.document_service.settings')
-    def test_init(self, mock_settings, mock_embeddings):
+
+    @pytest.fixture(autouse=True)
+    def mock_embeddings(self):
+        with patch('src.services.document.vector_store_manager.HuggingFaceEmbeddings') as mock:
+            mock.return_value = MagicMock()
+            yield mock
+
+    @patch('src.services.document.document_service.settings')
+    def test_init(self, mock_settings, mock_embeddings, temp_docs_dir):
         """Tests the initialization of DocumentService"""
         # Arrange
-        mock_settings.RAG_DOCUMENTS_FOLDER = "docs"
-        mock_settings.VECTOR_STORE_PATH = "vector_store"
+        mock_settings.RAG_DOCUMENTS_FOLDER = os.path.join(temp_docs_dir, "docs")
+        mock_settings.UPLOADS_FOLDER = os.path.join(temp_docs_dir, "uploads")
+        mock_settings.VECTOR_STORE_PATH = os.path.join(temp_docs_dir, "vector_store")
         mock_settings.EMBEDDING_MODEL = "test-model"
-        
-        mock_embeddings_instance = MagicMock()
-        mock_embeddings.return_value = mock_embeddings_instance
-        
+
         # Act
         service = DocumentService()
-        
+
         # Assert
-        assert "docs" in service.documents_folder
-        assert "vector_store" in service.vector_store_path
-        assert service.embedding_model_name == "test-model"
-        assert service.embeddings == mock_embeddings_instance
+        assert service.documents_folder.endswith("docs")
+        assert service.vector_store_path.endswith("vector_store")
+        assert service.vector_store_manager.embedding_model_name == "test-model"
+        assert service.vector_store_manager.embeddings == mock_embeddings.return_value
         mock_embeddings.assert_called_once_with(model_name="test-model")
-    
-    @patch('src.services.document_service.TextLoader')
-    @patch('src.services.document_service.settings')
-    @patch('src.services.document_service.HuggingFaceEmbeddings')
-    @patch('os.path.exists')
-    @patch('os.walk')
-    def test_load_documents(self, mock_walk, mock_exists, mock_embeddings, mock_settings, mock_text_loader):
-        """Tests loading documents"""
-        # Arrange
-        mock_settings.RAG_DOCUMENTS_FOLDER = "docs"
-        mock_settings.EMBEDDING_MODEL = "test-model"
-        
-        mock_embeddings_instance = MagicMock()
-        mock_embeddings.return_value = mock_embeddings_instance
-        
-        mock_exists.return_value = True
-        mock_walk.return_value = [("/fake/path", [], ["doc1.txt", "doc2.pdf"])]
-        
-        mock_text_loader_instance = MagicMock()
-        mock_text_loader.return_value = mock_text_loader_instance
-        mock_text_loader_instance.load.return_value = ["loaded text document"]
-        
-        mock_pdf_loader = MagicMock()
-        with patch('src.services.document_service.PyPDFLoader', return_value=mock_pdf_loader) as mock_pdf_loader_class:
-            mock_pdf_loader.load.return_value = ["loaded pdf document"]
-            
-            service = DocumentService()
-            
-            # Act
-            documents = service.load_documents()
-            
-            # Assert
-            assert len(documents) == 2
-            mock_text_loader.assert_called_once()
-            mock_pdf_loader_class.assert_called_once()
-            mock_text_loader_instance.load.assert_called_once()
-            mock_pdf_loader.load.assert_called_once()
-    
-    @patch('src.services.document_service.HuggingFaceEmbeddings')
-    @patch('src.services.document_service.settings')
-    def test_process_documents(self, mock_settings, mock_embeddings):
+
+    def test_init_with_shared_embeddings(self, mock_embeddings):
+        """Tests that shared embeddings are reused instead of loading the model again"""
+        # Arrange
+        shared_embeddings = MagicMock()
+
+        # Act
+        first = DocumentService(embeddings=shared_embeddings)
+        second = DocumentService(embeddings=shared_embeddings)
+
+        # Assert
+        assert first.vector_store_manager.embeddings is shared_embeddings
+        assert second.vector_store_manager.embeddings is shared_embeddings
+        mock_embeddings.assert_not_called()
+
+    @patch('src.services.document.document_service.DocumentLoader')
+    def test_load_all_documents(self, mock_loader):
+        """Tests loading documents from the documents and uploads folders"""
+        # Arrange
+        mock_loader.load_multiple_folders.return_value = ["doc1", "doc2"]
+        service = DocumentService()
+
+        # Act
+        documents = service.load_all_documents()
+
+        # Assert
+        assert documents == ["doc1", "doc2"]
+        mock_loader.load_multiple_folders.assert_called_once_with(
+            [service.documents_folder, service.uploads_folder],
+            executor=service.loader_pool
+        )
+
+    def test_process_documents(self):
         """Tests document processing"""
         # Arrange
-        mock_settings.EMBEDDING_MODEL = "test-model"
-        
-        mock_embeddings_instance = MagicMock()
-        mock_embeddings.return_value = mock_embeddings_instance
-        
         service = DocumentService()
         mock_documents = [MagicMock(), MagicMock()]
-        service.text_splitter = MagicMock()
-        service.text_splitter.split_documents.return_value = ["chunk1", "chunk2", "chunk3"]
-        
+        service.processor = MagicMock()
+        service.processor.process_documents.return_value = ["chunk1", "chunk2", "chunk3"]
+
         # Act
         result = service.process_documents(mock_documents)
-        
+
         # Assert
         assert len(result) == 3
-        service.text_splitter.split_documents.assert_called_once_with(mock_documents)
-    
-    @patch('src.services.document_service.Chroma')
-    @patch('src.services.document_service.HuggingFaceEmbeddings')
-    @patch('src.services.document_service.settings')
-    @patch('os.path.exists')
-    @patch('shutil.rmtree')
-    @patch('os.makedirs')
-    def test_create_vector_store(self, mock_makedirs, mock_rmtree, mock_exists, mock_settings, mock_embeddings, mock_chroma):
+        service.processor.process_documents.assert_called_once_with(mock_documents)
+
+    @patch('src.services.document.vector_backends.chroma_backend.Chroma')
+    @patch('src.services.document.vector_store_manager.shutil.rmtree')
+    @patch('src.services.document.vector_store_manager.os.makedirs')
+    @patch('src.services.document.vector_store_manager.os.path.exists')
+    def test_create_vector_store(self, mock_exists, mock_makedirs, mock_rmtree, mock_chroma):
         """Tests creating vector store using Chroma"""
         # Arrange
-        mock_settings.VECTOR_STORE_PATH = "vector_store"
-        mock_settings.EMBEDDING_MODEL = "test-model"
-        
-        mock_embeddings_instance = MagicMock()
-        mock_embeddings.return_value = mock_embeddings_instance
-        
         mock_exists.return_value = True
-        
         mock_vector_store = MagicMock()
         mock_chroma.from_documents.return_value = mock_vector_store
-        
         service = DocumentService()
-        
+        service.vector_store_manager.lexical_index = MagicMock()
+
         # Act
-        documents = [MagicMock(), MagicMock()]
+        documents = [Document(page_content="AI"), Document(page_content="ML")]
         result = service.create_vector_store(documents)
-        
+
         # Assert
-        assert result == mock_vector_store
+        assert result.vector_store == mock_vector_store
         mock_rmtree.assert_called_once()
-        mock_makedirs.assert_called_once()
+        mock_makedirs.assert_called_with(service.vector_store_path, exist_ok=True)
+        ids = mock_chroma.from_documents.call_args.kwargs["ids"]
+        assert len(set(ids)) == 2
         mock_chroma.from_documents.assert_called_once_with(
             documents=documents,
-            embedding=service.embeddings,
-            persist_directory=service.vector_store_path
+            embedding=service.vector_store_manager.embeddings,
+            persist_directory=service.vector_store_path,
+            ids=ids,
+            collection_configuration={"hnsw": ChromaBackend.hnsw_configuration()}
         )
-        mock_vector_store.persist.assert_called_once()
-    
-    @patch('src.services.document_service.Chroma')
-    @patch('src.services.document_service.HuggingFaceEmbeddings')
-    @patch('src.services.document_service.settings')
-    @patch('os.path.exists')
-    def test_load_vector_store(self, mock_exists, mock_settings, mock_embeddings, mock_chroma):
+        service.vector_store_manager.lexical_index.add.assert_called_once_with(documents, ids)
+        service.vector_store_manager.lexical_index.save.assert_called_once()
+
+    @patch('src.services.document.vector_backends.chroma_backend.Chroma')
+    def test_load_vector_store(self, mock_chroma):
         """Tests loading the vector store"""
         # Arrange
-        mock_settings.VECTOR_STORE_PATH = "vector_store"
-        mock_settings.EMBEDDING_MODEL = "test-model"
-        
-        mock_embeddings_instance = MagicMock()
-        mock_embeddings.return_value = mock_embeddings_instance
-        
-        mock_exists.return_value = True
-        
         mock_vector_store = MagicMock()
         mock_chroma.return_value = mock_vector_store
-        
         service = DocumentService()
-        
+        service.vector_store_manager._vector_store_exists = MagicMock(return_value=True)
+
         # Act
         result = service.load_vector_store()
-        
+
         # Assert
-        assert result == mock_vector_store
+        assert result.vector_store == mock_vector_store
         mock_chroma.assert_called_once_with(
             persist_directory=service.vector_store_path,
-            embedding_function=service.embeddings
+            embedding_function=service.vector_store_manager.embeddings,
+            collection_configuration={"hnsw": ChromaBackend.hnsw_configuration()}
         )
-    
-    @patch('src.services.document_service.Chroma')
-    @patch('src.services.document_service.HuggingFaceEmbeddings')
-    @patch('src.services.document_service.settings')
-    @patch('os.path.exists')
-    def test_query_vector_store(self, mock_exists, mock_settings, mock_embeddings, mock_chroma):
-        """Tests querying the vector store"""
-        # Arrange
-        mock_settings.VECTOR_STORE_PATH = "vector_store"
-        mock_settings.EMBEDDING_MODEL = "test-model"
-        
-        mock_embeddings_instance = MagicMock()
-        mock_embeddings.return_value = mock_embeddings_instance
-        
-        mock_exists.return_value = True
-        
+
+    @patch('src.services.document.vector_backends.chroma_backend.Chroma')
+    def test_query_vector_store(self, mock_chroma):
+        """Tests querying the vector store keeps only chunks passing the relevance threshold"""
+        # Arrange
+        doc1, doc2, doc3 = (Document(page_content=text) for text in ["AI", "ML", "Cooking"])
         mock_vector_store = MagicMock()
         mock_chroma.return_value = mock_vector_store
-        mock_vector_store.similarity_search.return_value = ["doc1", "doc2"]
-        
+        mock_vector_store.similarity_search_by_vector_with_relevance_scores.return_value = [
+            (doc1, 0.1), (doc2, 0.4), (doc3, 0.9)
+        ]
+        mock_vector_store._collection.configuration = {"hnsw": {"space": "cosine"}}
         service = DocumentService()
-        
+        service.vector_store_manager._vector_store_exists = MagicMock(return_value=True)
+        service.vector_store_manager.embeddings.embed_query.return_value = [0.1, 0.2]
+
         # Act
-        result = service.query_vector_store("What is AI?", k=2)
-        
+        with patch('src.services.document.vector_store_manager.settings') as mock_settings:
+            mock_settings.RETRIEVAL_MMR = False
+            mock_settings.RETRIEVAL_MODE = "dense"
+            mock_settings.RETRIEVAL_SCORE_THRESHOLD = 0.5
+            mock_settings.RETRIEVAL_MIN_K = 1
+            result = service.query_vector_store("What is AI?", k=3)
+
         # Assert
-        assert result == ["doc1", "doc2"]
-        mock_vector_store.similarity_search.assert_called_once_with("What is AI?", k=2)
-    
-    @patch('src.services.document_service.HuggingFaceEmbeddings')
-    @patch('src.services.document_service.settings')
-    def test_setup_rag_system_success(self, mock_settings, mock_embeddings):
-        """Tests successful RAG system setup"""
+        assert result == [doc1, doc2]
+        assert doc1.metadata["relevance_score"] == 0.9
+        assert doc2.metadata["relevance_score"] == 0.6
+        service.vector_store_manager.embeddings.embed_query.assert_called_once_with("What is AI?")
+        mock_vector_store.similarity_search_by_vector_with_relevance_scores.assert_called_once_with([0.1, 0.2], k=3)
+
+    @patch('src.services.document.vector_backends.chroma_backend.Chroma')
+    def test_query_vector_store_mmr(self, mock_chroma):
+        """Tests that MMR mode searches a larger candidate set and drops redundant chunks"""
         # Arrange
-        mock_settings.EMBEDDING_MODEL = "test-model"
-        
-        mock_embeddings_instance = MagicMock()
-        mock_embeddings.return_value = mock_embeddings_instance
-        
+        mock_vector_store = MagicMock()
+        mock_chroma.return_value = mock_vector_store
+        mock_vector_store._collection.query.return_value = {
+            "ids": [["a-h-0", "a-h-5", "b-h-0"]],
+            "documents": [["AI is...", "AI is...", "ML is..."]],
+            "metadatas": [[{"source": "a.txt"}, {"source": "a.txt"}, {"source": "b.txt"}]],
+            "distances": [[0.1, 0.1, 0.3]],
+            "embeddings": [[[1.0, 0.0], [1.0, 0.0], [0.6, 0.8]]],
+        }
+        mock_vector_store._collection.configuration = {"hnsw": {"space": "cosine"}}
+        service = DocumentService()
+        service.vector_store_manager._vector_store_exists = MagicMock(return_value=True)
+
+        # Act
+        with patch('src.services.document.vector_store_manager.settings') as mock_settings:
+            mock_settings.RETRIEVAL_MMR = True
+            mock_settings.RETRIEVAL_MODE = "dense"
+            mock_settings.RETRIEVAL_MMR_FETCH_K = 20
+            mock_settings.RETRIEVAL_MMR_LAMBDA = 0.5
+            mock_settings.RETRIEVAL_MIN_K = 1
+            result = service.vector_store_manager.query_vector_store("What is AI?", k=3, embedding=[1.0, 0.0], score_threshold=0.5)
+
+        # Assert
+        assert [doc.page_content for doc in result] == ["AI is...", "ML is..."]
+        assert result[1].metadata == {"source": "b.txt", "relevance_score": 0.7}
+        assert mock_vector_store._collection.query.call_args.kwargs["n_results"] == 20
+
+    @patch('src.services.document.vector_backends.chroma_backend.Chroma')
+    def test_query_vector_store_retrieval_modes(self, mock_chroma):
+        """Tests lexical-only lookups skip the vector store and hybrid mode fuses both rankings"""
+        # Arrange
+        dense_doc = Document(page_content="Refunds take a week", id="p-1")
+        mock_vector_store = MagicMock()
+        mock_chroma.return_value = mock_vector_store
+        mock_vector_store.similarity_search_by_vector_with_relevance_scores.return_value = [(dense_doc, 0.2)]
+        mock_vector_store._collection.configuration = {"hnsw": {"space": "cosine"}}
+        service = DocumentService()
+        manager = service.vector_store_manager
+        manager._vector_store_exists = MagicMock(return_value=True)
+        manager.lexical_index = MagicMock()
+        manager.lexical_index.search.return_value = [Document(page_content="Error ERR-1042", id="e-1")]
+
+        # Act
+        lexical = manager.query_vector_store("ERR-1042 refunds", k=2, embedding=[0.1], mode="lexical")
+        hybrid = manager.query_vector_store("ERR-1042 refunds", k=2, embedding=[0.1], mode="hybrid")
+
+        # Assert
+        assert [doc.id for doc in lexical] == ["e-1"]
+        assert sorted(doc.id for doc in hybrid) == ["e-1", "p-1"]
+        mock_vector_store.similarity_search_by_vector_with_relevance_scores.assert_called_once()
+        with pytest.raises(ValueError):
+            manager.query_vector_store("ERR-1042", mode="fuzzy")
+
+    @patch('src.services.document.vector_backends.chroma_backend.Chroma')
+    def test_hybrid_without_relevant_dense_results(self, mock_chroma):
+        """Tests that hybrid mode returns nothing for off-topic questions instead of BM25-only matches"""
+        # Arrange
+        mock_vector_store = MagicMock()
+        mock_chroma.return_value = mock_vector_store
+        mock_vector_store.similarity_search_by_vector_with_relevance_scores.return_value = [
+            (Document(page_content="Refunds take a week", id="p-1"), 0.9)
+        ]
+        mock_vector_store._collection.configuration = {"hnsw": {"space": "cosine"}}
         service = DocumentService()
-        service.load_documents = MagicMock(return_value=["doc1", "doc2"])
-        service.process_documents = MagicMock(return_value=["chunk1", "chunk2", "chunk3"])
-        service.create_vector_store = MagicMock()
+        manager = service.vector_store_manager
+        manager._vector_store_exists = MagicMock(return_value=True)
+        manager.lexical_index = MagicMock()
+        manager.lexical_index.search.return_value = [Document(page_content="Weather in refunds", id="w-1")]
+
+        # Act
+        result = manager.query_vector_store("weather today", k=2, embedding=[0.1], score_threshold=0.5, mode="hybrid")
+
+        # Assert
+        assert result == []
+        manager.lexical_index.search.assert_not_called()
+
+    def test_select_relevant(self):
+        """Tests the threshold and minimum k applied to scored results"""
+        # Arrange
+        scored = [(Document(page_content=str(i)), score) for i, score in enumerate([0.8, 0.3, 0.2])]
+
+        # Act
+        top_only = VectorStoreManager.select_relevant(scored, 0.5, 1)
+        with_min_k = VectorStoreManager.select_relevant(scored, 0.5, 2)
+        none_relevant = VectorStoreManager.select_relevant(scored, 0.9, 2)
+
+        # Assert
+        assert [doc.page_content for doc in top_only] == ["0"]
+        assert [doc.page_content for doc in with_min_k] == ["0", "1"]
+        assert none_relevant == []
+
+    @pytest.mark.asyncio
+    @patch('src.services.document.vector_backends.chroma_backend.Chroma')
+    async def test_aquery_vector_store(self, mock_chroma):
+        """Tests that async queries run on the retrieval thread pool instead of the event loop"""
+        # Arrange
+        threads = []
+        mock_vector_store = MagicMock()
+        doc = Document(page_content="AI")
+        mock_vector_store.similarity_search_by_vector_with_relevance_scores.side_effect = lambda embedding, k: threads.append(threading.current_thread().name) or [(doc, 0.0)]
+        mock_vector_store._collection.configuration = {"hnsw": {"space": "cosine"}}
+        mock_chroma.return_value = mock_vector_store
+        service = DocumentService()
+        service.vector_store_manager._vector_store_exists = MagicMock(return_value=True)
+        service.vector_store_manager.embeddings.embed_queries.return_value = [[0.1, 0.2]]
+
+        # Act
+        result = await service.aquery_vector_store("What is AI?", k=1)
+        service.close()
+
+        # Assert
+        assert result == [doc]
+        assert threads[0].startswith("retrieval")
+        mock_vector_store.similarity_search_by_vector_with_relevance_scores.assert_called_once_with([0.1, 0.2], k=1)
+
+    @patch('src.services.document.vector_backends.chroma_backend.Chroma')
+    def test_repeated_query_served_from_caches(self, mock_chroma):
+        """Tests that identical queries reuse the query embedding and the search results until the index changes"""
+        # Arrange
+        mock_vector_store = MagicMock()
+        mock_chroma.return_value = mock_vector_store
+        doc = Document(page_content="AI")
+        mock_vector_store.similarity_search_by_vector_with_relevance_scores.return_value = [(doc, 0.0)]
+        mock_vector_store._collection.configuration = {"hnsw": {"space": "cosine"}}
+        service = DocumentService()
+        manager = service.vector_store_manager
+        manager._vector_store_exists = MagicMock(return_value=True)
+        manager.embeddings.embed_query.return_value = [0.1, 0.2]
+
+        # Act
+        first = service.query_vector_store("What is AI?", k=2)
+        second = service.query_vector_store("  What  is AI? ", k=2)
+        manager.add_documents_to_existing_store([MagicMock()], ids=["a"])
+        third = service.query_vector_store("What is AI?", k=2)
+
+        # Assert
+        assert first == second == third == [doc]
+        manager.embeddings.embed_query.assert_called_once_with("What is AI?")
+        assert mock_vector_store.similarity_search_by_vector_with_relevance_scores.call_count == 2
+        assert manager.retrieval_cache.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_aembed_queries_uses_one_model_call(self):
+        """Tests that a batch of queries is embedded in a single call, skipping cached and repeated ones"""
+        # Arrange
+        service = DocumentService()
+        embeddings = service.vector_store_manager.embeddings
+        embeddings.embed_queries.side_effect = lambda texts: [[float(len(text))] for text in texts]
+        await service.aembed_queries(["cached"])
+        embeddings.embed_queries.reset_mock()
+
+        # Act
+        result = await service.aembed_queries(["a", "bb", "cached", "a"])
+        service.close()
+
+        # Assert
+        assert result == [[1.0], [2.0], [6.0], [1.0]]
+        embeddings.embed_queries.assert_called_once_with(["a", "bb"])
+
+    @patch('src.services.document.vector_backends.chroma_backend.Chroma')
+    def test_index_version_changes_on_writes(self, mock_chroma):
+        """Tests that adding and deleting chunks bump the index version"""
+        # Arrange
+        service = DocumentService()
+        service.vector_store_manager._vector_store_exists = MagicMock(return_value=True)
+        initial = service.index_version
+
+        # Act
+        service.vector_store_manager.add_documents_to_existing_store([MagicMock()], ids=["a"])
+        after_add = service.index_version
+        service.vector_store_manager.delete_documents(["a"])
+
+        # Assert
+        assert after_add > initial
+        assert service.index_version > after_add
+
+    @pytest.fixture
+    def service(self, temp_docs_dir):
+        with patch('src.services.document.document_service.settings') as mock_settings:
+            mock_settings.RAG_DOCUMENTS_FOLDER = os.path.join(temp_docs_dir, "docs")
+            mock_settings.UPLOADS_FOLDER = os.path.join(temp_docs_dir, "uploads")
+            mock_settings.VECTOR_STORE_PATH = os.path.join(temp_docs_dir, "vector_store")
+            mock_settings.EMBEDDING_MODEL = "test-model"
+            service = DocumentService()
         
+        service.vector_store_manager = MagicMock()
+        service.vector_store_manager.vector_store_exists.return_value = True
+        service.vector_store_manager.delete_documents.return_value = True
+        service.vector_store_manager.add_documents_to_existing_store.return_value = True
+        service.pipeline.vector_store_manager = service.vector_store_manager
+        return service
+
+    @staticmethod
+    def _write(path, content):
+        with open(path, "w") as f:
+            f.write(content)
+
+    def test_setup_rag_system_success(self, service):
+        """Tests successful RAG system setup indexing every new file"""
+        # Arrange
+        self._write(os.path.join(service.documents_folder, "a.txt"), "first document")
+        self._write(os.path.join(service.uploads_folder, "b.txt"), "second document")
+
         # Act
         result = service.setup_rag_system()
-        
+
+        # Assert
+        assert result["status"] == "success"
+        assert "Successfully processed 2 documents into 2 chunks" in result["message"]
+        service.vector_store_manager.add_documents_to_existing_store.assert_called_once()
+        assert len(service.manifest.entries) == 2
+        assert service.manifest.exists()
+
+    def test_setup_rag_system_up_to_date(self, service):
+        """Tests that an unchanged corpus is not re-embedded"""
+        # Arrange
+        self._write(os.path.join(service.documents_folder, "a.txt"), "first document")
+        service.setup_rag_system()
+        service.vector_store_manager.add_documents_to_existing_store.reset_mock()
+
+        # Act
+        result = service.setup_rag_system()
+
+        # Assert
+        assert result["status"] == "success"
+        assert "up-to-date" in result["message"]
+        service.vector_store_manager.add_documents_to_existing_store.assert_not_called()
+
+    def test_setup_rag_system_only_reindexes_changed_files(self, service):
+        """Tests that only changed files are re-embedded and their old chunks deleted"""
+        # Arrange
+        changed_path = os.path.join(service.documents_folder, "a.txt")
+        self._write(changed_path, "first document")
+        self._write(os.path.join(service.documents_folder, "b.txt"), "second document")
+        service.setup_rag_system()
+        old_ids = service.manifest.chunk_ids(changed_path)
+        service.vector_store_manager.add_documents_to_existing_store.reset_mock()
+        self._write(changed_path, "first document, revised")
+
+        # Act
+        result = service.setup_rag_system()
+
+        # Assert
+        assert result["status"] == "success"
+        service.vector_store_manager.delete_documents.assert_any_call(old_ids)
+        service.vector_store_manager.add_documents_to_existing_store.assert_called_once()
+        assert service.manifest.chunk_ids(changed_path) != old_ids
+
+    def test_setup_rag_system_removes_deleted_files(self, service):
+        """Tests that chunks of removed files are deleted from the vector store"""
+        # Arrange
+        removed_path = os.path.join(service.documents_folder, "a.txt")
+        self._write(removed_path, "first document")
+        service.setup_rag_system()
+        old_ids = service.manifest.chunk_ids(removed_path)
+        os.remove(removed_path)
+
+        # Act
+        result = service.setup_rag_system()
+
+        # Assert
+        assert result["status"] == "success"
+        service.vector_store_manager.delete_documents.assert_any_call(old_ids)
+        assert removed_path not in service.manifest.entries
+
+    def test_setup_rag_system_treats_vanished_files_as_removed(self, service):
+        """Tests that files deleted between listing and hashing do not abort the sync"""
+        # Arrange
+        indexed_path = os.path.join(service.documents_folder, "a.txt")
+        self._write(indexed_path, "first document")
+        service.setup_rag_system()
+        old_ids = service.manifest.chunk_ids(indexed_path)
+        listed = [indexed_path, os.path.join(service.documents_folder, "b.txt")]
+        os.remove(indexed_path)
+
+        # Act
+        with patch.object(DocumentLoader, 'list_files', return_value=listed):
+            result = service.setup_rag_system()
+
         # Assert
         assert result["status"] == "success"
-        assert "Successfully processed 2 documents into 3 chunks" in result["message"]
-        service.load_documents.assert_called_once()
-        service.process_documents.assert_called_once_with(["doc1", "doc2"])
-        service.create_vector_store.assert_called_once_with(["chunk1", "chunk2", "chunk3"])
-    
-    @patch('src.services.document_service.HuggingFaceEmbeddings')
-    @patch('src.services.document_service.settings')
-    def test_setup_rag_system_no_documents(self, mock_settings, mock_embeddings):
+        assert "(1 removed)" in result["message"]
+        service.vector_store_manager.delete_documents.assert_any_call(old_ids)
+        assert service.manifest.entries == {}
+
+    def test_setup_rag_system_skips_failed_files_until_they_change(self, service):
+        """Tests that a file that failed to ingest is recorded, reported and only retried once it changes"""
+        # Arrange
+        broken_path = os.path.join(service.uploads_folder, "broken.pdf")
+        with open(broken_path, "wb") as f:
+            f.write(b"not a pdf")
+        self._write(os.path.join(service.documents_folder, "a.txt"), "first document")
+
+        # Act
+        first = service.setup_rag_system()
+        service.vector_store_manager.add_documents_to_existing_store.reset_mock()
+        with patch.object(DocumentLoader, 'load_file', wraps=DocumentLoader.load_file) as load_file:
+            second = service.setup_rag_system()
+        with open(broken_path, "wb") as f:
+            f.write(b"still not a pdf")
+        third = service.setup_rag_system()
+
+        # Assert
+        assert first["status"] == "warning"
+        assert list(first["failed_files"]) == [broken_path]
+        assert not service.manifest.is_indexed(broken_path)
+        assert second["status"] == "warning"
+        assert "up-to-date" in second["message"]
+        load_file.assert_not_called()
+        assert "Successfully processed 1 documents" in third["message"]
+        assert list(third["failed_files"]) == [broken_path]
+
+    def test_setup_rag_system_rebuilds_store_without_manifest(self, service):
+        """Tests that a vector store created before manifests existed is rebuilt"""
+        # Arrange
+        self._write(os.path.join(service.documents_folder, "a.txt"), "first document")
+
+        # Act
+        service.setup_rag_system()
+
+        # Assert
+        service.vector_store_manager.reset_vector_store.assert_called_once()
+
+    def test_setup_rag_system_no_documents(self, service):
         """Tests RAG system setup with no documents"""
         # Arrange
-        mock_settings.EMBEDDING_MODEL = "test-model"
-        
-        mock_embeddings_instance = MagicMock()
-        mock_embeddings.return_value = mock_embeddings_instance
-        
-        service = DocumentService()
-        service.load_documents = MagicMock(return_value=[])
-        
+        service.vector_store_manager.vector_store_exists.return_value = False
+
         # Act
         result = service.setup_rag_system()
-        
+
         # Assert
         assert result["status"] == "warning"
         assert "No documents found to process" in result["message"]
-        service.load_documents.assert_called_once()
-        
-    @patch('src.services.document_service.HuggingFaceEmbeddings')
-    @patch('src.services.document_service.settings')
-    def test_setup_rag_system_error(self, mock_settings, mock_embeddings):
+
+    def test_setup_rag_system_error(self, service):
         """Tests RAG system setup with error"""
         # Arrange
-        mock_settings.EMBEDDING_MODEL = "test-model"
-        
-        mock_embeddings_instance = MagicMock()
-        mock_embeddings.return_value = mock_embeddings_instance
-        
-        service = DocumentService()
-        service.load_documents = MagicMock(side_effect=Exception("Test error"))
-        
+        self._write(os.path.join(service.documents_folder, "a.txt"), "first document")
+        service.vector_store_manager.add_documents_to_existing_store.side_effect = Exception("Test error")
+
         # Act
         result = service.setup_rag_system()
-        
+
+        # Assert
+        assert result["status"] == "error"
+        assert "Error setting up RAG system" in result["message"]
+        assert "Test error" in result["message"]
+        assert not service.manifest.entries
+
+    def test_duplicate_upload_skips_processing(self, service):
+        """Tests that uploading identical content twice stores and indexes it once"""
+        # Arrange
+        content = b"the same policy document"
+        first = service.save_uploaded_document(content, "policy.txt")
+        service.vector_store_manager.add_documents_to_existing_store.reset_mock()
+
+        # Act
+        second = service.save_uploaded_document(content, "policy-copy.txt")
+
+        # Assert
+        assert first["status"] == "success"
+        assert second["status"] == "success"
+        assert second["duplicate"] is True
+        assert second["document_id"] == first["document_id"]
+        service.vector_store_manager.add_documents_to_existing_store.assert_not_called()
+        assert len([f for f in os.listdir(service.uploads_folder) if not f.startswith(".")]) == 1
+
+    def test_failed_upload_is_unregistered(self, service):
+        """Tests that content whose indexing failed is removed and indexed again when re-uploaded"""
+        # Arrange
+        service.vector_store_manager.add_documents_to_existing_store.return_value = False
+        content = b"a policy document"
+
+        # Act
+        result = service.save_uploaded_document(content, "policy.txt")
+        service.vector_store_manager.add_documents_to_existing_store.return_value = True
+        retry = service.save_uploaded_document(content, "policy.txt")
+
+        # Assert
+        assert result["status"] == "error"
+        assert retry["status"] == "success"
+        assert retry.get("duplicate") is not True
+        assert len(service.upload_registry) == 1
+        assert len([f for f in os.listdir(service.uploads_folder) if not f.startswith(".")]) == 1
+
+    def test_index_uploaded_documents(self, service):
+        """Tests that a bulk upload is indexed in one run with a result per file"""
+        # Arrange
+        uploads = [
+            {**service.store_uploaded_document(f"policy number {i}".encode(), f"policy{i}.txt"), "document_name": f"policy{i}.txt"}
+            for i in range(3)
+        ]
+
+        # Act
+        result = service.index_uploaded_documents(uploads)
+
+        # Assert
+        assert result["status"] == "success"
+        assert result["chunks"] == 3
+        assert [f["status"] for f in result["files"]] == ["success"] * 3
+        assert [f["document_name"] for f in result["files"]] == ["policy0.txt", "policy1.txt", "policy2.txt"]
+        service.vector_store_manager.add_documents_to_existing_store.assert_called_once()
+
+    def test_index_uploaded_documents_error(self, service):
+        """Tests that a failed bulk upload unregisters every file so they can be uploaded again"""
+        # Arrange
+        service.vector_store_manager.add_documents_to_existing_store.return_value = False
+        uploads = [service.store_uploaded_document(b"a policy document", "policy.txt")]
+
+        # Act
+        result = service.index_uploaded_documents(uploads)
+
         # Assert
         assert result["status"] == "error"
-        assert "Error setting up RAG system: Test error" in result["message"]
-        service.load_documents.assert_called_once()
\ No newline at end of file
+        assert result["files"][0]["status"] == "error"
+        assert len(service.upload_registry) == 0
+        assert not os.path.exists(uploads[0]["file_path"])
@@ -1,24 +1,37 @@
 import os
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from src.main import app
+from src.api.dependencies import get_document_service, get_job_manager
+from src.services.document import UploadTooLargeError
 
 client = TestClient(app)
 
 @pytest.fixture
 def mock_document_service():
-    with patch("src.api.endpoints.document_service") as mock_service:
-        yield mock_service
+    mock_service = MagicMock()
+    app.dependency_overrides[get_document_service] = lambda: mock_service
+    yield mock_service
+    app.dependency_overrides.pop(get_document_service, None)
 
-def test_upload_document_success(mock_document_service):
-    # Mock the save_uploaded_document method
-    mock_document_service.save_uploaded_document.return_value = {
+@pytest.fixture(autouse=True)
+def mock_job_manager():
+    job_manager = MagicMock()
+    job_manager.submit.return_value = {"job_id": "test-job", "status": "queued"}
+    app.dependency_overrides[get_job_manager] = lambda: job_manager
+    yield job_manager
+    app.dependency_overrides.pop(get_job_manager, None)
+
+def test_upload_document_success(mock_document_service, mock_job_manager):
+    # Mock the store_upload_stream method
+    mock_document_service.store_upload_stream = AsyncMock(return_value={
         "status": "success",
-        "message": "Document uploaded and processed successfully",
         "document_id": "test-uuid",
-        "document_name": "test.pdf"
-    }
+        "document_name": "test.pdf",
+        "file_path": "uploads/test-uuid.pdf",
+        "content_hash": "abc123"
+    })
     
     # Create a test file
     test_file_content = b"This is a test PDF file content"
@@ -30,21 +43,50 @@ def test_upload_document_success(mock_document_service):
     )
     
     # Check the response
-    assert response.status_code == 200
+    assert response.status_code == 202
     assert response.json() == {
-        "status": "success",
-        "message": "Document uploaded and processed successfully",
+        "status": "accepted",
+        "message": "Document uploaded and queued for processing",
         "document_id": "test-uuid",
-        "document_name": "test.pdf"
+        "document_name": "test.pdf",
+        "job_id": "test-job",
+        "duplicate": False
     }
     
     # Verify the service was called correctly
-    mock_document_service.save_uploaded_document.assert_called_once()
-    args, kwargs = mock_document_service.save_uploaded_document.call_args
-    assert args[0] == test_file_content
+    mock_document_service.store_upload_stream.assert_awaited_once()
+    args, kwargs = mock_document_service.store_upload_stream.call_args
     assert args[1] == "test.pdf"
+    mock_job_manager.submit.assert_called_once()
+
+def test_upload_document_duplicate(mock_document_service, mock_job_manager):
+    # Mock the store_upload_stream method to report already stored content
+    mock_document_service.store_upload_stream = AsyncMock(return_value={
+        "status": "success",
+        "message": "Document already uploaded, skipping processing",
+        "document_id": "existing-uuid",
+        "document_name": "test.pdf",
+        "file_path": "uploads/existing-uuid.pdf",
+        "content_hash": "abc123",
+        "duplicate": True
+    })
+    
+    # Make the request
+    response = client.post(
+        "/api/upload",
+        files={"file": ("test.pdf", b"This is a test PDF file content", "application/pdf")}
+    )
+    
+    # Check the response points at the existing document and nothing is queued
+    assert response.status_code == 200
+    assert response.json()["document_id"] == "existing-uuid"
+    assert response.json()["duplicate"] is True
+    assert response.json()["job_id"] is None
+    mock_job_manager.submit.assert_not_called()
 
 def test_upload_document_unsupported_type(mock_document_service):
+    mock_document_service.store_upload_stream = AsyncMock()
+    
     # Create a test file with unsupported extension
     test_file_content = b"This is a test file content"
     
@@ -60,11 +102,12 @@ def test_upload_document_unsupported_type(mock_document_service):
     assert "Unsupported file type" in response.json()["message"]
     
     # Verify the service was not called
-    mock_document_service.save_uploaded_document.assert_not_called()
+    mock_document_service.store_upload_stream.assert_not_called()
 
-def test_upload_document_too_large(mock_document_service):
-    # Create a test file that's larger than the limit
-    # We'll patch the MAX_UPLOAD_SIZE to a small value for testing
+def test_upload_document_too_large(mock_document_service, mock_job_manager):
+    # The upload handler aborts the stream as soon as the limit is crossed
+    mock_document_service.store_upload_stream = AsyncMock(side_effect=UploadTooLargeError(10))
+    
     with patch("src.config.settings.settings.MAX_UPLOAD_SIZE", 10):
         test_file_content = b"This is a test file content that exceeds the size limit"
         
@@ -79,15 +122,15 @@ def test_upload_document_too_large(mock_document_service):
         assert response.json()["status"] == "error"
         assert "File too large" in response.json()["message"]
         
-        # Verify the service was not called
-        mock_document_service.save_uploaded_document.assert_not_called()
+        # Verify no ingestion job was queued
+        mock_job_manager.submit.assert_not_called()
 
 def test_upload_document_error(mock_document_service):
-    # Mock the save_uploaded_document method to return an error
-    mock_document_service.save_uploaded_document.return_value = {
+    # Mock the store_upload_stream method to return an error
+    mock_document_service.store_upload_stream = AsyncMock(return_value={
         "status": "error",
         "message": "Error processing document"
-    }
+    })
     
     # Create a test file
     test_file_content = b"This is a test PDF file content"
@@ -106,4 +149,4 @@ def test_upload_document_error(mock_document_service):
     }
     
     # Verify the service was called
-    mock_document_service.save_uploaded_document.assert_called_once()
\ No newline at end of file
+    mock_document_service.store_upload_stream.assert_awaited_once()
\ No newline at end of file
@@ -0,0 +1,75 @@
+import gc
+import asyncio
+import threading
+import pytest
+from unittest.mock import MagicMock
+from src.services.document import EmbeddingBatcher
+
+class TestEmbeddingBatcher:
+    
+    @pytest.fixture
+    def embed_batch(self):
+        return MagicMock(side_effect=lambda texts: [[float(len(text))] for text in texts])
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_model_call(self, embed_batch):
+        """Tests that requests arriving within the wait window are embedded together"""
+        # Arrange
+        batcher = EmbeddingBatcher(embed_batch, max_batch_size=16, max_wait_ms=20)
+        
+        # Act
+        results = await asyncio.gather(*(batcher.embed(text) for text in ["a", "bb", "ccc", "bb"]))
+        
+        # Assert
+        assert results == [[1.0], [2.0], [3.0], [2.0]]
+        embed_batch.assert_called_once_with(["a", "bb", "ccc"])
+        assert batcher.stats() == {"requests": 4, "batches": 1, "avg_batch_size": 4.0}
+    
+    @pytest.mark.asyncio
+    async def test_full_batch_is_sent_without_waiting(self, embed_batch):
+        """Tests that a batch is flushed as soon as it reaches the maximum size"""
+        # Arrange
+        batcher = EmbeddingBatcher(embed_batch, max_batch_size=2, max_wait_ms=10_000)
+        
+        # Act
+        results = await asyncio.wait_for(
+            asyncio.gather(batcher.embed("a"), batcher.embed("bb"), batcher.embed("ccc"), batcher.embed("dddd")),
+            timeout=5
+        )
+        
+        # Assert
+        assert results == [[1.0], [2.0], [3.0], [4.0]]
+        assert embed_batch.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_model_error_is_raised_for_every_request(self):
+        """Tests that a failing model call fails every request of the batch"""
+        # Arrange
+        batcher = EmbeddingBatcher(MagicMock(side_effect=RuntimeError("model crashed")), max_batch_size=16, max_wait_ms=1)
+        
+        # Act
+        results = await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+        
+        # Assert
+        assert all(isinstance(result, RuntimeError) for result in results)
+    
+    @pytest.mark.asyncio
+    async def test_batch_task_is_held_until_done(self, embed_batch):
+        """Tests that an in-flight batch task is referenced by the batcher and released when it finishes"""
+        # Arrange
+        release = threading.Event()
+        embed_batch.side_effect = lambda texts: release.wait(5) and [[float(len(text))] for text in texts]
+        batcher = EmbeddingBatcher(embed_batch, max_batch_size=1, max_wait_ms=10_000)
+        
+        # Act
+        request = asyncio.ensure_future(batcher.embed("abc"))
+        await asyncio.sleep(0.01)
+        gc.collect()
+        in_flight = len(batcher._tasks)
+        release.set()
+        result = await asyncio.wait_for(request, timeout=5)
+        
+        # Assert
+        assert in_flight == 1
+        assert result == [3.0]
+        assert batcher._tasks == set()
@@ -0,0 +1,90 @@
+import os
+import pytest
+from unittest.mock import MagicMock
+from src.services.document import EmbeddingCache, CachedEmbeddings
+
+class TestCachedEmbeddings:
+
+    @pytest.fixture
+    def cache(self, temp_vector_store):
+        cache = EmbeddingCache(os.path.join(temp_vector_store, "cache", "embeddings.sqlite3"))
+        yield cache
+        cache.close()
+
+    @pytest.fixture
+    def model(self):
+        model = MagicMock()
+        model.embed_documents.side_effect = lambda texts: [[float(len(text)), 1.0] for text in texts]
+        return model
+
+    def test_embed_queries_batches_without_persisting(self, cache, model):
+        """Tests that batched queries go through one model call and are not stored in the cache"""
+        # Arrange
+        model.query_encode_kwargs = {}
+        embeddings = CachedEmbeddings(model, cache, "test-model")
+
+        # Act
+        result = embeddings.embed_queries(["alpha", "beta"])
+
+        # Assert
+        assert result == [[5.0, 1.0], [4.0, 1.0]]
+        model.embed_documents.assert_called_once_with(["alpha", "beta"])
+        assert len(cache) == 0
+
+    def test_only_misses_are_embedded(self, cache, model):
+        """Tests that cached texts are not sent to the model again"""
+        # Arrange
+        embeddings = CachedEmbeddings(model, cache, "test-model")
+        embeddings.embed_documents(["alpha", "beta"])
+
+        # Act
+        result = embeddings.embed_documents(["alpha", "gamma!", "beta"])
+
+        # Assert
+        assert result == [[5.0, 1.0], [6.0, 1.0], [4.0, 1.0]]
+        assert model.embed_documents.call_count == 2
+        model.embed_documents.assert_called_with(["gamma!"])
+        assert embeddings.stats()["hits"] == 2
+        assert embeddings.stats()["misses"] == 3
+        assert embeddings.stats()["entries"] == 3
+
+    def test_cache_persists_across_instances(self, cache, model, temp_vector_store):
+        """Tests that vectors survive a restart of the cache"""
+        # Arrange
+        CachedEmbeddings(model, cache, "test-model").embed_documents(["alpha"])
+        cache.close()
+        reopened = EmbeddingCache(cache.cache_path)
+        embeddings = CachedEmbeddings(model, reopened, "test-model")
+
+        # Act
+        result = embeddings.embed_documents(["alpha"])
+
+        # Assert
+        assert result == [[5.0, 1.0]]
+        assert model.embed_documents.call_count == 1
+        reopened.close()
+
+    def test_model_name_is_part_of_the_key(self, cache, model):
+        """Tests that vectors of a different model are not reused"""
+        # Arrange
+        CachedEmbeddings(model, cache, "model-a").embed_documents(["alpha"])
+        embeddings = CachedEmbeddings(model, cache, "model-b")
+
+        # Act
+        embeddings.embed_documents(["alpha"])
+
+        # Assert
+        assert model.embed_documents.call_count == 2
+        assert embeddings.stats()["misses"] == 1
+
+    def test_duplicate_texts_are_embedded_once(self, cache, model):
+        """Tests that repeated texts in one call are only embedded once"""
+        # Arrange
+        embeddings = CachedEmbeddings(model, cache, "test-model")
+
+        # Act
+        result = embeddings.embed_documents(["alpha", "alpha"])
+
+        # Assert
+        assert result == [[5.0, 1.0], [5.0, 1.0]]
+        model.embed_documents.assert_called_once_with(["alpha"])
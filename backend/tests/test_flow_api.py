@@ -2,6 +2,8 @@ import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
 import pytest_asyncio
 from src.services.flow_api import FlowAPIService
+from src.config.prompts import PROMPTS
+from src.utils.context_packer import PackedContext
 
 class TestFlowAPIService:
     
@@ -43,6 +45,32 @@ class TestFlowAPIService:
         mock_token_manager_instance.get_valid_token.assert_called_once()
         mock_chat_openai.assert_called_once()
     
+    @pytest.mark.asyncio
+    @patch('src.services.flow_api.TokenManager')
+    @patch('src.services.flow_api.ChatOpenAI')
+    async def test_get_chat_model_rebuilt_only_on_token_rotation(self, mock_chat_openai, mock_token_manager):
+        """Tests that the chat model is reused until the token changes and shares the pooled client"""
+        # Arrange
+        mock_token_manager_instance = AsyncMock()
+        mock_token_manager_instance.get_valid_token.side_effect = ["token_1", "token_1", "token_2"]
+        mock_token_manager.return_value = mock_token_manager_instance
+        mock_chat_openai.side_effect = [MagicMock(), MagicMock()]
+        
+        service = FlowAPIService()
+        
+        # Act
+        first = await service._get_chat_model()
+        second = await service._get_chat_model()
+        third = await service._get_chat_model()
+        
+        # Assert
+        assert first is second
+        assert third is not first
+        assert mock_chat_openai.call_count == 2
+        assert mock_chat_openai.call_args.kwargs["api_key"] == "token_2"
+        assert mock_chat_openai.call_args.kwargs["http_async_client"] is service.http_client
+        mock_token_manager.assert_called_once_with(http_client=service.http_client)
+    
     @pytest.mark.asyncio
     @patch('src.services.flow_api.TokenManager')
     @patch('src.services.flow_api.ChatOpenAI')
@@ -66,7 +94,7 @@ class TestFlowAPIService:
         
         mock_response = MagicMock()
         mock_response.content = "This is a test response"
-        mock_chat_model.invoke.return_value = mock_response
+        mock_chat_model.ainvoke = AsyncMock(return_value=mock_response)
         
         service = FlowAPIService()
         
@@ -76,9 +104,10 @@ class TestFlowAPIService:
         # Assert
         assert result["status"] == "success"
         assert result["response"] == "This is a test response"
-        mock_system_message.assert_called_once_with(content="You are a helpful assistant.")
+        mock_system_message.assert_called_once_with(content=PROMPTS["base"])
         mock_human_message.assert_called_once_with(content="What is AI?")
-        mock_chat_model.invoke.assert_called_once_with([mock_system_msg, mock_human_msg])
+        mock_chat_model.ainvoke.assert_awaited_once_with([mock_system_msg, mock_human_msg])
+        mock_chat_model.invoke.assert_not_called()
     
     @pytest.mark.asyncio
     @patch('src.services.flow_api.TokenManager')
@@ -103,7 +132,7 @@ class TestFlowAPIService:
         
         mock_response = MagicMock()
         mock_response.content = "This is a test response with context"
-        mock_chat_model.invoke.return_value = mock_response
+        mock_chat_model.ainvoke = AsyncMock(return_value=mock_response)
         
         service = FlowAPIService()
         context_chunks = ["Chunk 1 about AI", "Chunk 2 about AI"]
@@ -116,7 +145,36 @@ class TestFlowAPIService:
         assert result["response"] == "This is a test response with context"
         mock_system_message.assert_called_once()
         mock_human_message.assert_called_once_with(content="What is AI?")
-        mock_chat_model.invoke.assert_called_once()
+        mock_chat_model.ainvoke.assert_awaited_once()
+        assert result["context_tokens"]["tokens_used"] > 0
+        assert result["context_tokens"]["tokens_dropped"] == 0
+    
+    @pytest.mark.asyncio
+    @patch('src.services.flow_api.TokenManager')
+    @patch('src.services.flow_api.ChatOpenAI')
+    @patch('src.services.flow_api.SystemMessage')
+    async def test_generate_response_packs_context_into_budget(self, mock_system_message, mock_chat_openai, mock_token_manager):
+        """Tests that only the chunks fitting the token budget reach the prompt"""
+        # Arrange
+        mock_token_manager_instance = AsyncMock()
+        mock_token_manager_instance.get_valid_token.return_value = "test_token"
+        mock_token_manager.return_value = mock_token_manager_instance
+        
+        mock_chat_model = MagicMock()
+        mock_chat_model.ainvoke = AsyncMock(return_value=MagicMock(content="Answer"))
+        mock_chat_openai.return_value = mock_chat_model
+        
+        context_packer = MagicMock()
+        context_packer.pack.return_value = PackedContext(chunks=["Chunk 1 about AI"], tokens_used=5, tokens_dropped=5, chunks_dropped=1)
+        service = FlowAPIService(context_packer=context_packer)
+        
+        # Act
+        result = await service.generate_response("What is AI?", ["Chunk 1 about AI", "Chunk 2 about AI"])
+        
+        # Assert
+        context_packer.pack.assert_called_once_with(["Chunk 1 about AI", "Chunk 2 about AI"])
+        mock_system_message.assert_called_once_with(content=PROMPTS["rag"].format(context="Chunk 1 about AI"))
+        assert result["context_tokens"] == {"tokens_used": 5, "tokens_dropped": 5, "chunks_truncated": 0, "chunks_dropped": 1}
     
     @pytest.mark.asyncio
     @patch('src.services.flow_api.TokenManager')
@@ -130,7 +188,7 @@ class TestFlowAPIService:
         
         mock_chat_model = MagicMock()
         mock_chat_openai.return_value = mock_chat_model
-        mock_chat_model.invoke.side_effect = Exception("Test error")
+        mock_chat_model.ainvoke = AsyncMock(side_effect=Exception("Test error"))
         
         service = FlowAPIService()
         
@@ -139,4 +197,30 @@ class TestFlowAPIService:
         
         # Assert
         assert result["status"] == "error"
-        assert "Test error" in result["message"]
\ No newline at end of file
+        assert "Test error" in result["message"]
+    
+    @pytest.mark.asyncio
+    @patch('src.services.flow_api.TokenManager')
+    @patch('src.services.flow_api.ChatOpenAI')
+    async def test_stream_response(self, mock_chat_openai, mock_token_manager):
+        """Tests that response tokens are yielded as they arrive"""
+        # Arrange
+        mock_token_manager_instance = AsyncMock()
+        mock_token_manager_instance.get_valid_token.return_value = "test_token"
+        mock_token_manager.return_value = mock_token_manager_instance
+        
+        async def fake_astream(messages):
+            for content in ["AI ", "", "is..."]:
+                yield MagicMock(content=content)
+        
+        mock_chat_model = MagicMock()
+        mock_chat_model.astream = fake_astream
+        mock_chat_openai.return_value = mock_chat_model
+        
+        service = FlowAPIService()
+        
+        # Act
+        tokens = [token async for token in service.stream_response("What is AI?", ["Chunk 1 about AI"])]
+        
+        # Assert
+        assert tokens == ["AI ", "is..."]
@@ -0,0 +1,73 @@
+import time
+import pytest
+from src.services.ingestion_jobs import IngestionJobManager
+
+def wait_for(job_manager, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = job_manager.get(job_id)
+        if job["status"] in (IngestionJobManager.DONE, IngestionJobManager.FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+class TestIngestionJobManager:
+    
+    @pytest.fixture
+    def job_manager(self):
+        job_manager = IngestionJobManager(max_workers=2, history_size=10)
+        yield job_manager
+        job_manager.shutdown()
+    
+    def test_successful_job(self, job_manager):
+        """Tests that a job reports chunks and timings once done"""
+        # Act
+        job = job_manager.submit(
+            lambda path: {"status": "success", "message": f"indexed {path}", "chunks": 7},
+            "file.pdf",
+            document_id="doc-1"
+        )
+        finished = wait_for(job_manager, job["job_id"])
+        
+        # Assert
+        assert job["status"] == IngestionJobManager.QUEUED
+        assert finished["status"] == IngestionJobManager.DONE
+        assert finished["message"] == "indexed file.pdf"
+        assert finished["chunks"] == 7
+        assert finished["document_id"] == "doc-1"
+        assert finished["queued_seconds"] >= 0
+        assert finished["processing_seconds"] >= 0
+    
+    def test_failed_jobs(self, job_manager):
+        """Tests that error results and exceptions mark the job as failed"""
+        # Arrange
+        def raise_error():
+            raise ValueError("boom")
+        
+        # Act
+        error_result = job_manager.submit(lambda: {"status": "error", "message": "bad file"})
+        exception = job_manager.submit(raise_error)
+        
+        # Assert
+        assert wait_for(job_manager, error_result["job_id"])["status"] == IngestionJobManager.FAILED
+        failed = wait_for(job_manager, exception["job_id"])
+        assert failed["status"] == IngestionJobManager.FAILED
+        assert "boom" in failed["message"]
+    
+    def test_history_is_bounded(self, job_manager):
+        """Tests that the oldest finished jobs are forgotten"""
+        # Arrange
+        first = job_manager.submit(lambda: {"status": "success", "message": "ok"})
+        wait_for(job_manager, first["job_id"])
+        
+        # Act
+        for _ in range(10):
+            wait_for(job_manager, job_manager.submit(lambda: {"status": "success", "message": "ok"})["job_id"])
+        
+        # Assert
+        assert job_manager.get(first["job_id"]) is None
+        assert sum(job_manager.stats().values()) <= 11
+    
+    def test_unknown_job(self, job_manager):
+        """Tests looking up a job that does not exist"""
+        assert job_manager.get("missing") is None
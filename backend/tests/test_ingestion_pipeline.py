@@ -0,0 +1,115 @@
+import os
+import pytest
+from unittest.mock import MagicMock
+from src.services.document import IngestionPipeline, DocumentProcessor
+
+class TestIngestionPipeline:
+    
+    @pytest.fixture
+    def files(self, temp_docs_dir):
+        """Creates three text files producing several chunks each"""
+        paths = []
+        for i in range(3):
+            path = os.path.join(temp_docs_dir, f"doc{i}.txt")
+            with open(path, "w") as f:
+                f.write("\n\n".join(f"Paragraph {j} of document {i}. " * 4 for j in range(5)))
+            paths.append(path)
+        return paths
+    
+    @pytest.fixture
+    def vector_store_manager(self):
+        manager = MagicMock()
+        manager.add_documents_to_existing_store.return_value = True
+        manager.delete_documents.return_value = True
+        return manager
+    
+    def _pipeline(self, vector_store_manager, progress=None, batch_size=4):
+        return IngestionPipeline(
+            processor=DocumentProcessor(chunk_size=120, chunk_overlap=0),
+            vector_store_manager=vector_store_manager,
+            batch_size=batch_size,
+            max_workers=1,
+            progress_callback=progress or MagicMock()
+        )
+    
+    def test_batches_are_bounded(self, files, vector_store_manager):
+        """Tests that chunks are committed in batches no larger than the batch size"""
+        # Act
+        stats = self._pipeline(vector_store_manager).run(files)
+        
+        # Assert
+        batch_sizes = [len(call.args[0]) for call in vector_store_manager.add_documents_to_existing_store.call_args_list]
+        assert max(batch_sizes) <= 4
+        assert sum(batch_sizes) == stats["chunks"]
+        assert stats["batches"] == len(batch_sizes)
+        assert stats["files_indexed"] == 3
+    
+    def test_files_are_reported_after_their_chunks_are_committed(self, files, vector_store_manager):
+        """Tests that a file is only reported once all of its chunk ids were added"""
+        # Arrange
+        committed = set()
+        vector_store_manager.add_documents_to_existing_store.side_effect = \
+            lambda docs, ids: committed.update(ids) or True
+        indexed = {}
+        
+        def on_file_indexed(file_path, file_hash, chunk_ids):
+            assert set(chunk_ids) <= committed
+            indexed[file_path] = chunk_ids
+        
+        # Act
+        self._pipeline(vector_store_manager).run(files, on_file_indexed=on_file_indexed)
+        
+        # Assert
+        assert list(indexed) == files
+        assert sum(len(ids) for ids in indexed.values()) == len(committed)
+    
+    def test_progress_is_reported_per_batch(self, files, vector_store_manager):
+        """Tests that the progress callback receives running statistics"""
+        # Arrange
+        progress = MagicMock()
+        
+        # Act
+        stats = self._pipeline(vector_store_manager, progress=progress).run(files)
+        
+        # Assert
+        assert progress.call_count >= stats["batches"]
+        assert progress.call_args.args[0]["files_indexed"] == 3
+    
+    def test_failed_batch_raises(self, files, vector_store_manager):
+        """Tests that a batch rejected by the vector store stops the run"""
+        # Arrange
+        vector_store_manager.add_documents_to_existing_store.return_value = False
+        on_file_indexed = MagicMock()
+        
+        # Act / Assert
+        with pytest.raises(RuntimeError):
+            self._pipeline(vector_store_manager).run(files, on_file_indexed=on_file_indexed)
+        on_file_indexed.assert_not_called()
+    
+    def test_failed_files_are_reported(self, files, vector_store_manager, temp_docs_dir):
+        """Tests that files failing to load or to chunk are skipped, rolled back and reported"""
+        # Arrange
+        broken_pdf = os.path.join(temp_docs_dir, "broken.pdf")
+        with open(broken_pdf, "wb") as f:
+            f.write(b"not a pdf")
+        pipeline = self._pipeline(vector_store_manager)
+        iter_chunks = pipeline.processor.iter_chunks
+        
+        def fail_on_second_file(documents):
+            for chunk in iter_chunks(documents):
+                if chunk.metadata["source"] == files[1]:
+                    raise ValueError("cannot sanitize")
+                yield chunk
+        
+        pipeline.processor.iter_chunks = fail_on_second_file
+        on_file_indexed, on_file_failed = MagicMock(), MagicMock()
+        
+        # Act
+        stats = pipeline.run([broken_pdf] + files, on_file_indexed=on_file_indexed, on_file_failed=on_file_failed)
+        
+        # Assert
+        assert [call.args[0] for call in on_file_failed.call_args_list] == [broken_pdf, files[1]]
+        assert on_file_failed.call_args.args[1] == "cannot sanitize"
+        assert [call.args[0] for call in on_file_indexed.call_args_list] == [files[0], files[2]]
+        assert stats["files_failed"] == 2
+        assert stats["files_indexed"] == 2
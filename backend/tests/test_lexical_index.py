@@ -0,0 +1,169 @@
+import os
+from langchain.schema import Document
+from src.services.document.lexical_index import BM25Index, reciprocal_rank_fusion
+
+class TestBM25Index:
+
+    def make_index(self, directory):
+        index = BM25Index(os.path.join(directory, "bm25_index.json"))
+        index.add(
+            [
+                Document(page_content="Error ERR-1042 means the payment gateway timed out", metadata={"source": "errors.txt"}),
+                Document(page_content="The payment policy covers refunds and chargebacks", metadata={"source": "policy.txt"}),
+                Document(page_content="Shipping takes five business days", metadata={"source": "shipping.txt"}),
+            ],
+            ["e-1", "p-1", "s-1"]
+        )
+        return index
+    
+    def test_tokenize_keeps_identifiers_and_parts(self):
+        """Tests that identifiers are indexed whole and by their parts, without stopwords"""
+        # Act
+        terms = BM25Index.tokenize("What is ERR-1042?")
+        
+        # Assert
+        assert terms == ["err-1042", "err", "1042"]
+    
+    def test_search_finds_exact_identifier(self, temp_docs_dir):
+        """Tests that an exact identifier ranks its chunk first"""
+        # Arrange
+        index = self.make_index(temp_docs_dir)
+        
+        # Act
+        results = index.search("what does err-1042 mean", k=2)
+        
+        # Assert
+        assert results[0].id == "e-1"
+        assert results[0].metadata["source"] == "errors.txt"
+        assert results[0].metadata["bm25_score"] > 0
+    
+    def test_search_without_matching_terms(self, temp_docs_dir):
+        """Tests that a query without indexed terms returns nothing"""
+        # Arrange
+        index = self.make_index(temp_docs_dir)
+        
+        # Act
+        results = index.search("what is it", k=3)
+        
+        # Assert
+        assert results == []
+    
+    def test_common_terms_only_rescore_matched_chunks(self, temp_docs_dir):
+        """Tests that a term found in most chunks does not pull in chunks matching nothing rarer"""
+        # Arrange
+        index = self.make_index(temp_docs_dir)
+        index.add([Document(page_content="Payment ERR-1042 retried")], ["e-2"])
+        
+        # Act
+        with_rare_term = index.search("payment err-1042", k=5)
+        common_only = index.search("payment", k=5)
+        
+        # Assert
+        assert sorted(doc.id for doc in with_rare_term) == ["e-1", "e-2"]
+        assert sorted(doc.id for doc in common_only) == ["e-1", "e-2", "p-1"]
+    
+    def test_delete_and_replace(self, temp_docs_dir):
+        """Tests that deleted chunks are no longer found and re-added ids replace their text"""
+        # Arrange
+        index = self.make_index(temp_docs_dir)
+        
+        # Act
+        index.delete(["e-1"])
+        index.add([Document(page_content="Shipping takes two days")], ["s-1"])
+        
+        # Assert
+        assert index.search("ERR-1042", k=3) == []
+        assert index.search("shipping", k=3)[0].page_content == "Shipping takes two days"
+        assert len(index) == 2
+    
+    def test_persists_only_when_changed(self, temp_docs_dir):
+        """Tests that the index is saved when changed and loaded back"""
+        # Arrange
+        index = self.make_index(temp_docs_dir)
+        empty = BM25Index(os.path.join(temp_docs_dir, "other", "bm25_index.json"))
+        
+        # Act
+        index.save()
+        empty.save()
+        reloaded = BM25Index(index.index_path)
+        
+        # Assert
+        assert not empty.exists()
+        assert len(reloaded) == 3
+        assert reloaded.search("refunds", k=1)[0].id == "p-1"
+    
+    def test_saves_append_changes_until_compaction(self, temp_docs_dir):
+        """Tests that small saves append to the log instead of rewriting the snapshot, and reload the same index"""
+        # Arrange
+        index = self.make_index(temp_docs_dir)
+        index.add([Document(page_content=f"Note {n}") for n in range(10)], [f"n-{n}" for n in range(10)])
+        index.save()
+        with open(index.index_path) as f:
+            snapshot = f.read()
+        
+        # Act
+        index.add([Document(page_content="Returns need a receipt")], ["r-1"])
+        index.save()
+        index.delete(["s-1"])
+        index.save()
+        with open(index.index_path) as f:
+            snapshot_after_appends = f.read()
+        reloaded = BM25Index(index.index_path)
+        index.add([Document(page_content=f"Memo {n}") for n in range(10)], [f"m-{n}" for n in range(10)])
+        index.save()
+        
+        # Assert
+        assert snapshot_after_appends == snapshot
+        assert sorted(doc.id for doc in reloaded.search("receipt shipping", k=5)) == ["r-1"]
+        assert len(reloaded) == 13
+        with open(index.index_path) as f:
+            assert f.read() != snapshot
+        assert len(BM25Index(index.index_path)) == 23
+    
+    def test_load_recovers_from_interrupted_saves(self, temp_docs_dir):
+        """Tests that a partly written log record is dropped and a log older than the snapshot is ignored"""
+        # Arrange
+        index = self.make_index(temp_docs_dir)
+        index.add([Document(page_content=f"Note {n}") for n in range(10)], [f"n-{n}" for n in range(10)])
+        index.save()
+        index.add([Document(page_content="Returns need a receipt")], ["r-1"])
+        index.save()
+        with open(index.log_path, 'a') as f:
+            f.write('{"id": "x-1", "text": "Trunc')
+        
+        # Act
+        recovered = BM25Index(index.index_path)
+        recovered.delete(["p-1"])
+        recovered.save()
+        after_append = BM25Index(index.index_path)
+        with open(index.log_path, 'w') as f:
+            f.write('{"generation": 0}\n{"delete": "e-1"}\n')
+        stale_log = BM25Index(index.index_path)
+        
+        # Assert
+        assert len(recovered) == 13
+        assert sorted(doc.id for doc in after_append.search("receipt refunds", k=5)) == ["r-1"]
+        assert len(stale_log) == 13
+        assert stale_log.search("ERR-1042", k=1)[0].id == "e-1"
+        assert not os.path.exists(index.log_path)
+
+class TestReciprocalRankFusion:
+
+    def test_fuses_rankings(self):
+        """Tests that chunks found by both rankings rise to the top and keep both scores"""
+        # Arrange
+        dense = [
+            Document(page_content="a", metadata={"relevance_score": 0.9}, id="a"),
+            Document(page_content="b", metadata={"relevance_score": 0.8}, id="b"),
+        ]
+        lexical = [
+            Document(page_content="c", metadata={"bm25_score": 7.0}, id="c"),
+            Document(page_content="b", metadata={"bm25_score": 3.0}, id="b"),
+        ]
+        
+        # Act
+        fused = reciprocal_rank_fusion([dense, lexical], k=2)
+        
+        # Assert
+        assert [doc.id for doc in fused] == ["b", "a"]
+        assert fused[0].metadata == {"relevance_score": 0.8, "bm25_score": 3.0}
@@ -0,0 +1,46 @@
+from src.utils.lru_cache import LRUCache
+
+class TestLRUCache:
+    
+    def test_get_and_set(self):
+        """Tests that stored values are returned and counted as hits"""
+        # Arrange
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+        
+        # Act
+        hit = cache.get("a")
+        miss = cache.get("b")
+        
+        # Assert
+        assert hit == 1
+        assert miss is None
+        assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1}
+    
+    def test_evicts_least_recently_used(self):
+        """Tests that the least recently used key is evicted when full"""
+        # Arrange
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        
+        # Act
+        cache.set("c", 3)
+        
+        # Assert
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+    
+    def test_disabled_when_size_is_zero(self):
+        """Tests that a zero-sized cache stores nothing"""
+        # Arrange
+        cache = LRUCache(max_size=0)
+        
+        # Act
+        cache.set("a", 1)
+        
+        # Assert
+        assert cache.get("a") is None
+        assert len(cache) == 0
@@ -0,0 +1,192 @@
+import os
+import pytest
+from langchain.schema import Document
+from src.services.document.vector_backends import NumpyBackend, ChromaBackend, get_backend_class
+
+class KeywordEmbeddings:
+    """Embeds a text by counting the occurrences of a few keywords"""
+    
+    KEYWORDS = ["payment", "refund", "shipping", "error"]
+    
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+    
+    def embed_query(self, text):
+        words = text.lower().split()
+        return [float(words.count(keyword)) + 0.01 for keyword in self.KEYWORDS]
+
+class TestNumpyBackend:
+
+    def make_backend(self, directory):
+        return NumpyBackend.create(
+            directory,
+            KeywordEmbeddings(),
+            [
+                Document(page_content="payment error", metadata={"source": "errors.txt"}),
+                Document(page_content="refund refund policy", metadata={"source": "policy.txt"}),
+                Document(page_content="shipping times", metadata={"source": "shipping.txt"}),
+            ],
+            ["e-1", "p-1", "s-1"]
+        )
+    
+    def test_search_returns_nearest_chunks(self, temp_docs_dir):
+        """Tests that search ranks chunks by cosine similarity and keeps their ids and metadata"""
+        # Arrange
+        backend = self.make_backend(temp_docs_dir)
+        query = KeywordEmbeddings().embed_query("refund")
+        
+        # Act
+        results = backend.search(query, k=2)
+        
+        # Assert
+        assert [doc.id for doc, _ in results] == ["p-1", "e-1"]
+        assert results[0][0].metadata == {"source": "policy.txt"}
+        assert results[0][1] == pytest.approx(1.0, abs=0.01)
+        assert results[0][1] > results[1][1]
+    
+    def test_search_batch(self, temp_docs_dir):
+        """Tests that a batch of queries returns one ranking per query"""
+        # Arrange
+        backend = self.make_backend(temp_docs_dir)
+        embeddings = KeywordEmbeddings()
+        
+        # Act
+        results = backend.search_batch([embeddings.embed_query("shipping"), embeddings.embed_query("error")], k=10)
+        
+        # Assert
+        assert [len(ranking) for ranking in results] == [3, 3]
+        assert results[0][0][0].id == "s-1"
+        assert results[1][0][0].id == "e-1"
+    
+    def test_reload_replays_updates_and_deletes(self, temp_docs_dir):
+        """Tests that replaced and deleted chunks stay so after reloading from disk"""
+        # Arrange
+        backend = self.make_backend(temp_docs_dir)
+        backend.add([Document(page_content="shipping shipping delays")], ["s-1"])
+        backend.delete(["e-1"])
+        
+        # Act
+        reloaded = NumpyBackend(temp_docs_dir, KeywordEmbeddings())
+        results = reloaded.search(KeywordEmbeddings().embed_query("shipping"), k=5)
+        
+        # Assert
+        assert NumpyBackend.exists(temp_docs_dir)
+        assert len(reloaded) == 2
+        assert [doc.id for doc, _ in results] == ["s-1", "p-1"]
+        assert results[0][0].page_content == "shipping shipping delays"
+    
+    def test_compacts_after_most_rows_are_deleted(self, temp_docs_dir):
+        """Tests that the files are rewritten without deleted rows"""
+        # Arrange
+        backend = self.make_backend(temp_docs_dir)
+        
+        # Act
+        backend.delete(["e-1", "s-1"])
+        reloaded = NumpyBackend(temp_docs_dir, KeywordEmbeddings())
+        
+        # Assert
+        assert reloaded.generation == 1
+        assert os.path.getsize(reloaded._data_file(NumpyBackend.VECTORS_FILE)) == 4 * 4
+        assert not os.path.exists(os.path.join(temp_docs_dir, NumpyBackend.VECTORS_FILE))
+        assert [doc.id for doc, _ in reloaded.search([0.0, 1.0, 0.0, 0.0], k=5)] == ["p-1"]
+    
+    @pytest.mark.parametrize("crash_at", ["_write_meta", "_remove_other_generations"])
+    def test_interrupted_compaction_keeps_vectors_and_chunks_paired(self, temp_docs_dir, crash_at):
+        """Tests that a compaction stopped before or after its commit loads the vectors with their own chunks"""
+        # Arrange
+        backend = self.make_backend(temp_docs_dir)
+        
+        def crash(*args, **kwargs):
+            raise IOError("crashed")
+        
+        setattr(backend, crash_at, crash)
+        
+        # Act
+        with pytest.raises(IOError):
+            backend.delete(["e-1", "s-1"])
+        reloaded = NumpyBackend(temp_docs_dir, KeywordEmbeddings())
+        results = reloaded.search(KeywordEmbeddings().embed_query("refund"), k=5)
+        
+        # Assert
+        assert reloaded.generation == (0 if crash_at == "_write_meta" else 1)
+        assert [(doc.id, doc.page_content) for doc, _ in results] == [("p-1", "refund refund policy")]
+        assert sorted(os.listdir(temp_docs_dir)) == sorted([
+            os.path.basename(reloaded._data_file(NumpyBackend.CHUNKS_FILE)),
+            os.path.basename(reloaded._data_file(NumpyBackend.VECTORS_FILE)),
+            NumpyBackend.META_FILE
+        ])
+    
+    def test_compaction_during_search_keeps_rows_matched(self, temp_docs_dir):
+        """Tests that a compaction renumbering rows while a search is scoring does not mismatch documents"""
+        # Arrange
+        backend = self.make_backend(temp_docs_dir)
+        select = backend._select
+        
+        def delete_then_select(*args, **kwargs):
+            backend.delete(["e-1", "p-1"])
+            return select(*args, **kwargs)
+        
+        backend._select = delete_then_select
+        
+        # Act
+        results = backend.search(KeywordEmbeddings().embed_query("refund"), k=1)
+        
+        # Assert
+        assert len(backend) == 1
+        assert [doc.id for doc, _ in results] == ["p-1"]
+        assert results[0][0].page_content == "refund refund policy"
+    
+    def test_search_shares_chunk_list_that_writers_replace(self, temp_docs_dir):
+        """Tests that searches take the chunk list without copying and deletes or re-adds swap in a new list"""
+        # Arrange
+        backend = self.make_backend(temp_docs_dir)
+        query = backend._normalize([KeywordEmbeddings().embed_query("refund")])
+        
+        # Act
+        _, searched, _, _ = backend._top_k(query, 1)
+        shared = searched is backend._chunks
+        backend.delete(["s-1"])
+        after_delete = backend._chunks
+        backend.add([Document(page_content="refund")], ["p-1"])
+        
+        # Assert
+        assert shared
+        assert [entry[0] for entry in searched] == ["e-1", "p-1", "s-1"]
+        assert after_delete[2] is None and after_delete[1] is not None
+        assert backend._chunks is not after_delete
+    
+    def test_recovers_from_interrupted_write(self, temp_docs_dir):
+        """Tests that vectors written without their chunk records are dropped on load"""
+        # Arrange
+        self.make_backend(temp_docs_dir)
+        with open(os.path.join(temp_docs_dir, NumpyBackend.VECTORS_FILE), 'ab') as f:
+            f.write(b"\0" * 16)
+        
+        # Act
+        reloaded = NumpyBackend(temp_docs_dir, KeywordEmbeddings())
+        
+        # Assert
+        assert len(reloaded) == 3
+        assert os.path.getsize(os.path.join(temp_docs_dir, NumpyBackend.VECTORS_FILE)) == 3 * 4 * 4
+    
+    def test_search_with_embeddings_and_iteration(self, temp_docs_dir):
+        """Tests that stored embeddings are returned with the results and every chunk is iterated"""
+        # Arrange
+        backend = self.make_backend(temp_docs_dir)
+        
+        # Act
+        scored, embeddings = backend.search_with_embeddings([1.0, 0.0, 0.0, 1.0], k=1)
+        pages = list(backend.iter_documents(page_size=2))
+        
+        # Assert
+        assert scored[0][0].id == "e-1"
+        assert embeddings[0] == pytest.approx([0.7, 0.005, 0.005, 0.7], abs=0.01)
+        assert [ids for ids, _ in pages] == [["e-1", "p-1"], ["s-1"]]
+    
+    def test_get_backend_class(self):
+        """Tests looking up backends by name"""
+        # Assert
+        assert get_backend_class("numpy") is NumpyBackend
+        assert get_backend_class("chroma") is ChromaBackend
+        with pytest.raises(ValueError):
+            get_backend_class("faiss")
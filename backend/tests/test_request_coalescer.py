@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+from src.services.request_coalescer import RequestCoalescer
+
+class TestRequestCoalescer:
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_share_one_run(self):
+        """Tests that concurrent requests with the same key run the work once"""
+        # Arrange
+        coalescer = RequestCoalescer()
+        calls = []
+        
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"response": "Answer", "context": {"sources": []}}
+        
+        # Act
+        results = await asyncio.gather(*(coalescer.run("q", work) for _ in range(10)))
+        
+        # Assert
+        assert len(calls) == 1
+        assert all(result == {"response": "Answer", "context": {"sources": []}} for result in results)
+        assert results[0] is not results[1]
+        assert coalescer.stats() == {"leaders": 1, "followers": 9, "in_flight": 0}
+    
+    @pytest.mark.asyncio
+    async def test_sequential_requests_run_again(self):
+        """Tests that a request arriving after the previous one finished does the work again"""
+        # Arrange
+        coalescer = RequestCoalescer()
+        calls = []
+        
+        async def work():
+            calls.append(1)
+            return "Answer"
+        
+        # Act
+        await coalescer.run("q", work)
+        await coalescer.run("q", work)
+        
+        # Assert
+        assert len(calls) == 2
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_shared_work(self):
+        """Tests that a disconnecting leader does not cancel the work for the followers"""
+        # Arrange
+        coalescer = RequestCoalescer()
+        
+        async def work():
+            await asyncio.sleep(0.05)
+            return "Answer"
+        
+        leader = asyncio.ensure_future(coalescer.run("q", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(coalescer.run("q", work))
+        await asyncio.sleep(0)
+        
+        # Act
+        leader.cancel()
+        result = await follower
+        
+        # Assert
+        assert result == "Answer"
+    
+    @pytest.mark.asyncio
+    async def test_stream_is_broadcast_to_all_subscribers(self):
+        """Tests that concurrent streams share one source and late subscribers get every event"""
+        # Arrange
+        coalescer = RequestCoalescer()
+        calls = []
+        
+        async def source():
+            calls.append(1)
+            for token in ["A", "B", "C"]:
+                await asyncio.sleep(0.01)
+                yield {"event": "token", "content": token}
+        
+        async def collect(delay):
+            await asyncio.sleep(delay)
+            return [event async for event in coalescer.stream("q", source)]
+        
+        # Act
+        results = await asyncio.gather(collect(0), collect(0.015), collect(0.015))
+        
+        # Assert
+        assert len(calls) == 1
+        for events in results:
+            assert [event["content"] for event in events] == ["A", "B", "C"]
+    
+    @pytest.mark.asyncio
+    async def test_stream_error_is_raised_for_every_subscriber(self):
+        """Tests that a failing source ends every subscriber's stream with the error"""
+        # Arrange
+        coalescer = RequestCoalescer()
+        
+        async def source():
+            yield {"event": "token", "content": "A"}
+            raise RuntimeError("LLM unavailable")
+        
+        async def collect():
+            events = []
+            with pytest.raises(RuntimeError):
+                async for event in coalescer.stream("q", source):
+                    events.append(event)
+            return events
+        
+        # Act
+        results = await asyncio.gather(collect(), collect())
+        
+        # Assert
+        assert all(len(events) == 1 for events in results)
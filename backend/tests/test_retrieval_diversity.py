@@ -0,0 +1,97 @@
+from langchain.schema import Document
+from src.services.document.retrieval_diversity import (
+    maximal_marginal_relevance, merge_overlapping, collapse_neighbor_chunks
+)
+
+class TestMaximalMarginalRelevance:
+
+    def test_prefers_diverse_candidates(self):
+        """Tests that a near-copy of the best candidate loses to a less similar relevant one"""
+        # Arrange
+        query = [1.0, 0.0]
+        candidates = [[1.0, 0.1], [1.0, 0.12], [0.7, 0.7]]
+        
+        # Act
+        selected = maximal_marginal_relevance(query, candidates, k=2, lambda_mult=0.3, duplicate_similarity=None)
+        
+        # Assert
+        assert selected == [0, 2]
+    
+    def test_lambda_one_ranks_by_relevance(self):
+        """Tests that lambda 1 ignores diversity"""
+        # Arrange
+        query = [1.0, 0.0]
+        candidates = [[1.0, 0.1], [1.0, 0.12], [0.7, 0.7]]
+        
+        # Act
+        selected = maximal_marginal_relevance(query, candidates, k=3, lambda_mult=1.0, duplicate_similarity=None)
+        
+        # Assert
+        assert selected == [0, 1, 2]
+    
+    def test_suppresses_near_duplicates(self):
+        """Tests that candidates nearly identical to a selected one are never selected"""
+        # Arrange
+        query = [1.0, 0.0]
+        candidates = [[1.0, 0.0], [1.0, 0.001], [1.0, 0.002]]
+        
+        # Act
+        selected = maximal_marginal_relevance(query, candidates, k=3, lambda_mult=1.0, duplicate_similarity=0.95)
+        
+        # Assert
+        assert selected == [0]
+    
+    def test_no_candidates(self):
+        """Tests that nothing is selected from an empty candidate set"""
+        # Act
+        selected = maximal_marginal_relevance([1.0, 0.0], [], k=3)
+        
+        # Assert
+        assert selected == []
+
+class TestCollapseNeighborChunks:
+
+    def test_merge_overlapping_writes_shared_text_once(self):
+        """Tests that the overlap between consecutive chunks is not repeated"""
+        # Arrange
+        first = "The quick brown fox jumps over the lazy dog"
+        second = "jumps over the lazy dog and runs away"
+        
+        # Act
+        merged = merge_overlapping(first, second)
+        
+        # Assert
+        assert merged == "The quick brown fox jumps over the lazy dog and runs away"
+    
+    def test_collapses_consecutive_chunks_of_same_file(self):
+        """Tests that neighbor chunks become one passage in the place of the best ranked one"""
+        # Arrange
+        docs = [
+            Document(page_content="other file", metadata={"relevance_score": 0.9}, id="b-h-4"),
+            Document(page_content="jumps over the lazy dog and runs away", metadata={"relevance_score": 0.8}, id="a-h-2"),
+            Document(page_content="The quick brown fox jumps over the lazy dog", metadata={"relevance_score": 0.7}, id="a-h-1"),
+            Document(page_content="far away chunk", metadata={"relevance_score": 0.6}, id="a-h-7"),
+        ]
+        
+        # Act
+        passages = collapse_neighbor_chunks(docs)
+        
+        # Assert
+        assert [p.page_content for p in passages] == [
+            "other file",
+            "The quick brown fox jumps over the lazy dog and runs away",
+            "far away chunk",
+        ]
+        assert passages[1].metadata["relevance_score"] == 0.8
+        assert passages[1].id == "a-h-1"
+    
+    def test_keeps_documents_without_chunk_ids(self):
+        """Tests that documents without a chunk id are passed through"""
+        # Arrange
+        docs = [Document(page_content="one"), Document(page_content="two")]
+        
+        # Act
+        passages = collapse_neighbor_chunks(docs)
+        
+        # Assert
+        assert passages == docs
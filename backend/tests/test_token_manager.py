@@ -0,0 +1,197 @@
+import time
+import asyncio
+import jwt
+import pytest
+from unittest.mock import patch, AsyncMock
+from src.utils.token_manager import TokenManager
+
+def make_token(expires_in: float) -> dict:
+    """Builds token data holding an unsigned JWT expiring after the given number of seconds"""
+    return {"access_token": jwt.encode({"exp": int(time.time() + expires_in)}, "test-signing-key-that-is-long-enough", algorithm="HS256")}
+
+class TestTokenManager:
+    
+    @pytest.fixture
+    def manager(self, temp_docs_dir):
+        manager = TokenManager()
+        manager.token_file_path = f"{temp_docs_dir}/.flow_token.json"
+        return manager
+    
+    @pytest.mark.asyncio
+    async def test_token_served_from_memory(self, manager):
+        """Tests that the token file is only read on a cold start"""
+        # Arrange
+        token_data = make_token(3600)
+        manager._write_token_file(token_data)
+        
+        # Act
+        with patch.object(manager, '_read_token_file', wraps=manager._read_token_file) as read_file:
+            tokens = [await manager.get_valid_token() for _ in range(5)]
+        
+        # Assert
+        assert tokens == [token_data["access_token"]] * 5
+        read_file.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_refresh_is_single_flight(self, manager):
+        """Tests that concurrent requests finding the token expired share one refresh"""
+        # Arrange
+        new_token = make_token(3600)
+        
+        async def slow_fetch():
+            await asyncio.sleep(0.05)
+            return new_token
+        
+        manager._fetch_new_token = AsyncMock(side_effect=slow_fetch)
+        
+        # Act
+        tokens = await asyncio.gather(*(manager.get_valid_token() for _ in range(20)))
+        
+        # Assert
+        assert set(tokens) == {new_token["access_token"]}
+        manager._fetch_new_token.assert_awaited_once()
+        assert manager._read_token_file() == new_token
+    
+    @pytest.mark.asyncio
+    async def test_refresh_failure_falls_back_to_existing_token(self, manager):
+        """Tests that an expired token is still returned when the refresh fails"""
+        # Arrange
+        old_token = make_token(-10)
+        manager._write_token_file(old_token)
+        manager._fetch_new_token = AsyncMock(side_effect=Exception("auth unavailable"))
+        
+        # Act
+        token = await manager.get_valid_token()
+        
+        # Assert
+        assert token == old_token["access_token"]
+    
+    @pytest.mark.asyncio
+    async def test_refresh_failure_backs_off_with_unexpired_token(self, manager):
+        """Tests that after a failed refresh concurrent requests get the unexpired token without calling auth again"""
+        # Arrange
+        old_token = make_token(120)
+        manager._write_token_file(old_token)
+        
+        async def failing_fetch():
+            await asyncio.sleep(0.05)
+            raise Exception("auth unavailable")
+        
+        manager._fetch_new_token = AsyncMock(side_effect=failing_fetch)
+        
+        # Act
+        first = await manager.get_valid_token()
+        started = time.perf_counter()
+        tokens = await asyncio.gather(*(manager.get_valid_token() for _ in range(10)))
+        elapsed = time.perf_counter() - started
+        
+        # Assert
+        assert set(tokens) == {first} == {old_token["access_token"]}
+        manager._fetch_new_token.assert_awaited_once()
+        assert elapsed < 0.05
+    
+    @pytest.mark.asyncio
+    async def test_requests_do_not_wait_while_token_is_renewed(self, manager):
+        """Tests that an unexpired token is served while another request renews it"""
+        # Arrange
+        old_token = make_token(120)
+        manager._write_token_file(old_token)
+        new_token = make_token(3600)
+        
+        async def slow_fetch():
+            await asyncio.sleep(0.1)
+            return new_token
+        
+        manager._fetch_new_token = AsyncMock(side_effect=slow_fetch)
+        refresh = asyncio.create_task(manager.get_valid_token())
+        await asyncio.sleep(0.01)
+        
+        # Act
+        during = await asyncio.wait_for(manager.get_valid_token(), timeout=0.05)
+        after = await refresh
+        
+        # Assert
+        assert during == old_token["access_token"]
+        assert after == new_token["access_token"]
+        manager._fetch_new_token.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_token_in_expiry_buffer_is_renewed_without_background_task(self, manager):
+        """Tests that a token about to expire is renewed inline when no background task runs"""
+        # Arrange
+        manager._write_token_file(make_token(120))
+        new_token = make_token(3600)
+        manager._fetch_new_token = AsyncMock(return_value=new_token)
+        
+        # Act
+        token = await manager.get_valid_token()
+        
+        # Assert
+        assert token == new_token["access_token"]
+    
+    @pytest.mark.asyncio
+    async def test_token_in_expiry_buffer_is_renewed_while_background_task_sleeps(self, manager):
+        """Tests that a caller renews a token inside the expiry buffer while the background loop is asleep"""
+        # Arrange
+        manager.client_id, manager.client_secret = "client", "secret"
+        manager._write_token_file(make_token(3600))
+        new_token = make_token(7200)
+        manager._fetch_new_token = AsyncMock(return_value=new_token)
+        manager.start_background_refresh()
+        await asyncio.sleep(0.01)
+        manager._set_token(make_token(120))
+        
+        # Act
+        token = await manager.get_valid_token()
+        sleeping = not manager._refresh_task.done()
+        await manager.stop_background_refresh()
+        
+        # Assert
+        assert sleeping
+        assert token == new_token["access_token"]
+        manager._fetch_new_token.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_refresh_failure_without_token_raises(self, manager):
+        """Tests that a failed refresh with no token at all raises"""
+        # Arrange
+        manager._fetch_new_token = AsyncMock(side_effect=Exception("auth unavailable"))
+        
+        # Act / Assert
+        with pytest.raises(Exception, match="Could not obtain a valid token"):
+            await manager.get_valid_token()
+        with pytest.raises(Exception, match="Could not obtain a valid token"):
+            await manager.get_valid_token()
+        manager._fetch_new_token.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_background_refresh_renews_before_expiry_buffer(self, manager):
+        """Tests that the background task renews the token before requests see it expire"""
+        # Arrange
+        manager.client_id, manager.client_secret = "client", "secret"
+        manager.retry_delay = 0.01
+        manager._write_token_file(make_token(manager.expiry_buffer + 30))
+        new_token = make_token(3600)
+        manager._fetch_new_token = AsyncMock(return_value=new_token)
+        
+        # Act
+        manager.start_background_refresh()
+        await asyncio.sleep(0.1)
+        await manager.stop_background_refresh()
+        
+        # Assert
+        manager._fetch_new_token.assert_awaited_once()
+        assert manager._token_data == new_token
+        assert manager._refresh_task is None
+    
+    @pytest.mark.asyncio
+    async def test_background_refresh_requires_credentials(self, manager):
+        """Tests that no background task is started without client credentials"""
+        # Arrange
+        manager.client_id, manager.client_secret = "", ""
+        
+        # Act
+        manager.start_background_refresh()
+        
+        # Assert
+        assert manager._refresh_task is None
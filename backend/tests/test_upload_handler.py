@@ -0,0 +1,132 @@
+import os
+import io
+import hashlib
+import zipfile
+import pytest
+from unittest.mock import MagicMock
+from src.services.document import UploadHandler, UploadTooLargeError, UploadRegistry
+
+class FakeUploadFile:
+    """Minimal stand-in for FastAPI's UploadFile that records how much was read"""
+    
+    def __init__(self, content: bytes):
+        self._buffer = io.BytesIO(content)
+        self.bytes_read = 0
+    
+    async def read(self, size: int = -1) -> bytes:
+        chunk = self._buffer.read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+class TestUploadHandler:
+    
+    @pytest.fixture
+    def handler(self, temp_docs_dir):
+        return UploadHandler(uploads_folder=temp_docs_dir, processor=MagicMock())
+    
+    @pytest.mark.asyncio
+    async def test_save_upload_stream(self, handler):
+        """Tests that the stream is written, hashed and moved into the uploads folder"""
+        # Arrange
+        content = b"policy document " * 1000
+        
+        # Act
+        result = await handler.save_upload_stream(FakeUploadFile(content), "policy.pdf", max_size=10 ** 6, chunk_size=1024)
+        
+        # Assert
+        assert result["status"] == "success"
+        assert result["content_hash"] == hashlib.sha256(content).hexdigest()
+        assert result["size"] == len(content)
+        assert result["file_path"].endswith(f"{result['document_id']}.pdf")
+        with open(result["file_path"], "rb") as f:
+            assert f.read() == content
+        assert os.listdir(handler.uploads_folder) == [os.path.basename(result["file_path"])]
+    
+    @pytest.mark.asyncio
+    async def test_save_upload_stream_too_large(self, handler):
+        """Tests that the stream is aborted once the limit is crossed and nothing is left behind"""
+        # Arrange
+        upload = FakeUploadFile(b"x" * 100_000)
+        
+        # Act / Assert
+        with pytest.raises(UploadTooLargeError):
+            await handler.save_upload_stream(upload, "big.pdf", max_size=4096, chunk_size=1024)
+        assert upload.bytes_read <= 4096 + 1024
+        assert os.listdir(handler.uploads_folder) == []
+    
+    @pytest.mark.asyncio
+    async def test_save_upload_stream_unsupported_type(self, handler):
+        """Tests that unsupported files are rejected before reading"""
+        # Arrange
+        upload = FakeUploadFile(b"content")
+        
+        # Act
+        result = await handler.save_upload_stream(upload, "notes.docx", max_size=4096)
+        
+        # Assert
+        assert result["status"] == "error"
+        assert upload.bytes_read == 0
+    
+    def test_save_archive(self, handler):
+        """Tests that supported archive members are extracted and oversized or extra ones reported"""
+        # Arrange
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("policies/a.txt", "first policy")
+            zf.writestr("policies/b.txt", "second policy")
+            zf.writestr("policies/big.txt", "x" * 5000)
+            zf.writestr("policies/image.png", "not a document")
+            zf.writestr("policies/c.txt", "third policy")
+        archive.seek(0)
+        
+        # Act
+        results = handler.save_archive(archive, "kb.zip", max_size=4096, max_files=3)
+        
+        # Assert
+        assert [r["document_name"] for r in results] == ["kb.zip/a.txt", "kb.zip/b.txt", "kb.zip/big.txt", "kb.zip/c.txt"]
+        assert [r["status"] for r in results] == ["success", "success", "error", "error"]
+        assert results[0]["content_hash"] == hashlib.sha256(b"first policy").hexdigest()
+        with open(results[1]["file_path"]) as f:
+            assert f.read() == "second policy"
+        assert len(os.listdir(handler.uploads_folder)) == 2
+    
+    def test_save_archive_invalid(self, handler):
+        """Tests that a corrupt archive yields a single error result"""
+        # Act
+        results = handler.save_archive(io.BytesIO(b"not a zip"), "kb.zip", max_size=4096)
+        
+        # Assert
+        assert len(results) == 1
+        assert results[0]["status"] == "error"
+
+class TestUploadRegistry:
+    
+    def test_register_and_detect_duplicate(self, temp_docs_dir):
+        """Tests that a second upload of the same content returns the first document"""
+        # Arrange
+        registry_path = os.path.join(temp_docs_dir, ".upload_registry.json")
+        stored_path = os.path.join(temp_docs_dir, "first.pdf")
+        with open(stored_path, "wb") as f:
+            f.write(b"content")
+        registry = UploadRegistry(registry_path)
+        
+        # Act
+        first = registry.register_if_absent("hash", "first-id", "policy.pdf", stored_path)
+        second = UploadRegistry(registry_path).register_if_absent("hash", "second-id", "policy.pdf", "other.pdf")
+        
+        # Assert
+        assert first is None
+        assert second["document_id"] == "first-id"
+    
+    def test_missing_file_is_not_a_duplicate(self, temp_docs_dir):
+        """Tests that an entry whose file was deleted is replaced"""
+        # Arrange
+        registry = UploadRegistry(os.path.join(temp_docs_dir, ".upload_registry.json"))
+        registry.register_if_absent("hash", "first-id", "policy.pdf", os.path.join(temp_docs_dir, "gone.pdf"))
+        
+        # Act
+        result = registry.register_if_absent("hash", "second-id", "policy.pdf", "new.pdf")
+        
+        # Assert
+        assert result is None
+        assert registry.get("hash") is None
@@ -0,0 +1,137 @@
+import json
+import os
+import numpy as np
+import pytest
+from langchain.schema import Document
+from src.services.document.vector_backends import NumpyBackend
+from src.services.document.vector_backends.compression import VectorCompressor
+
+def make_vectors(rows, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((rows, 4)) @ rng.standard_normal((4, dim)) + 0.05 * rng.standard_normal((rows, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+class MatrixEmbeddings:
+    """Embeds "row <i>" as the i-th row of a matrix"""
+    
+    def __init__(self, vectors):
+        self.vectors = vectors
+    
+    def embed_documents(self, texts):
+        return [self.vectors[int(text.split()[1])].tolist() for text in texts]
+
+class TestVectorCompressor:
+
+    def test_int8_codes_approximate_inner_products(self):
+        """Tests that int8 codes with per-vector scales keep the scores close to the exact ones"""
+        # Arrange
+        vectors = make_vectors(50)
+        compressor = VectorCompressor(16, quantization="int8")
+        
+        # Act
+        codes, scales = compressor.encode(vectors)
+        scores = compressor.score(vectors[:3], codes, scales)
+        
+        # Assert
+        assert codes.dtype == np.int8
+        assert compressor.bytes_per_vector == 16 + 4
+        assert np.allclose(scores, vectors[:3] @ vectors.T, atol=0.02)
+    
+    def test_pca_keeps_the_principal_subspace(self):
+        """Tests that PCA to the rank of the data preserves inner products better than truncation"""
+        # Arrange
+        vectors = make_vectors(200)
+        pca = VectorCompressor(16, dimensions=4, reduction="pca")
+        truncate = VectorCompressor(16, dimensions=4, reduction="truncate")
+        
+        # Act
+        pca.fit(vectors)
+        pca_error = np.abs(pca.score(vectors, *pca.encode(vectors)) - vectors @ vectors.T).mean()
+        truncate_error = np.abs(truncate.score(vectors, *truncate.encode(vectors)) - vectors @ vectors.T).mean()
+        
+        # Assert
+        assert pca.projection.shape == (4, 16)
+        assert pca_error < 0.05 < truncate_error
+    
+    def test_refits_until_stable(self):
+        """Tests that principal components are refitted each time the vectors double"""
+        # Arrange
+        compressor = VectorCompressor(16, dimensions=4, reduction="pca")
+        
+        # Act
+        compressor.fit(make_vectors(10))
+        
+        # Assert
+        assert not compressor.needs_fit(19)
+        assert compressor.needs_fit(20)
+    
+    def test_rejects_unknown_parameters(self):
+        """Tests that unknown quantizations and reductions are rejected"""
+        # Assert
+        with pytest.raises(ValueError):
+            VectorCompressor(16, quantization="int4")
+        with pytest.raises(ValueError):
+            VectorCompressor(16, reduction="random")
+
+class TestNumpyBackendCompression:
+
+    def make_backend(self, directory, vectors, **options):
+        return NumpyBackend.create(
+            directory,
+            MatrixEmbeddings(vectors),
+            [Document(page_content=f"row {i}") for i in range(len(vectors))],
+            [f"r-{i}" for i in range(len(vectors))],
+            **options
+        )
+    
+    def test_rescoring_returns_exact_results(self, temp_docs_dir):
+        """Tests that the shortlist rescoring returns the exact ranking and cosine scores"""
+        # Arrange
+        vectors = make_vectors(300)
+        exact = self.make_backend(os.path.join(temp_docs_dir, "exact"), vectors, quantization="none", dimensions=0)
+        compact = self.make_backend(os.path.join(temp_docs_dir, "compact"), vectors, 
+                                    quantization="int8", dimensions=4, reduction="pca", rescore_factor=10)
+        
+        # Act
+        expected = exact.search_batch(vectors[:5].tolist(), k=5)
+        results = compact.search_batch(vectors[:5].tolist(), k=5)
+        
+        # Assert
+        assert compact.scanned_bytes_per_vector() == 8
+        for expected_ranking, ranking in zip(expected, results):
+            assert [doc.id for doc, _ in ranking] == [doc.id for doc, _ in expected_ranking]
+            assert [score for _, score in ranking] == pytest.approx([score for _, score in expected_ranking], abs=1e-5)
+    
+    def test_records_parameters_and_reencodes_on_change(self, temp_docs_dir):
+        """Tests that the compression parameters are stored with the index and applied again on load"""
+        # Arrange
+        vectors = make_vectors(40)
+        self.make_backend(temp_docs_dir, vectors, quantization="int8", dimensions=4, reduction="pca")
+        with open(os.path.join(temp_docs_dir, NumpyBackend.META_FILE)) as f:
+            meta = json.load(f)
+        projection = np.load(os.path.join(temp_docs_dir, NumpyBackend.PROJECTION_FILE))
+        
+        # Act
+        same = NumpyBackend(temp_docs_dir, MatrixEmbeddings(vectors), quantization="int8", dimensions=4, reduction="pca")
+        changed = NumpyBackend(temp_docs_dir, MatrixEmbeddings(vectors), quantization="int8", dimensions=0)
+        
+        # Assert
+        assert meta["compression"] == {"quantization": "int8", "dimensions": 4, "reduction": "pca", "fitted_rows": 40}
+        assert np.array_equal(same.compressor.projection, projection)
+        assert changed.compressor.dimensions == 16
+        assert not os.path.exists(os.path.join(temp_docs_dir, NumpyBackend.PROJECTION_FILE))
+        assert os.path.getsize(os.path.join(temp_docs_dir, NumpyBackend.CODES_FILE)) == 40 * 16
+        assert changed.search(vectors[7].tolist(), k=1)[0][0].id == "r-7"
+    
+    def test_compaction_keeps_codes_in_sync(self, temp_docs_dir):
+        """Tests that deleting most rows rewrites the codes of the kept rows"""
+        # Arrange
+        vectors = make_vectors(20)
+        backend = self.make_backend(temp_docs_dir, vectors, quantization="int8")
+        
+        # Act
+        backend.delete([f"r-{i}" for i in range(15)])
+        
+        # Assert
+        assert os.path.getsize(os.path.join(temp_docs_dir, NumpyBackend.CODES_FILE)) == 5 * 16
+        assert backend.search(vectors[17].tolist(), k=1)[0][0].id == "r-17"
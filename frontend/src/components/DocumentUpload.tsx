@@ -75,7 +75,8 @@ const DocumentUpload: React.FC<DocumentUploadProps> = ({
       // Use the uploadDocument function from api.ts
       const response = await uploadDocument(selectedFile);
 
-      if (response.status === 'success' && response.document_id && response.document_name) {
+      const accepted = response.status === 'success' || response.status === 'accepted';
+      if (accepted && response.document_id && response.document_name) {
         onUploadSuccess(response.document_name, response.document_id);
         setSelectedFile(null);
       } else {
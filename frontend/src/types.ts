@@ -40,4 +40,5 @@ export interface DocumentUploadResponse {
   message: string;
   document_id?: string;
   document_name?: string;
+  job_id?: string;
 }
\ No newline at end of file